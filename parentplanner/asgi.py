@@ -2,6 +2,7 @@
 ASGI config for parentplanner project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with uvicorn workers under gunicorn (see Procfile).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -12,5 +13,32 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'parentplanner.settings')
+os.environ.setdefault('PLANNER_ASGI', '1')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from asgiref.wsgi import WsgiToAsgi  # noqa: E402
+from django.conf import settings  # noqa: E402
+from whitenoise import WhiteNoise  # noqa: E402
+
+
+def _not_found(environ, start_response):
+    start_response('404 Not Found', [('Content-Type', 'text/plain')])
+    return [b'Not Found']
+
+
+# settings.py drops WhiteNoiseMiddleware under ASGI; serve collected static
+# files here instead, so only /static/ requests take the sync path
+static_application = WsgiToAsgi(WhiteNoise(
+    _not_found,
+    root=settings.STATIC_ROOT,
+    prefix=settings.STATIC_URL,
+    max_age=60 * 60 * 24 * 7,
+    mimetypes=getattr(settings, 'WHITENOISE_MIMETYPES', None),
+))
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].startswith(settings.STATIC_URL):
+        return await static_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -54,17 +54,26 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'planner.middleware.RequestMetricsMiddleware',  # Server-Timing + per-request metrics log
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'planner.middleware.ParentMiddleware',  # Lazy request.parent (after AuthenticationMiddleware)
     'allauth.account.middleware.AccountMiddleware',  # Required by allauth
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Set by parentplanner/asgi.py. WhiteNoise's middleware is sync-only and would
+# pin a thread for every request, so under ASGI static files are served by
+# the ASGI app instead and the rest of the stack runs async end to end.
+PLANNER_ASGI = os.environ.get('PLANNER_ASGI') == '1'
+if PLANNER_ASGI:
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'parentplanner.urls'
 
 TEMPLATES = [
@@ -99,6 +108,36 @@ if 'DATABASE_URL' in os.environ:
     }
     # Heroku PostgreSQL requires SSL connections
     DATABASES['default']['OPTIONS'] = {'sslmode': 'require'}
+
+    # Connection reuse, so a request doesn't pay for a fresh SSL handshake:
+    #   DATABASE_POOL=1  psycopg 3's pool (Django 5.1+); the default under
+    #                    ASGI, where each request runs on its own thread and
+    #                    persistent connections would never be reused
+    #   DATABASE_CONN_MAX_AGE=<seconds>  persistent per-thread connections,
+    #                    with a health check before reuse; the WSGI default
+    # Keep DATABASE_POOL_MAX_SIZE x WEB_CONCURRENCY under the plan's
+    # connection limit.
+    try:
+        import psycopg_pool  # noqa: F401
+        pool_available = True
+    except ImportError:
+        pool_available = False
+    DATABASE_POOL = os.environ.get('DATABASE_POOL', '1' if PLANNER_ASGI and pool_available else '0') == '1'
+    if DATABASE_POOL:
+        if not pool_available:
+            from django.core.exceptions import ImproperlyConfigured
+            raise ImproperlyConfigured('DATABASE_POOL=1 needs psycopg 3 with the pool extra (psycopg[pool])')
+        DATABASES['default']['CONN_MAX_AGE'] = 0  # Django requires 0 with a pool
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DATABASE_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DATABASE_POOL_MAX_SIZE', 8)),
+            'timeout': int(os.environ.get('DATABASE_POOL_TIMEOUT', 10)),
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(
+            os.environ.get('DATABASE_CONN_MAX_AGE', 0 if PLANNER_ASGI else 600)
+        )
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = DATABASES['default']['CONN_MAX_AGE'] != 0
 else:
     # Local development: Use SQLite
     DATABASES = {
@@ -109,6 +148,93 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory for development. On Heroku the web dynos (and their gunicorn
+# workers) and the worker dyno are separate machines, and each must see the
+# others' planner version bumps, or one dyno keeps serving (and 304ing) a
+# family's data after another changed it. So the default there is a shared
+# backend: Redis when a Redis add-on sets REDIS_URL, otherwise the database
+# cache table (created by `createcachetable` in the release phase). Override
+# with CACHE_BACKEND/CACHE_LOCATION.
+# The database table only holds the planner versions behind the ETags: a hit
+# there costs as many queries as it saves, so dashboard data and fragments
+# are only cached with Redis, Memcached or local memory (see
+# planner.cache.MEMORY_BACKENDS) unless PLANNER_CACHE_ENABLED is set.
+
+if 'REDIS_URL' in os.environ:
+    default_cache_backend = 'django.core.cache.backends.redis.RedisCache'
+    default_cache_location = os.environ['REDIS_URL']
+elif 'DATABASE_URL' in os.environ:  # This means we're on Heroku
+    default_cache_backend = 'django.core.cache.backends.db.DatabaseCache'
+    default_cache_location = 'planner_cache'
+else:
+    default_cache_backend = 'django.core.cache.backends.locmem.LocMemCache'
+    default_cache_location = 'parentplanner'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', default_cache_backend),
+        'LOCATION': os.environ.get('CACHE_LOCATION', default_cache_location),
+        'OPTIONS': {
+            # Django culls at 300 keys by default; a few families' fragments fill that
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
+        },
+    }
+}
+
+# Seconds a family's cached dashboard data and section fragments are kept
+PLANNER_CACHE_TIMEOUT = int(os.environ.get('PLANNER_CACHE_TIMEOUT', 60 * 10))
+
+if 'PLANNER_CACHE_ENABLED' in os.environ:
+    PLANNER_CACHE_ENABLED = os.environ['PLANNER_CACHE_ENABLED'] == 'True'
+
+
+# Email
+# SMTP when EMAIL_HOST is set (e.g. a Heroku add-on), the console otherwise
+
+if 'EMAIL_HOST' in os.environ:
+    EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    EMAIL_HOST = os.environ['EMAIL_HOST']
+    EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+    EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+    EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+    EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
+else:
+    EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'ParentPlanner <no-reply@parentplanner.app>')
+
+# Site address used in links from emails sent outside a request
+PLANNER_SITE_URL = os.environ.get('PLANNER_SITE_URL', 'http://localhost:8000')
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+# PLANNER_LOG_LEVEL=DEBUG turns on the planner views' debug logging
+
+PLANNER_REQUEST_METRICS = os.environ.get('PLANNER_REQUEST_METRICS', 'True') == 'True'
+
+# Remember the signed-in user's Parent id in the session (see planner.middleware)
+PLANNER_PARENT_IN_SESSION = os.environ.get('PLANNER_PARENT_IN_SESSION', 'False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'planner': {
+            'handlers': ['console'],
+            'level': os.environ.get('PLANNER_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -31,7 +31,15 @@ class EmailBackend(ModelBackend):
         return None
     
     def get_user(self, user_id):
+        # Join the Parent profile and its entry counters so request.parent
+        # and the dashboard header counts need no further queries
         try:
-            return User.objects.get(pk=user_id)
+            return User.objects.select_related('parent', 'parent__stats').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+
+    async def aget_user(self, user_id):
+        try:
+            return await User.objects.select_related('parent', 'parent__stats').aget(pk=user_id)
         except User.DoesNotExist:
             return None
@@ -0,0 +1,162 @@
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Child, Entry
+
+
+# Drives the main planner endpoints through the Django test client (the
+# full middleware stack, no network) and reports latency percentiles and
+# query counts for each endpoint.
+
+ENDPOINTS = ('dashboard', 'child_entries', 'add_entry', 'toggle_task_completion', 'save_entry')
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    rank = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class FamilySession:
+    """A signed-in client plus the ids the write endpoints need"""
+
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+        self.children = list(Child.objects.filter(parent__user=user).values_list('id', flat=True))
+        family = Entry.objects.visible().filter(child__parent__user=user)
+        self.tasks = list(family.tasks().values_list('id', flat=True)[:50])
+        self.entries = list(family.exclude(entry_type='note').values_list('id', flat=True)[:50])
+        self.turn = 0
+
+    def pick(self, ids):
+        self.turn += 1
+        return ids[self.turn % len(ids)]
+
+    def prepare(self, endpoint):
+        """
+        Return a zero-argument callable issuing one request to endpoint, so
+        any set-up queries stay outside the timed section.
+        """
+        client = self.client
+        if endpoint == 'dashboard':
+            return lambda: client.get(reverse('dashboard'))
+        if endpoint == 'child_entries':
+            url = reverse('child_entries', args=[self.pick(self.children)])
+            return lambda: client.get(url)
+        if endpoint == 'add_entry':
+            data = {
+                'child': self.pick(self.children), 'title': f'Benchmark task {self.turn}',
+                'entry_type': 'task', 'category': 'none', 'priority': 'medium',
+            }
+            return lambda: client.post(reverse('add_entry'), data)
+        if endpoint == 'toggle_task_completion':
+            url = reverse('toggle_task_completion', args=[self.pick(self.tasks)])
+            body = {'is_completed': self.turn % 2 == 0}
+            return lambda: client.post(url, body, content_type='application/json')
+        if endpoint == 'save_entry':
+            entry = Entry.objects.get(pk=self.pick(self.entries))
+            data = {
+                'child': entry.child_id, 'title': f'Benchmark edit {self.turn}',
+                'entry_type': entry.entry_type, 'category': entry.category, 'priority': entry.priority,
+                'description': entry.description, 'location': entry.location,
+                'event_date': entry.event_date or '', 'task_due_date': entry.task_due_date or '',
+            }
+            return lambda: client.post(reverse('save_entry', args=[entry.pk]), data)
+        raise ValueError(f'Unknown endpoint {endpoint!r}')
+
+    def usable_for(self, endpoint):
+        if endpoint in ('child_entries', 'add_entry'):
+            return bool(self.children)
+        if endpoint == 'toggle_task_completion':
+            return bool(self.tasks)
+        if endpoint == 'save_entry':
+            return bool(self.entries)
+        return True
+
+
+def measure_connection_setup(samples=20):
+    """
+    Time SELECT 1 on a freshly opened connection against SELECT 1 on a
+    reused one, which is roughly what CONN_MAX_AGE or a pool saves per
+    request. Returns medians in milliseconds.
+    """
+    def select_one():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+    fresh, reused = [], []
+    for _ in range(samples):
+        connection.close()
+        start = time.perf_counter()
+        connection.ensure_connection()
+        select_one()
+        fresh.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        select_one()
+        reused.append((time.perf_counter() - start) * 1000)
+    return {
+        'samples': samples,
+        'fresh_connection_ms': round(percentile(fresh, 50), 3),
+        'reused_connection_ms': round(percentile(reused, 50), 3),
+        'setup_overhead_ms': round(percentile(fresh, 50) - percentile(reused, 50), 3),
+    }
+
+
+def run_benchmark(users, endpoints=ENDPOINTS, iterations=50, warmup=5, clear_cache=True,
+                  close_connections=False):
+    """
+    Request each endpoint iterations times, rotating over the users, and
+    return {endpoint: stats}. Latency is wall time per request in
+    milliseconds; query counts exclude the warmup requests. With
+    close_connections the connection is closed before every request, as
+    with CONN_MAX_AGE=0 and no pool.
+    """
+    sessions = [FamilySession(user) for user in users]
+    if clear_cache:
+        cache.clear()
+
+    report = {}
+    for endpoint in endpoints:
+        usable = [session for session in sessions if session.usable_for(endpoint)]
+        if not usable:
+            report[endpoint] = {'requests': 0, 'skipped': 'no suitable data'}
+            continue
+        for n in range(warmup):
+            usable[n % len(usable)].prepare(endpoint)()
+
+        latencies, queries, statuses = [], [], defaultdict(int)
+        for n in range(iterations):
+            send = usable[n % len(usable)].prepare(endpoint)
+            if close_connections:
+                connection.close()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = send()
+                latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured.captured_queries))
+            statuses[response.status_code] += 1
+        elapsed = sum(latencies) / 1000
+
+        report[endpoint] = {
+            'requests': iterations,
+            'throughput_rps': round(iterations / elapsed, 1) if elapsed else None,
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'max_ms': round(max(latencies), 2),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+            'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        }
+    return report
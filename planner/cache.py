@@ -0,0 +1,241 @@
+import hashlib
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .queries import load_dashboard_data, aload_dashboard_data, load_calendar
+
+
+# Every cached value for a family lives under its current version number, so
+# bumping the version (see planner.signals) orphans all of it at once and the
+# stale keys simply expire. The version key can itself be culled before the
+# data it guards, so a missing version is re-seeded from the clock rather
+# than from 1: it must never come back as a number already used.
+CACHE_TIMEOUT = getattr(settings, 'PLANNER_CACHE_TIMEOUT', 60 * 10)
+
+# Backends where a hit is cheaper than the SQL it saves. A database or file
+# cache hit costs about as much as the queries behind it, so with those the
+# versions (and ETags) are still kept there but the data itself is not
+# cached unless PLANNER_CACHE_ENABLED says otherwise.
+MEMORY_BACKENDS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+HITS_KEY = 'planner:stats:hits'
+MISSES_KEY = 'planner:stats:misses'
+
+# Hits and misses are counted in-process and added to the shared counters at
+# most this often, so a lookup never pays for a counter write
+STATS_FLUSH_SECONDS = getattr(settings, 'PLANNER_CACHE_STATS_FLUSH_SECONDS', 30)
+
+DASHBOARD_SECTIONS = {
+    'children_section_html': 'components/children_section.html',
+    'timeline_section_html': 'components/timeline_section.html',
+    'tasks_section_html': 'components/tasks_section.html',
+    'notes_section_html': 'components/notes_section.html',
+}
+
+_MISSING = object()
+
+
+def _version_key(parent_id):
+    return f'planner:parent:{parent_id}:version'
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def _incr(key, delta=1, start=0):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Key culled or never set
+        if not cache.add(key, start + delta, timeout=None):
+            cache.incr(key, delta)
+
+
+def caching_enabled():
+    enabled = getattr(settings, 'PLANNER_CACHE_ENABLED', None)
+    if enabled is None:
+        return settings.CACHES['default']['BACKEND'] in MEMORY_BACKENDS
+    return enabled
+
+
+#---------------------------parent versions---------------------------
+def get_parent_version(parent_id):
+    version = cache.get(_version_key(parent_id))
+    if version is None:
+        seed = _new_version()
+        cache.add(_version_key(parent_id), seed, timeout=None)
+        version = cache.get(_version_key(parent_id), seed)
+    return version
+
+
+def bump_parent_version(parent_id):
+    """
+    Invalidate everything cached for this parent once the current
+    transaction commits (at once outside one). Bumping earlier would let a
+    request in between cache the old rows under the new version.
+    """
+    transaction.on_commit(lambda: _incr(_version_key(parent_id), start=_new_version()))
+
+
+def parent_etag(parent_id, *parts):
+    """
+    ETag for a response built only from this parent's data and parts; it
+    changes whenever the parent's version is bumped, and costs no SQL.
+    """
+    raw = ':'.join(str(part) for part in (parent_id, get_parent_version(parent_id), *parts))
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+#---------------------------hit/miss counters---------------------------
+_stats_lock = threading.Lock()
+_pending = {HITS_KEY: 0, MISSES_KEY: 0}
+_flushed_at = time.monotonic()
+
+
+def _count(key):
+    """Count a hit or miss locally; True when the counts are due a flush"""
+    with _stats_lock:
+        _pending[key] += 1
+        return time.monotonic() - _flushed_at >= STATS_FLUSH_SECONDS
+
+
+def flush_cache_stats():
+    """Add this process's unflushed hits and misses to the shared counters"""
+    global _flushed_at
+    with _stats_lock:
+        counts = dict(_pending)
+        for key in _pending:
+            _pending[key] = 0
+        _flushed_at = time.monotonic()
+    for key, delta in counts.items():
+        if delta:
+            _incr(key, delta)
+
+
+def cache_stats():
+    flush_cache_stats()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for key in _pending:
+            _pending[key] = 0
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+#---------------------------cached lookups---------------------------
+def _cache_key(parent_id, version, name):
+    return f'planner:parent:{parent_id}:v{version}:{name}'
+
+
+def cached_for_parent(parent_id, name, producer):
+    """Return the cached value for this parent, building it with producer() on a miss"""
+    if not caching_enabled():
+        return producer()
+    key = _cache_key(parent_id, get_parent_version(parent_id), name)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        if _count(HITS_KEY):
+            flush_cache_stats()
+        return value
+    if _count(MISSES_KEY):
+        flush_cache_stats()
+    value = producer()
+    cache.set(key, value, CACHE_TIMEOUT)
+    return value
+
+
+async def acached_for_parent(parent_id, name, producer):
+    """cached_for_parent() for async views; producer is a coroutine function"""
+    if not caching_enabled():
+        return await producer()
+    key = _cache_key(parent_id, await sync_to_async(get_parent_version)(parent_id), name)
+    value = await cache.aget(key, _MISSING)
+    if value is not _MISSING:
+        if _count(HITS_KEY):
+            await sync_to_async(flush_cache_stats)()
+        return value
+    if _count(MISSES_KEY):
+        await sync_to_async(flush_cache_stats)()
+    value = await producer()
+    await cache.aset(key, value, CACHE_TIMEOUT)
+    return value
+
+
+def _dashboard_filter(entry_type_filter):
+    return entry_type_filter if entry_type_filter in ('task', 'event') else ''
+
+
+def get_dashboard_data(parent, entry_type_filter=''):
+    """Cached load_dashboard_data(); a hit issues no SQL"""
+    entry_type_filter = _dashboard_filter(entry_type_filter)
+    return cached_for_parent(
+        parent.id,
+        f'dashboard-data:{entry_type_filter}',
+        lambda: load_dashboard_data(parent, entry_type_filter),
+    )
+
+
+async def aget_dashboard_data(parent, entry_type_filter=''):
+    entry_type_filter = _dashboard_filter(entry_type_filter)
+    return await acached_for_parent(
+        parent.id,
+        f'dashboard-data:{entry_type_filter}',
+        lambda: aload_dashboard_data(parent, entry_type_filter),
+    )
+
+
+def get_calendar_data(parent, start, end, child_id=None, entry_type=None):
+    """Cached load_calendar(), one entry per window and filter"""
+    return cached_for_parent(
+        parent.id,
+        f'calendar:{start}:{end}:{child_id or ""}:{entry_type or ""}',
+        lambda: load_calendar(parent, start, end, child_id, entry_type),
+    )
+
+
+def render_dashboard_sections(parent, data):
+    """
+    Render (or fetch) the four dashboard section fragments. The sections only
+    depend on the family's data, not on the request, the type filter or the
+    forms, so they are rendered without a request.
+    """
+    context = {
+        'children': data['children'],
+        'entries': data['events'],
+        'events': data['events'],
+        'tasks': data['tasks'],
+        'notes': data['notes'],
+        'tasks_next_cursor': data['tasks_next_cursor'],
+        'events_next_cursor': data['events_next_cursor'],
+        'notes_next_cursor': data['notes_next_cursor'],
+    }
+    return {
+        name: mark_safe(cached_for_parent(
+            parent.id,
+            f'fragment:{template_name}',
+            lambda template_name=template_name: render_to_string(template_name, context),
+        ))
+        for name, template_name in DASHBOARD_SECTIONS.items()
+    }
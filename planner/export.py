@@ -0,0 +1,96 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Entry
+
+
+# Planner history exports. Rows are read as tuples with values_list() and
+# .iterator(), so neither model instances nor the whole result set are ever
+# held in memory, and each format yields its output a row at a time for a
+# StreamingHttpResponse (see planner.streaming) or a file.
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Column name -> Entry lookup, in export order
+EXPORT_COLUMNS = {
+    'id': 'id',
+    'child_id': 'child_id',
+    'child': 'child__name',
+    'entry_type': 'entry_type',
+    'category': 'category',
+    'title': 'title',
+    'description': 'description',
+    'priority': 'priority',
+    'is_completed': 'is_completed',
+    'event_date': 'event_date',
+    'event_start_time': 'event_start_time',
+    'event_end_time': 'event_end_time',
+    'task_due_date': 'task_due_date',
+    'task_due_time': 'task_due_time',
+    'location': 'location',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+# Extra leading columns for exports spanning several families
+TENANT_COLUMNS = {
+    'parent_id': 'child__parent_id',
+    'username': 'child__parent__user__username',
+}
+
+
+def export_rows(entries, columns=EXPORT_COLUMNS, chunk_size=EXPORT_CHUNK_SIZE):
+    """Tuples of the columns' values, streamed from the database in chunks"""
+    return entries.values_list(*columns.values()).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    # A file-like object whose write() hands the line back to csv.writer's caller
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, columns=EXPORT_COLUMNS):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(list(columns))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows, columns=EXPORT_COLUMNS):
+    names = list(columns)
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+LINE_WRITERS = {
+    'csv': csv_lines,
+    'ndjson': ndjson_lines,
+}
+
+
+def export_lines(entries, export_format, columns=EXPORT_COLUMNS, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield entries as CSV (with a header row) or NDJSON lines"""
+    if export_format not in LINE_WRITERS:
+        raise ValueError(f'Unknown export format {export_format!r}')
+    return LINE_WRITERS[export_format](export_rows(entries, columns, chunk_size), columns)
+
+
+def parent_entries(parent, child_id=None):
+    entries = Entry.objects.for_parent(parent)
+    if child_id is not None:
+        entries = entries.filter(child_id=child_id)
+    return entries.order_by('id')
+
+
+def all_entries(parent_ids=None):
+    """Every family's entries, grouped by parent, for offline exports"""
+    entries = Entry.objects.visible()
+    if parent_ids:
+        entries = entries.filter(child__parent_id__in=parent_ids)
+    return entries.order_by('child__parent_id', 'id')
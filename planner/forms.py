@@ -143,6 +143,16 @@ class childForm(forms.ModelForm):
         }
 
 
+def event_time_errors(entry_type, event_start_time, event_end_time):
+    """An event's end time must come after its start (shared with planner.importer)"""
+    if entry_type == 'event' and event_start_time and event_end_time and event_end_time <= event_start_time:
+        return {
+            'event_end_time': 'End time must be after start time.',
+            'event_start_time': 'Start time must be before end time.'
+        }
+    return {}
+
+
 class entryForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         parent = kwargs.pop('parent', None)
@@ -212,12 +222,9 @@ class entryForm(forms.ModelForm):
                 })
         
         # Validate new separate event times
-        if entry_type == 'event' and event_start_time and event_end_time:
-            if event_end_time <= event_start_time:
-                raise forms.ValidationError({
-                    'event_end_time': 'End time must be after start time.',
-                    'event_start_time': 'Start time must be before end time.'
-                })
+        errors = event_time_errors(entry_type, event_start_time, event_end_time)
+        if errors:
+            raise forms.ValidationError(errors)
         
         return cleaned_data
         
@@ -0,0 +1,243 @@
+import re
+import secrets
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .cache import parent_etag
+from .models import Parent, Entry
+
+
+# iCalendar (RFC 5545) subscription feeds, and the VEVENT reader the
+# importer uses. Calendar apps poll these every
+# few minutes, so a feed is validated from one aggregate query (latest
+# updated_at plus row count) and the family's cache version, which also
+# moves when a child is renamed, and only rendered when that changes, and
+# then streamed row by row rather than built in memory (as an async
+# iterator under ASGI; see planner.streaming).
+
+FEED_CHUNK_SIZE = 500
+PRODID = '-//ParentPlanner//Planner feed//EN'
+
+# Entry columns a feed event needs
+FEED_FIELDS = [
+    'id', 'title', 'entry_type', 'description', 'location', 'is_completed', 'updated_at',
+    'event_date', 'event_start_time', 'event_end_time', 'task_due_date', 'task_due_time',
+    'child__name',
+]
+
+
+#---------------------------tokens---------------------------
+def get_feed_token(parent):
+    """The parent's feed token, issuing one on first use"""
+    if parent.feed_token is None:
+        token = secrets.token_urlsafe(32)
+        # Only the first of two racing requests wins; the other reads it back
+        Parent.objects.filter(pk=parent.pk, feed_token=None).update(feed_token=token)
+        parent.feed_token = Parent.objects.values_list('feed_token', flat=True).get(pk=parent.pk)
+    return parent.feed_token
+
+
+def reset_feed_token(parent):
+    """Issue a new token, so every existing subscription URL stops working"""
+    parent.feed_token = secrets.token_urlsafe(32)
+    parent.save(update_fields=['feed_token'])
+    return parent.feed_token
+
+
+#---------------------------feed data---------------------------
+def feed_entries(parent, child_id=None):
+    """Events and dated tasks in a parent's (or one child's) feed"""
+    entries = Entry.objects.for_parent(parent).exclude(entry_type='note').exclude(
+        entry_type='event', event_date=None,
+    ).exclude(entry_type='task', task_due_date=None)
+    if child_id is not None:
+        entries = entries.filter(child_id=child_id)
+    return entries
+
+
+def feed_state(entries):
+    """
+    (last_modified, count) for a feed queryset in one query. An edit moves
+    the latest updated_at and a delete changes the count, so together they
+    identify the feed's content.
+    """
+    state = entries.order_by().aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    return state['last_modified'], state['count']
+
+
+def feed_etag(parent_id, last_modified, count):
+    """
+    The entries' state alone misses changes to the children, whose names
+    are in every summary; the parent's cache version covers those.
+    """
+    stamp = last_modified.timestamp() if last_modified else 0
+    return parent_etag(parent_id, 'feed', f'{stamp:.6f}', count)
+
+
+#---------------------------rendering---------------------------
+def escape_text(value):
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+    )
+
+
+def fold(line):
+    """Fold a content line to 75 octets, continuing with a leading space"""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        # Don't split a UTF-8 sequence
+        while cut < len(encoded) and encoded[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _local(day, at):
+    # Planner times are wall-clock times in the site's time zone
+    return timezone.make_aware(datetime.combine(day, at))
+
+
+def event_lines(row):
+    """Content lines for one feed row (a dict of FEED_FIELDS)"""
+    if row['entry_type'] == 'task':
+        day, start_time, end_time = row['task_due_date'], row['task_due_time'], None
+        summary = f"{'Done' if row['is_completed'] else 'Due'}: {row['title']}"
+    else:
+        day, start_time, end_time = row['event_date'], row['event_start_time'], row['event_end_time']
+        summary = row['title']
+
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:entry-{row['id']}@parentplanner",
+        f"DTSTAMP:{_utc(row['updated_at'])}",
+        f"LAST-MODIFIED:{_utc(row['updated_at'])}",
+        f"SUMMARY:{escape_text(row['child__name'])}: {escape_text(summary)}",
+    ]
+    if start_time is None:
+        lines.append(f"DTSTART;VALUE=DATE:{day:%Y%m%d}")
+        lines.append(f"DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}")
+    else:
+        start = _local(day, start_time)
+        if row['entry_type'] == 'task':
+            end = start
+        elif end_time and end_time > start_time:
+            end = _local(day, end_time)
+        else:
+            end = start + timedelta(hours=1)
+        lines.append(f'DTSTART:{_utc(start)}')
+        lines.append(f'DTEND:{_utc(end)}')
+    if row['location']:
+        lines.append(f"LOCATION:{escape_text(row['location'])}")
+    if row['description']:
+        lines.append(f"DESCRIPTION:{escape_text(row['description'])}")
+    lines.append('END:VEVENT')
+    return lines
+
+
+def render_feed(entries, name):
+    """Yield the calendar a few lines at a time, reading entries in chunks"""
+    yield ''.join(fold(line) for line in (
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH', f'X-WR-CALNAME:{escape_text(name)}', 'REFRESH-INTERVAL;VALUE=DURATION:PT1H',
+    ))
+    rows = entries.order_by('id').values(*FEED_FIELDS).iterator(chunk_size=FEED_CHUNK_SIZE)
+    for row in rows:
+        yield ''.join(fold(line) for line in event_lines(row))
+    yield fold('END:VCALENDAR')
+
+
+#---------------------------parsing---------------------------
+_UNESCAPE = re.compile(r'\\([\\;,nN])')
+
+
+def unescape_text(value):
+    return _UNESCAPE.sub(lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+
+def unfold(lines):
+    """Join folded content lines back together, one logical line at a time"""
+    current = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_datetime_value(value, params):
+    """
+    A DTSTART/DTEND value as (date, time or None) in the site's time zone:
+    DATE values are all-day, UTC ('Z') and TZID times are converted, and
+    floating times are taken as they are.
+    """
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.strptime(value[:8], '%Y%m%d').date(), None
+    moment = datetime.strptime(value.rstrip('Z')[:15], '%Y%m%dT%H%M%S')
+    if value.endswith('Z'):
+        moment = timezone.localtime(moment.replace(tzinfo=dt_timezone.utc))
+    elif 'TZID' in params:
+        try:
+            moment = timezone.localtime(moment.replace(tzinfo=ZoneInfo(params['TZID'])))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return moment.date(), moment.time().replace(tzinfo=None)
+
+
+def _content_line(line):
+    # NAME;PARAM=VALUE;...:value
+    head, _, value = line.partition(':')
+    name, *raw_params = head.split(';')
+    params = dict(param.partition('=')[::2] for param in raw_params)
+    return name.upper(), {key.upper(): value.strip('"') for key, value in params.items()}, value
+
+
+def ics_events(lines):
+    """
+    Yield (line number, fields) for each VEVENT in an iterable of text
+    lines, reading one event at a time. fields holds title, description,
+    location, event_date, event_start_time and event_end_time, or an
+    'error' message when the dates cannot be read.
+    """
+    event = None
+    for number, line in enumerate(unfold(lines), start=1):
+        name, params, value = _content_line(line)
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            event = {'line': number, 'entry_type': 'event'}
+        elif event is None:
+            continue
+        elif name == 'END' and value.upper() == 'VEVENT':
+            yield event.pop('line'), event
+            event = None
+        elif name in ('SUMMARY', 'DESCRIPTION', 'LOCATION'):
+            key = 'title' if name == 'SUMMARY' else name.lower()
+            event[key] = unescape_text(value)
+        elif name in ('DTSTART', 'DTEND'):
+            try:
+                day, at = parse_datetime_value(value, params)
+            except ValueError:
+                event['error'] = f'Invalid {name} {value!r}'
+                continue
+            if name == 'DTSTART':
+                event['event_date'], event['event_start_time'] = day, at
+            elif at is not None and day == event.get('event_date'):
+                # Only same-day end times fit the planner's fields
+                event['event_end_time'] = at
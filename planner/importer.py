@@ -0,0 +1,213 @@
+import csv
+import io
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
+
+from .cache import bump_parent_version
+from .forms import event_time_errors
+from .ics import ics_events
+from .models import Child, Entry
+from .seed import write_entries
+from .stats import apply_child_deltas, entry_delta, merge_deltas
+
+
+# Bulk import of entries from CSV (the export_entries columns, or any subset
+# with at least a title) and iCalendar files. Files are read a row or event
+# at a time; each row is checked against the parent's children and the same
+# rules as entryForm without building a form or a model instance, and valid
+# rows are written in batches by planner.seed.write_entries (COPY on
+# Postgres, executemany elsewhere), all inside one transaction. That skips
+# the model signals, so the entry counters are updated per child and the
+# cache version bumped once at the end.
+
+IMPORT_BATCH_SIZE = 1000
+# Larger uploads are imported by a background job (see planner.jobs)
+IMPORT_INLINE_MAX_BYTES = 256 * 1024
+# Larger uploads are refused
+IMPORT_MAX_BYTES = 10 * 1024 * 1024
+# Row errors kept for the report; the rest are only counted
+IMPORT_ERRORS_SHOWN = 100
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+FALSE_VALUES = {'', '0', 'false', 'no', 'n', 'f'}
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be imported"""
+
+
+#---------------------------readers---------------------------
+def _text_lines(upload):
+    # Decode the upload lazily, tolerating a UTF-8 byte order mark
+    return io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+
+
+def csv_records(upload):
+    """Yield (row number, record) for each data row of a CSV upload"""
+    reader = csv.DictReader(_text_lines(upload))
+    if not reader.fieldnames or 'title' not in reader.fieldnames:
+        raise ImportFileError('The CSV file needs a header row with at least a title column.')
+    for record in reader:
+        yield reader.line_num, record
+
+
+def ics_records(upload):
+    """Yield (line number, record) for each VEVENT of an iCalendar upload"""
+    return ics_events(_text_lines(upload))
+
+
+IMPORT_READERS = {
+    'csv': csv_records,
+    'ics': ics_records,
+}
+
+
+def import_format(name, requested=None):
+    """The import format for an upload, from the request or the file name"""
+    file_format = (requested or name.rsplit('.', 1)[-1]).lower()
+    if file_format not in IMPORT_READERS:
+        raise ImportFileError('Upload a .csv or .ics file.')
+    return file_format
+
+
+#---------------------------validation---------------------------
+class EntryRowValidator:
+    """
+    Turns raw records into entry rows (see planner.seed.ENTRY_COLUMNS). The parent's children
+    are loaded once, so a row can name its child by id or name; rows without
+    one go to default_child.
+    """
+
+    ENTRY_TYPES = {value for value, _ in Entry.ENTRY_TYPES}
+    CATEGORIES = {value for value, _ in Entry.CATEGORY_CHOICES}
+    PRIORITIES = {value for value, _ in Entry.PRIORITY_CHOICES}
+
+    def __init__(self, parent, default_child=None):
+        children = list(Child.objects.filter(parent=parent).only('id', 'name'))
+        self.children_by_id = {child.id: child for child in children}
+        self.children_by_name = {child.name.casefold(): child for child in children}
+        self.default_child = default_child
+        self.now = timezone.now()
+
+    def child_for(self, record, errors):
+        child_id = (record.get('child_id') or '').strip()
+        name = (record.get('child') or '').strip()
+        if child_id:
+            child = self.children_by_id.get(int(child_id)) if child_id.isdigit() else None
+        elif name:
+            child = self.children_by_name.get(name.casefold())
+        else:
+            child = self.default_child
+        if child is None:
+            errors['child'] = 'Please select a child for this entry.' if not (child_id or name) else \
+                f'No child {child_id or name!r} in this family.'
+        return child
+
+    def choice(self, record, field, choices, default, errors):
+        value = (record.get(field) or '').strip().lower() or default
+        if value not in choices:
+            errors[field] = f'{value!r} is not a valid {field.replace("_", " ")}.'
+        return value
+
+    def parsed(self, record, field, parse, errors):
+        value = record.get(field)
+        if value in (None, ''):
+            return None
+        if not isinstance(value, str):
+            # ICS records already hold dates and times
+            return value
+        try:
+            result = parse(value.strip())
+        except ValueError:
+            result = None
+        if result is None:
+            errors[field] = f'Enter a valid {field.replace("_", " ")}.'
+        return result
+
+    def validate(self, record):
+        """Return (row, None) for a valid record or (None, {field: message})"""
+        errors = {}
+        if record.get('error'):
+            errors['__all__'] = record['error']
+        title = (record.get('title') or '').strip()
+        if not title:
+            errors['title'] = 'This field is required.'
+        elif len(title) > 200:
+            errors['title'] = 'Ensure this value has at most 200 characters.'
+        location = (record.get('location') or '').strip()
+        if len(location) > 200:
+            errors['location'] = 'Ensure this value has at most 200 characters.'
+
+        child = self.child_for(record, errors)
+        entry_type = self.choice(record, 'entry_type', self.ENTRY_TYPES, 'task', errors)
+        category = self.choice(record, 'category', self.CATEGORIES, 'none', errors)
+        priority = self.choice(record, 'priority', self.PRIORITIES, 'medium', errors)
+
+        completed = (record.get('is_completed') or '')
+        if not isinstance(completed, bool):
+            completed = completed.strip().lower()
+            if completed not in TRUE_VALUES | FALSE_VALUES:
+                errors['is_completed'] = 'Enter true or false.'
+            completed = completed in TRUE_VALUES
+
+        dates = {
+            field: self.parsed(record, field, parse_date, errors)
+            for field in ('event_date', 'task_due_date')
+        }
+        times = {
+            field: self.parsed(record, field, parse_time, errors)
+            for field in ('event_start_time', 'event_end_time', 'task_due_time')
+        }
+        errors.update(event_time_errors(entry_type, times['event_start_time'], times['event_end_time']))
+        if errors:
+            return None, errors
+
+        description = record.get('description') or ''
+        return (
+            title, child.id, category, entry_type, description, self.now, self.now, priority,
+            completed and entry_type == 'task', dates['event_date'], times['event_start_time'],
+            times['event_end_time'], dates['task_due_date'], times['task_due_time'], location,
+        ), None
+
+
+#---------------------------writer---------------------------
+def import_entries(parent, records, default_child=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validate and save (row number, record) pairs for a parent. Invalid rows
+    are skipped and reported; the valid ones are all saved or, if anything
+    fails, none are. Returns {'created', 'skipped', 'errors'}.
+    """
+    validator = EntryRowValidator(parent, default_child)
+    created = skipped = 0
+    errors = []
+    deltas = {}
+    batch = []
+
+    def flush():
+        write_entries(batch, batch_size=batch_size)
+        for row in batch:
+            child_id, entry_type, is_completed = row[1], row[3], row[8]
+            deltas[child_id] = merge_deltas(deltas.get(child_id, {}), entry_delta(entry_type, is_completed))
+        batch.clear()
+
+    with transaction.atomic():
+        for number, record in records:
+            row, row_errors = validator.validate(record)
+            if row_errors:
+                skipped += 1
+                if len(errors) < IMPORT_ERRORS_SHOWN:
+                    errors.append({'row': number, 'errors': row_errors})
+                continue
+            batch.append(row)
+            created += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        apply_child_deltas(parent.id, deltas)
+
+    if created:
+        bump_parent_version(parent.id)
+    return {'created': created, 'skipped': skipped, 'errors': errors}
@@ -0,0 +1,297 @@
+import csv
+import io
+import logging
+import os
+import socket
+import threading
+import traceback
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .cache import bump_parent_version
+from .importer import IMPORT_READERS, ImportFileError, import_entries
+from .models import Child, Entry, Job, JobFile
+from .stats import COUNTS, apply_delta, get_child_stats
+
+
+# A small database-backed job queue. Views enqueue work by handler name and
+# return at once; `manage.py run_worker` claims due jobs, runs them on a
+# thread or process pool and records the outcome. A claim hides the job from
+# other workers for its timeout, and a heartbeat keeps pushing it forward
+# while the handler runs; if the worker dies the claim expires and the job is
+# picked up again, or failed if that was its last attempt. Failures are
+# retried with exponential backoff until max_attempts. Handlers must
+# therefore be safe to run more than once.
+#
+# Handlers bump the family's cache version (planner.cache) from the worker
+# process. The web processes only see that through a cache backend they
+# share with the worker (see CACHES in settings); with a per-process cache
+# they would go on serving the old pages and 304s.
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 30
+# Claims are extended this many times per timeout while a handler runs
+HEARTBEATS_PER_TIMEOUT = 3
+ERROR_MAX_CHARS = 4000
+# Entries removed per DELETE when purging a deleted child
+CHILD_PURGE_BATCH_SIZE = 1000
+
+HANDLERS = {}
+
+
+class JobFailed(Exception):
+    """Raised by a handler to fail its job at once instead of retrying"""
+
+
+def job_handler(name):
+    """Register a function as the handler for jobs called name"""
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, parent=None, payload=None, max_attempts=3, timeout=300, delay=0):
+    """Queue a job for the workers; payload must be JSON-serialisable"""
+    if name not in HANDLERS:
+        raise ValueError(f'No job handler called {name!r}')
+    return Job.objects.create(
+        name=name,
+        parent=parent,
+        payload=payload or {},
+        max_attempts=max_attempts,
+        timeout=timeout,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+#---------------------------claiming---------------------------
+def _available(now):
+    return (
+        Q(status='queued', run_after__lte=now)
+        | Q(status='running', locked_until__lt=now, attempts__lt=F('max_attempts'))
+    )
+
+
+def fail_abandoned(now=None):
+    """Fail jobs whose worker died during their last attempt; returns how many"""
+    now = now or timezone.now()
+    return Job.objects.filter(status='running', locked_until__lt=now, attempts__gte=F('max_attempts')).update(
+        status='failed',
+        finished_at=now,
+        locked_until=None,
+        error='The worker running the last attempt stopped before it finished',
+    )
+
+
+def claim_jobs(worker, limit=1, now=None):
+    """
+    Claim up to limit due jobs (queued, or running with an expired claim and
+    attempts left) for worker and return their ids, oldest first. Postgres
+    locks candidate rows with SKIP LOCKED so concurrent workers never wait on
+    each other; elsewhere each claim is a conditional UPDATE and lost races
+    are skipped.
+    """
+    now = now or timezone.now()
+    fail_abandoned(now)
+    claimed = []
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    # Without row locks the conditional UPDATE alone decides the winner, and
+    # autocommit keeps SQLite from failing to upgrade a read transaction
+    with transaction.atomic() if skip_locked else nullcontext():
+        candidates = Job.objects.filter(_available(now)).order_by('run_after', 'id')
+        if skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)[:limit]
+        else:
+            # Look past the first few in case other workers win some of them
+            candidates = candidates[:limit * 4]
+        for job_id, timeout in list(candidates.values_list('id', 'timeout')):
+            won = Job.objects.filter(_available(now), pk=job_id).update(
+                status='running',
+                locked_by=worker,
+                locked_until=now + timedelta(seconds=timeout),
+                attempts=F('attempts') + 1,
+                started_at=now,
+            )
+            if won:
+                claimed.append(job_id)
+                if len(claimed) == limit:
+                    break
+    return claimed
+
+
+#---------------------------running---------------------------
+def retry_delay(attempts):
+    return timedelta(seconds=RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+
+
+def extend_claim(job_id, worker, timeout, now=None):
+    """Push worker's claim on a job timeout seconds forward; False if it was lost"""
+    now = now or timezone.now()
+    return bool(Job.objects.filter(pk=job_id, status='running', locked_by=worker).update(
+        locked_until=now + timedelta(seconds=timeout),
+    ))
+
+
+def _beat(job_id, worker, timeout, stopped):
+    try:
+        while not stopped.wait(timeout / HEARTBEATS_PER_TIMEOUT):
+            try:
+                if not extend_claim(job_id, worker, timeout):
+                    # Taken over after all; the outcome will be ignored
+                    return
+            except DatabaseError:
+                logger.warning('Could not extend the claim on job %s', job_id, exc_info=True)
+    finally:
+        connection.close()
+
+
+@contextmanager
+def heartbeat(job, worker):
+    """Keep worker's claim on job from expiring while the block runs"""
+    stopped = threading.Event()
+    thread = threading.Thread(target=_beat, args=(job.pk, worker, job.timeout, stopped),
+                              name=f'planner-job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(job_id, worker):
+    """
+    Run a claimed job and record success, a retry or failure. Every write is
+    conditional on the claim still being worker's, so a job whose claim
+    expired and was taken over is left to its new owner.
+    """
+    job = Job.objects.get(pk=job_id)
+    owned = Job.objects.filter(pk=job_id, status='running', locked_by=worker)
+    handler = HANDLERS.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f'No job handler called {job.name!r}')
+        with heartbeat(job, worker):
+            result = handler(job, **job.payload)
+    except Exception as exc:
+        error = traceback.format_exc()[-ERROR_MAX_CHARS:]
+        now = timezone.now()
+        if job.attempts < job.max_attempts and handler is not None and not isinstance(exc, JobFailed):
+            logger.warning('Job %s (%s) failed, attempt %s of %s', job.pk, job.name, job.attempts, job.max_attempts)
+            owned.update(status='queued', run_after=now + retry_delay(job.attempts), locked_until=None,
+                         locked_by='', error=error)
+            return 'retrying'
+        logger.error('Job %s (%s) failed for good', job.pk, job.name)
+        owned.update(status='failed', finished_at=now, locked_until=None, error=error)
+        return 'failed'
+    owned.update(status='succeeded', finished_at=timezone.now(), locked_until=None, result=result, error='')
+    return 'succeeded'
+
+
+def run_pending(worker=None, limit=100):
+    """Claim and run due jobs one at a time in this process; for tests and one-off runs"""
+    worker = worker or worker_id()
+    outcomes = []
+    while len(outcomes) < limit and (claimed := claim_jobs(worker, limit=1)):
+        outcomes.append(run_job(claimed[0], worker))
+    return outcomes
+
+
+def job_status(job):
+    """The JSON-ready status of a job for polling"""
+    return {
+        'id': job.pk,
+        'name': job.name,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'result': job.result,
+        # The traceback stays in the database; clients only need to know it failed
+        'error': job.error.strip().splitlines()[-1] if job.error and job.status == 'failed' else None,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
+
+
+#---------------------------handlers---------------------------
+def enqueue_import(parent, upload, file_format, child=None):
+    """Queue an uploaded file for import_entries_job"""
+    with transaction.atomic():
+        # Workers can't claim the job before its file is there
+        job = enqueue('import_entries', parent=parent, payload={
+            'file_format': file_format,
+            'child_id': child.id if child else None,
+        }, timeout=900)
+        JobFile.objects.create(job=job, name=upload.name, content=upload.read())
+    return job
+
+
+@job_handler('import_entries')
+def import_entries_job(job, file_format, child_id=None):
+    """
+    Import an uploaded file queued by the import page. The file is deleted
+    and the result recorded in the same transaction as the new entries, so
+    a retry after that commit (a crash before run_job records success)
+    finds the file gone and returns the recorded result instead of
+    importing the rows again.
+    """
+    default_child = Child.objects.filter(parent_id=job.parent_id, pk=child_id).first() if child_id else None
+    with transaction.atomic():
+        upload = JobFile.objects.select_for_update().filter(job=job).first()
+        if upload is None:
+            return Job.objects.values_list('result', flat=True).get(pk=job.pk)
+        records = IMPORT_READERS[file_format](io.BytesIO(bytes(upload.content)))
+        try:
+            result = import_entries(job.parent, records, default_child=default_child)
+        except (ImportFileError, UnicodeDecodeError, csv.Error) as e:
+            # The file won't read any better next time
+            raise JobFailed(f'Could not import that file: {e}') from e
+        Job.objects.filter(pk=job.pk).update(result=result)
+        upload.delete()
+    return result
+
+
+def delete_child_later(child):
+    """
+    Hide a child and its entries at once and queue the real delete. Only
+    the child row is written here; its entries go in bounded batches in the
+    worker, so a child with tens of thousands of entries is never loaded
+    into a request. Returns False if the child was already deleted.
+    """
+    stats = get_child_stats(child)
+    with transaction.atomic():
+        hidden = Child.objects.filter(pk=child.pk).update(deleted_at=timezone.now())
+        if not hidden:
+            return False
+        # The family's counters stop including the child straight away
+        apply_delta([child.parent_id], None, {field: -getattr(stats, field) for field in COUNTS if getattr(stats, field)})
+        enqueue('purge_child', parent=child.parent, payload={'child_id': child.pk}, timeout=900)
+    # Queryset updates bypass the model signals
+    bump_parent_version(child.parent_id)
+    return True
+
+
+@job_handler('purge_child')
+def purge_child_job(job, child_id, batch_size=CHILD_PURGE_BATCH_SIZE):
+    """Remove a deleted child's entries a batch at a time, then the child"""
+    deleted = 0
+    entries = Entry.objects.filter(child_id=child_id).order_by()
+    while ids := list(entries.values_list('id', flat=True)[:batch_size]):
+        batch = Entry.objects.filter(id__in=ids)
+        # Entries have no dependants, so skip the collector and per-row signals
+        deleted += batch._raw_delete(batch.db)
+    # Nothing is left to cascade to but the stats row
+    Child.all_objects.filter(pk=child_id, deleted_at__isnull=False).delete()
+    return {'deleted_entries': deleted}
+
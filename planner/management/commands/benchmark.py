@@ -0,0 +1,77 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from planner.benchmark import ENDPOINTS, measure_connection_setup, run_benchmark
+from planner.seed import seed_families
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic families and time the dashboard, child page and AJAX endpoints. '
+        'Prints p50/p95/p99 latency, throughput and query counts per endpoint as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parents', type=int, default=5)
+        parser.add_argument('--children', type=int, default=2, help='Children per parent')
+        parser.add_argument('--entries', type=int, default=200, help='Entries per child')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint')
+        parser.add_argument('--endpoint', action='append', choices=ENDPOINTS, dest='endpoints',
+                            help='Only benchmark this endpoint (repeatable)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the generated data')
+        parser.add_argument('--in-place', action='store_true',
+                            help='Seed into the configured database instead of a throwaway test database')
+        parser.add_argument('--close-connections', action='store_true',
+                            help='Close the database connection before each request (CONN_MAX_AGE=0, no pool)')
+        parser.add_argument('--output', help='Also write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        setup_test_environment()
+        old_name = None
+        if not options['in_place']:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            users = seed_families(
+                parents=options['parents'],
+                children_per_parent=options['children'],
+                entries_per_child=options['entries'],
+                prefix='bench',
+                seed=options['seed'],
+            )
+            results = run_benchmark(
+                users,
+                endpoints=options['endpoints'] or ENDPOINTS,
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                close_connections=options['close_connections'],
+            )
+            connections_report = measure_connection_setup()
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'database': connection.vendor,
+            'parents': options['parents'],
+            'children_per_parent': options['children'],
+            'entries_per_child': options['entries'],
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'pool': bool(connection.settings_dict['OPTIONS'].get('pool')),
+            'close_connections': options['close_connections'],
+            'connections': connections_report,
+            'endpoints': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
@@ -0,0 +1,17 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from planner.cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters for the per-parent dashboard cache (each process adds its own every PLANNER_CACHE_STATS_FLUSH_SECONDS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(cache_stats()))
+        if options['reset']:
+            reset_cache_stats()
@@ -0,0 +1,56 @@
+import os
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.export import (
+    EXPORT_COLUMNS, EXPORT_FORMATS, LINE_WRITERS, TENANT_COLUMNS, all_entries, export_lines, export_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Export every family's entries as CSV or NDJSON, streamed from the database in chunks. "
+        'Writes one file (default stdout) with parent columns, or one file per parent with --directory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', dest='export_format')
+        parser.add_argument('--output', default='-', help="File to write, or '-' for stdout")
+        parser.add_argument('--directory', help='Write parent-<id>.<format> files here instead')
+        parser.add_argument('--parent', type=int, action='append', dest='parents',
+                            help='Only export this parent id (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        entries = all_entries(options['parents'])
+
+        if options['directory']:
+            count = self.export_per_parent(entries, options)
+            self.stderr.write(f'Wrote {count} files to {options["directory"]}')
+            return
+
+        columns = {**TENANT_COLUMNS, **EXPORT_COLUMNS}
+        lines = export_lines(entries, options['export_format'], columns, options['chunk_size'])
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+        else:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                f.writelines(lines)
+
+    def export_per_parent(self, entries, options):
+        # Rows arrive grouped by parent, so each file is written in turn
+        os.makedirs(options['directory'], exist_ok=True)
+        write_lines = LINE_WRITERS[options['export_format']]
+        rows = export_rows(entries, {'parent_id': 'child__parent_id', **EXPORT_COLUMNS}, options['chunk_size'])
+        count = 0
+        for parent_id, group in groupby(rows, key=itemgetter(0)):
+            path = os.path.join(options['directory'], f'parent-{parent_id}.{options["export_format"]}')
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                f.writelines(write_lines((row[1:] for row in group), EXPORT_COLUMNS))
+            count += 1
+        return count
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from planner.stats import rebuild_all_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-parent and per-child entry counters from the entries table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT when writing the counters')
+
+    def handle(self, *args, **options):
+        parents, children = rebuild_all_stats(batch_size=options['batch_size'])
+        self.stdout.write(f'Rebuilt counters for {parents} parents and {children} children with entries')
@@ -0,0 +1,125 @@
+import logging
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connections
+
+from planner.jobs import claim_jobs, run_job, worker_id
+
+logger = logging.getLogger('planner.jobs')
+
+
+def _run(job_id, worker):
+    # Runs inline or on a pool thread or process, each with its own database
+    # connection. A job whose outcome couldn't be recorded is run again once
+    # its claim expires.
+    close_old_connections()
+    try:
+        return run_job(job_id, worker)
+    except Exception:
+        logger.exception('Job %s crashed before its outcome was recorded', job_id)
+        return 'crashed'
+    finally:
+        close_old_connections()
+
+
+def _setup_process():
+    django.setup()
+
+
+def _claim(worker, limit, poll_interval):
+    # A busy or briefly unreachable database shouldn't stop the worker
+    try:
+        return claim_jobs(worker, limit=limit)
+    except DatabaseError:
+        logger.exception('Could not claim jobs; retrying in %ss', poll_interval)
+        close_old_connections()
+        time.sleep(poll_interval)
+        return []
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background jobs (imports, cascade deletes, ...) until stopped. '
+        'Jobs are claimed from the database, so any number of workers can run side by side.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Jobs run at once (SQLite allows one writer at a time, so use 1 there)')
+        parser.add_argument('--processes', action='store_true',
+                            help='Run jobs in worker processes instead of threads (for CPU-heavy jobs)')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--worker-id', default='', help='Name recorded on claimed jobs (default host:pid:random)')
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError('--concurrency must be at least 1')
+        if options['poll_interval'] <= 0:
+            raise CommandError('--poll-interval must be positive')
+        worker = options['worker_id'] or worker_id()
+        stopping = []
+
+        def stop(signum, frame):
+            self.stdout.write('Stopping after the running jobs finish...')
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f'Worker {worker} running up to {concurrency} jobs at once')
+        start = time.perf_counter()
+        if concurrency == 1 and not options['processes']:
+            outcomes = self.run_inline(worker, options, stopping)
+        else:
+            outcomes = self.run_pool(worker, concurrency, options, stopping)
+        counts = ', '.join(f'{outcomes.count(o)} {o}' for o in sorted(set(outcomes))) or 'no jobs'
+        self.stdout.write(self.style.SUCCESS(f'Ran {counts} in {time.perf_counter() - start:.1f}s'))
+
+    def run_inline(self, worker, options, stopping):
+        outcomes = []
+        while not stopping:
+            claimed = _claim(worker, 1, options['poll_interval'])
+            if claimed:
+                outcomes.append(_run(claimed[0], worker))
+                continue
+            if options['once']:
+                break
+            close_old_connections()
+            time.sleep(options['poll_interval'])
+        return outcomes
+
+    def run_pool(self, worker, concurrency, options, stopping):
+        if options['processes']:
+            # Forked children must not share the parent's open connections
+            connections.close_all()
+            pool = ProcessPoolExecutor(concurrency, initializer=_setup_process)
+        else:
+            pool = ThreadPoolExecutor(concurrency, thread_name_prefix='planner-job')
+        outcomes = []
+        running = set()
+        with pool:
+            while not stopping:
+                free = concurrency - len(running)
+                claimed = _claim(worker, free, options['poll_interval']) if free else []
+                running.update(pool.submit(_run, job_id, worker) for job_id in claimed)
+                if not running:
+                    if options['once']:
+                        break
+                    close_old_connections()
+                    time.sleep(options['poll_interval'])
+                    continue
+                if claimed and len(running) < concurrency:
+                    # More may be waiting; only block when the pool is full or the queue empty
+                    timeout = 0
+                else:
+                    timeout = options['poll_interval']
+                done, running = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                outcomes.extend(future.result() for future in done)
+            done, _ = wait(running)
+            outcomes.extend(future.result() for future in done)
+        return outcomes
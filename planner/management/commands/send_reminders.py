@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.reminders import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Email every parent a digest of the open tasks and events due in the next N hours. '
+        'Meant to run on a schedule (e.g. daily with --hours 24).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Length of the due window from now')
+        parser.add_argument('--batch-size', type=int, default=500, help='Messages sent per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Build the digests without sending them')
+
+    def handle(self, *args, **options):
+        if options['hours'] < 1:
+            raise CommandError('--hours must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        start = time.perf_counter()
+
+        def progress(digests, entries):
+            self.stdout.write(f'  {digests} digests, {entries} entries')
+
+        digests, entries = send_digests(
+            hours=options['hours'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            progress=progress,
+        )
+        verb = 'Built' if options['dry_run'] else 'Sent'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {digests} digests covering {entries} entries in {time.perf_counter() - start:.1f}s'
+        ))
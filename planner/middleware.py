@@ -0,0 +1,220 @@
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+from django.utils.functional import SimpleLazyObject
+
+from .models import Parent
+
+logger = logging.getLogger('planner.metrics')
+
+# Metrics of the request being handled in this thread/task, or None
+_current = ContextVar('planner_request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+
+
+def _timed_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_seconds += time.perf_counter() - start
+
+
+def _install_query_timer(connection, **kwargs):
+    # Installed permanently (it is a no-op outside a request) because under
+    # ASGI the ORM runs in worker threads, each with its own connection.
+    # Inserted first so execute_wrapper() blocks still pop their own wrapper.
+    if _timed_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _timed_query)
+
+
+def _install_query_timers():
+    for connection in connections.all(initialized_only=True):
+        _install_query_timer(connection)
+
+
+def _install_template_timer():
+    """Wrap Template.render once so top-level renders are timed (includes nest)"""
+    if getattr(Template.render, '_planner_timed', False):
+        return
+    original_render = Template.render
+
+    def render(self, context):
+        metrics = _current.get()
+        if metrics is None:
+            return original_render(self, context)
+        metrics.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            metrics.template_depth -= 1
+            if metrics.template_depth == 0:
+                metrics.template_seconds += time.perf_counter() - start
+
+    render._planner_timed = True
+    Template.render = render
+
+
+class RequestMetricsMiddleware:
+    """
+    Record per-request query count, SQL time, template render time and
+    response size. They are sent back in a Server-Timing header and logged as
+    one key=value line on the 'planner.metrics' logger. Turned off entirely
+    (not even installed) when PLANNER_REQUEST_METRICS is False. Works under
+    both WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PLANNER_REQUEST_METRICS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        _install_template_timer()
+        connection_created.connect(_install_query_timer, dispatch_uid='planner_query_timer')
+        _install_query_timers()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        _install_query_timers()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        # Cover connections the ORM thread opened before this was loaded
+        await sync_to_async(_install_query_timers)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def finish(self, request, response, metrics, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        sql_ms = metrics.sql_seconds * 1000
+        template_ms = metrics.template_seconds * 1000
+        size = len(response.content) if not response.streaming else None
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={sql_ms:.1f};desc="{metrics.queries} queries"',
+            f'tpl;dur={template_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        if logger.isEnabledFor(logging.INFO):
+            match = request.resolver_match
+            logger.info(
+                'view=%s method=%s status=%s queries=%d db_ms=%.1f template_ms=%.1f total_ms=%.1f bytes=%s',
+                match.view_name if match else '-', request.method, response.status_code,
+                metrics.queries, sql_ms, template_ms, total_ms, size if size is not None else '-',
+                extra={
+                    'view': match.view_name if match else None,
+                    'status': response.status_code,
+                    'queries': metrics.queries,
+                    'db_ms': round(sql_ms, 1),
+                    'template_ms': round(template_ms, 1),
+                    'total_ms': round(total_ms, 1),
+                    'bytes': size,
+                },
+            )
+        return response
+
+
+
+#---------------------------request.parent---------------------------
+PARENT_SESSION_KEY = '_planner_parent_id'
+
+
+def get_parent(request):
+    """
+    The signed-in user's Parent, or None, memoized on the request.
+    planner.backends.EmailBackend loads the user with its parent joined, so
+    this normally costs no query at all.
+    """
+    if not hasattr(request, '_cached_parent'):
+        request._cached_parent = _load_parent(request)
+    return request._cached_parent
+
+
+def set_parent(request, parent):
+    request._cached_parent = parent
+    if getattr(settings, 'PLANNER_PARENT_IN_SESSION', False):
+        request.session[PARENT_SESSION_KEY] = parent.pk
+
+
+def _load_parent(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    if getattr(settings, 'PLANNER_PARENT_IN_SESSION', False):
+        parent_id = request.session.get(PARENT_SESSION_KEY)
+        if parent_id is not None:
+            return Parent(pk=parent_id, user=user)
+    try:
+        parent = user.parent
+    except Parent.DoesNotExist:
+        return None
+    if getattr(settings, 'PLANNER_PARENT_IN_SESSION', False):
+        request.session[PARENT_SESSION_KEY] = parent.pk
+    return parent
+
+
+async def aget_parent(request):
+    """get_parent() for async views"""
+    if not hasattr(request, '_cached_parent'):
+        # request.auser() and request.user are cached separately; share the
+        # async-loaded user so templates and forms don't fetch it again
+        request.user = await request.auser()
+        request._cached_parent = await sync_to_async(_load_parent)(request)
+    return request._cached_parent
+
+
+class ParentMiddleware:
+    """
+    Add a lazy request.parent; must come after AuthenticationMiddleware.
+    Async views should await aget_parent(request) instead, since evaluating
+    request.parent may query the database.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.parent = SimpleLazyObject(lambda: get_parent(request))
+        # A coroutine when the chain is async; the handler awaits it
+        return self.get_response(request)
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0011_alter_entry_entry_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('entry_type', 'task')), fields=['child', 'is_completed', 'task_due_date', 'task_due_time', 'created_at'], name='entry_task_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('entry_type', 'event')), fields=['child', 'event_date', 'event_start_time', 'created_at'], name='entry_event_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('entry_type', 'note')), fields=['child', '-updated_at'], name='entry_note_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['child', 'entry_type', '-created_at'], name='entry_child_created_idx'),
+        ),
+    ]
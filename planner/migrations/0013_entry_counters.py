@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0012_entry_section_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChildStats',
+            fields=[
+                ('notes_count', models.IntegerField(default=0)),
+                ('tasks_count', models.IntegerField(default=0)),
+                ('events_count', models.IntegerField(default=0)),
+                ('completed_tasks_count', models.IntegerField(default=0)),
+                ('child', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='planner.child')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParentStats',
+            fields=[
+                ('notes_count', models.IntegerField(default=0)),
+                ('tasks_count', models.IntegerField(default=0)),
+                ('events_count', models.IntegerField(default=0)),
+                ('completed_tasks_count', models.IntegerField(default=0)),
+                ('parent', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='planner.parent')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
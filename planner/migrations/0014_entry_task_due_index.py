@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0013_entry_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('entry_type', 'task')), fields=['child', 'task_due_date'], name='entry_task_due_idx'),
+        ),
+    ]
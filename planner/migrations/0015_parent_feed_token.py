@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0014_entry_task_due_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parent',
+            name='feed_token',
+            field=models.CharField(blank=True, editable=False, max_length=43, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from planner.search import install_search, uninstall_search
+
+
+def install(apps, schema_editor):
+    install_search(schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search(schema_editor)
+
+
+class Migration(migrations.Migration):
+    # Postgres: generated tsvector column + GIN index; SQLite: FTS5 table
+    # kept current by triggers (see planner.search)
+
+    dependencies = [
+        ('planner', '0015_parent_feed_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
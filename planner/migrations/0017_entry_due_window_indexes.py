@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0016_entry_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('entry_type', 'event')), fields=['event_date', 'event_start_time'], name='entry_event_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('entry_type', 'task'), ('is_completed', False)), fields=['task_due_date', 'task_due_time'], name='entry_open_task_due_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0018_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='child',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0020_job_file'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='entry',
+            name='entry_task_order_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='entry',
+            name='entry_event_order_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='entry',
+            name='entry_note_order_idx',
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('entry_type', 'task')), fields=['child', 'is_completed', 'task_due_date', 'task_due_time', 'created_at', 'id'], name='entry_task_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('entry_type', 'event')), fields=['child', 'event_date', 'event_start_time', 'created_at', 'id'], name='entry_event_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('entry_type', 'note')), fields=['child', '-updated_at', 'id'], name='entry_note_order_idx'),
+        ),
+    ]
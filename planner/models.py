@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 
@@ -13,6 +14,13 @@ class Category(models.Model):
 
 # --------------------------- child model ----------------------------
 
+class ChildManager(models.Manager):
+    # Deleted children are hidden at once and removed later by a background
+    # job (see planner.jobs.delete_child_later); all_objects still sees them
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Child(models.Model):
     
     # Predefined colour choices for children
@@ -36,11 +44,49 @@ class Child(models.Model):
     year = models.CharField(max_length=20, blank=True)
     class_name = models.CharField(max_length=50, blank=True)
     colour = models.CharField(max_length=7, choices=COLOR_CHOICES, default='#FF6B6B', blank=True)  # hex colour code
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ChildManager()
+    all_objects = models.Manager()
     
     def __str__(self):
         return self.name
 
 
+# --------------------------- entry queryset ----------------------------
+
+class EntryQuerySet(models.QuerySet):
+    # Entry columns the task/event/note cards and the section orderings read
+    CARD_FIELDS = [
+        'id', 'title', 'child', 'category', 'entry_type', 'description',
+        'created_at', 'updated_at', 'priority', 'due_date', 'is_completed',
+        'start_time', 'end_time', 'event_date', 'event_start_time', 'event_end_time',
+        'task_due_date', 'task_due_time', 'location',
+    ]
+    # The child's badge on each card (parent is kept for cache invalidation)
+    CHILD_CARD_FIELDS = ['child__id', 'child__name', 'child__colour', 'child__parent']
+
+    def for_parent(self, parent):
+        return self.filter(child__parent=parent, child__deleted_at__isnull=True)
+
+    def visible(self):
+        """Leave out the entries of deleted children still waiting to be removed"""
+        return self.filter(child__deleted_at__isnull=True)
+
+    def tasks(self):
+        return self.filter(entry_type='task')
+
+    def events(self):
+        return self.filter(entry_type='event')
+
+    def notes(self):
+        return self.filter(entry_type='note')
+
+    def with_child(self):
+        """Join the child and load only the columns the cards use"""
+        return self.select_related('child').only(*self.CARD_FIELDS, *self.CHILD_CARD_FIELDS)
+
+
 # --------------------------- entry model ----------------------------
 
 class Entry(models.Model):
@@ -94,17 +140,156 @@ class Entry(models.Model):
     task_due_time = models.TimeField(blank=True, null=True)
     location = models.CharField(max_length=200, blank=True)
 
+    objects = EntryQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        # One index per planner list ordering (see planner.queries), partial on
+        # entry_type so each section is read in order without a sort step
+        indexes = [
+            models.Index(
+                fields=['child', 'is_completed', 'task_due_date', 'task_due_time', 'created_at', 'id'],
+                condition=models.Q(entry_type='task'),
+                name='entry_task_order_idx',
+            ),
+            models.Index(
+                fields=['child', 'event_date', 'event_start_time', 'created_at', 'id'],
+                condition=models.Q(entry_type='event'),
+                name='entry_event_order_idx',
+            ),
+            models.Index(
+                fields=['child', '-updated_at', 'id'],
+                condition=models.Q(entry_type='note'),
+                name='entry_note_order_idx',
+            ),
+            # Calendar windows over task due dates (see planner.queries.load_calendar)
+            models.Index(
+                fields=['child', 'task_due_date'],
+                condition=models.Q(entry_type='task'),
+                name='entry_task_due_idx',
+            ),
+            # Due-date windows across all families (see planner.reminders)
+            models.Index(
+                fields=['event_date', 'event_start_time'],
+                condition=models.Q(entry_type='event'),
+                name='entry_event_date_idx',
+            ),
+            models.Index(
+                fields=['task_due_date', 'task_due_time'],
+                condition=models.Q(entry_type='task', is_completed=False),
+                name='entry_open_task_due_idx',
+            ),
+            # Newest-first timelines (child_entries 'entries' and the default ordering)
+            models.Index(fields=['child', 'entry_type', '-created_at'], name='entry_child_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_entry_type_display()}: {self.title}"
 
+    def save(self, *args, **kwargs):
+        # save_base() sends post_save after its own write, outside any
+        # transaction; keep the counter deltas (planner.signals) with the row.
+        # Deletes need nothing: the collector sends post_delete inside its own.
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
 
 # --------------------------- parent model ----------------------------
 
 class Parent(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
+    # Secret in the calendar subscription URLs; issued on first use (see planner.ics)
+    feed_token = models.CharField(max_length=43, unique=True, null=True, blank=True, editable=False)
     
     def __str__(self):
         return f"Parent: {self.user.username}"   
+
+
+# --------------------------- entry counter models ----------------------------
+
+class EntryCounts(models.Model):
+    # Denormalised entry counts, kept current by planner.stats on every write
+    notes_count = models.IntegerField(default=0)
+    tasks_count = models.IntegerField(default=0)
+    events_count = models.IntegerField(default=0)
+    completed_tasks_count = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def total_entries(self):
+        return self.notes_count + self.tasks_count + self.events_count
+
+    @property
+    def open_tasks_count(self):
+        return self.tasks_count - self.completed_tasks_count
+
+
+class ParentStats(EntryCounts):
+    parent = models.OneToOneField(Parent, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+
+    def __str__(self):
+        return f"Stats: {self.parent}"
+
+
+class ChildStats(EntryCounts):
+    child = models.OneToOneField(Child, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+
+    def __str__(self):
+        return f"Stats: {self.child}"
+
+
+# --------------------------- background job model ----------------------------
+
+class Job(models.Model):
+    # A unit of slow work run off the request path by `manage.py run_worker`
+    # (see planner.jobs)
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    parent = models.ForeignKey(Parent, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # Seconds a claimed job stays invisible to other workers before it is
+    # considered abandoned and run again
+    timeout = models.PositiveIntegerField(default=300)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # What the workers poll: due queued jobs and expired claims
+            models.Index(fields=['run_after'], condition=models.Q(status='queued'), name='job_queued_idx'),
+            models.Index(fields=['locked_until'], condition=models.Q(status='running'), name='job_running_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk}: {self.name} ({self.status})"
+
+
+class JobFile(models.Model):
+    # An uploaded file a job reads, kept out of the Job row so the workers'
+    # polling never carries it. Stored in the database because the web and
+    # worker dynos share no filesystem.
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, related_name='file')
+    name = models.CharField(max_length=255)
+    content = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} for job {self.job_id}"
@@ -0,0 +1,236 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
+from django.db.models import Case, When, F, Q
+
+from .models import Child, Entry
+from .pagination import ordering_terms, encode_cursor, paginate
+from .stats import get_parent_stats, get_child_stats
+
+
+# How many rows of each section the dashboard shows
+DASHBOARD_SECTION_LIMIT = 20
+DASHBOARD_NOTES_LIMIT = 15
+
+
+#---------------------------section orderings---------------------------
+def task_ordering():
+    """
+    Incomplete tasks first, then by due date (soonest first, undated last).
+    NULLS LAST gives the same order as mapping missing dates to 9999-12-31
+    but, unlike a CASE, can be read straight off entry_task_order_idx.
+    Times are NULLS LAST too, as Postgres sorts them by default, so cursors
+    mean the same thing on every backend.
+    """
+    return [
+        'is_completed',
+        F('task_due_date').asc(nulls_last=True),
+        F('task_due_time').asc(nulls_last=True),
+        'created_at',
+    ]
+
+
+def event_ordering():
+    """Upcoming events first, undated events last (see entry_event_order_idx)"""
+    return [
+        F('event_date').asc(nulls_last=True),
+        F('event_start_time').asc(nulls_last=True),
+        'created_at',
+    ]
+
+
+def note_ordering():
+    """Most recently updated notes first"""
+    return ['-updated_at']
+
+
+SECTION_ORDERINGS = {
+    'task': task_ordering,
+    'event': event_ordering,
+    'note': note_ordering,
+}
+
+
+def section_ordering(entry_type):
+    """The section's ordering made total with an id tiebreak, for paging"""
+    return SECTION_ORDERINGS[entry_type]() + ['id']
+
+
+def section_cursor(entry):
+    """Cursor for the page that follows this entry in its section"""
+    return encode_cursor(entry, ordering_terms(section_ordering(entry.entry_type)))
+
+
+def section_page(queryset, entry_type, cursor=None, limit=DASHBOARD_SECTION_LIMIT):
+    """One keyset page of a section; returns (entries, next_cursor)"""
+    return paginate(queryset.filter(entry_type=entry_type), section_ordering(entry_type), cursor, limit)
+
+
+#---------------------------section loaders---------------------------
+def load_sections(entries, stats, with_timeline=False):
+    """
+    Fetch the first page of the task, event and note sections of an entry
+    queryset, and the cursors that continue each section. Each section is
+    its own LIMITed query read in order off that type's partial index, so
+    the cost doesn't grow with the family. Per-type totals come from the
+    matching ParentStats/ChildStats row rather than a COUNT. With
+    with_timeline the newest tasks and events are also returned as
+    'timeline' for the 'All' filter (one more query).
+    """
+    entries = entries.with_child()
+    tasks, tasks_next_cursor = section_page(entries, 'task')
+    events, events_next_cursor = section_page(entries, 'event')
+    notes, notes_next_cursor = section_page(entries, 'note', limit=DASHBOARD_NOTES_LIMIT)
+    timeline = []
+    if with_timeline:
+        timeline = list(entries.exclude(entry_type='note').order_by('-created_at', '-id')[:DASHBOARD_SECTION_LIMIT])
+    return {
+        'tasks': tasks,
+        'events': events,
+        'notes': notes,
+        'timeline': timeline,
+        # Where the infinite-scroll endpoints pick up after the first page
+        'tasks_next_cursor': tasks_next_cursor,
+        'events_next_cursor': events_next_cursor,
+        'notes_next_cursor': notes_next_cursor,
+        'total_entries': stats.total_entries,
+        'notes_count': stats.notes_count,
+        'tasks_count': stats.tasks_count,
+        'events_count': stats.events_count,
+        'completed_tasks_count': stats.completed_tasks_count,
+    }
+
+
+def _dashboard_data(children, data, entry_type_filter):
+    # Mirror the All/Tasks/Events filter buttons
+    if entry_type_filter == 'task':
+        active_entries = data['tasks']
+        filtered_count = data['tasks_count']
+    elif entry_type_filter == 'event':
+        active_entries = data['events']
+        filtered_count = data['events_count']
+    else:
+        active_entries = data['timeline']
+        filtered_count = data['tasks_count'] + data['events_count']
+
+    data.update({
+        'children': children,
+        'children_count': len(children),
+        'active_entries': active_entries,
+        'filtered_count': filtered_count,
+    })
+    return data
+
+
+def load_dashboard_data(parent, entry_type_filter=''):
+    """
+    Load everything the dashboard sections need: the parent's children, then
+    the first rows of each section and the timeline (see load_sections).
+    Totals are read from the parent's ParentStats row.
+    """
+    children = list(Child.objects.filter(parent=parent).order_by('name'))
+    data = load_sections(Entry.objects.for_parent(parent), get_parent_stats(parent), with_timeline=True)
+    return _dashboard_data(children, data, entry_type_filter)
+
+
+async def aload_dashboard_data(parent, entry_type_filter=''):
+    """
+    load_dashboard_data() for async views. The ORM is synchronous, so the
+    queries run one after the other on the thread-sensitive executor; the
+    event loop is free meanwhile but they don't overlap.
+    """
+    return await sync_to_async(load_dashboard_data)(parent, entry_type_filter)
+
+
+def load_child_data(child):
+    """First page of each section of a child's profile, one query per section"""
+    return load_sections(Entry.objects.filter(child=child), get_child_stats(child))
+
+
+async def aload_child_data(child):
+    return await sync_to_async(load_child_data)(child)
+
+
+#---------------------------calendar windows---------------------------
+CALENDAR_VIEWS = ('month', 'week')
+
+# Entry columns a calendar cell shows
+CALENDAR_FIELDS = [
+    'id', 'title', 'entry_type', 'category', 'priority', 'is_completed', 'location',
+    'event_date', 'event_start_time', 'event_end_time', 'task_due_date', 'task_due_time',
+    'child_id', 'child__name', 'child__colour',
+]
+
+
+def calendar_window(view, day):
+    """
+    (start, end, previous, next) for the Monday-to-Sunday weeks covering
+    day's month or week; previous and next are any day in the neighbouring
+    period.
+    """
+    if view == 'week':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6), start - timedelta(days=7), start + timedelta(days=7)
+    if view != 'month':
+        raise ValueError(f'Unknown calendar view {view!r}')
+    first = day.replace(day=1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    last = following - timedelta(days=1)
+    start = first - timedelta(days=first.weekday())
+    end = last + timedelta(days=6 - last.weekday())
+    return start, end, (first - timedelta(days=1)).replace(day=1), following
+
+
+def by_type(event_field, task_field):
+    """
+    The event column for events and the task column for tasks. Edits that
+    change an entry's type leave the other type's columns filled in, so
+    they can't simply be coalesced.
+    """
+    return Case(When(entry_type='event', then=F(event_field)), default=F(task_field))
+
+
+def load_calendar(parent, start, end, child_id=None, entry_type=None):
+    """
+    Events and dated tasks between start and end inclusive, grouped by day,
+    in one query. Each type's range is read off its own partial index
+    (entry_event_order_idx, entry_task_due_idx). Returns a list of
+    {'date', 'entries'} for every day in the window.
+    """
+    in_window = Q()
+    if entry_type in (None, '', 'event'):
+        in_window |= Q(entry_type='event', event_date__range=(start, end))
+    if entry_type in (None, '', 'task'):
+        in_window |= Q(entry_type='task', task_due_date__range=(start, end))
+    if not in_window:
+        raise ValueError(f'Unknown entry type {entry_type!r}')
+
+    entries = Entry.objects.for_parent(parent).filter(in_window)
+    if child_id is not None:
+        entries = entries.filter(child_id=child_id)
+    rows = (
+        entries
+        .annotate(
+            day=by_type('event_date', 'task_due_date'),
+            day_time=by_type('event_start_time', 'task_due_time'),
+        )
+        .order_by('day', F('day_time').asc(nulls_last=True), 'id')
+        .values('day', 'day_time', *CALENDAR_FIELDS)
+    )
+
+    days = {start + timedelta(days=n): [] for n in range((end - start).days + 1)}
+    for row in rows:
+        days[row.pop('day')].append({
+            'id': row['id'],
+            'title': row['title'],
+            'entry_type': row['entry_type'],
+            'category': row['category'],
+            'priority': row['priority'],
+            'is_completed': row['is_completed'],
+            'location': row['location'],
+            'start_time': row['day_time'],
+            'end_time': row['event_end_time'] if row['entry_type'] == 'event' else None,
+            'child': {'id': row['child_id'], 'name': row['child__name'], 'colour': row['child__colour']},
+        })
+    return [{'date': day, 'entries': day_entries} for day, day_entries in days.items()]
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Entry
+from .queries import by_type
+
+
+# Reminder digests: one email per parent listing their open tasks and
+# events due in the next few hours. The window is worked out once and the
+# due entries for every parent come from one query over the date indexes
+# (entry_event_date_idx, entry_open_task_due_idx), read in chunks and grouped
+# by parent as they stream in. Messages go out in batches over one mail
+# connection rather than one connection per message.
+
+DIGEST_BATCH_SIZE = 500
+DIGEST_CHUNK_SIZE = 2000
+DIGEST_ITEMS_MAX = 50
+
+# Columns each digest row needs, in the order due_rows() yields them
+DIGEST_FIELDS = [
+    'child__parent_id', 'child__parent__user__email', 'child__parent__user__username',
+    'day', 'day_time', 'entry_type', 'title', 'location', 'child__name',
+]
+
+
+def due_window(hours, now=None):
+    """(start, end) local datetimes for the next hours from now"""
+    start = timezone.localtime(now or timezone.now())
+    return start, start + timedelta(hours=hours)
+
+
+def due_between(date_field, time_field, start, end):
+    """
+    Q for a date and optional time falling in [start, end). Untimed entries
+    count on their date from the start day, but not on the end day, so
+    back-to-back windows never list them twice.
+    """
+    untimed = Q(**{f'{time_field}__isnull': True})
+    if start.date() == end.date():
+        return Q(**{date_field: start.date()}) & (
+            Q(**{f'{time_field}__gte': start.time(), f'{time_field}__lt': end.time()}) | untimed
+        )
+    return (
+        Q(**{f'{date_field}__gt': start.date(), f'{date_field}__lt': end.date()})
+        | Q(**{date_field: start.date()}) & (Q(**{f'{time_field}__gte': start.time()}) | untimed)
+        | Q(**{date_field: end.date(), f'{time_field}__lt': end.time()})
+    )
+
+
+def due_entries(start, end):
+    """Open tasks and events due in the window, for every active parent with an email"""
+    return Entry.objects.visible().filter(
+        Q(entry_type='task', is_completed=False) & due_between('task_due_date', 'task_due_time', start, end)
+        | Q(entry_type='event') & due_between('event_date', 'event_start_time', start, end),
+        child__parent__user__is_active=True,
+    ).exclude(child__parent__user__email='')
+
+
+def due_rows(start, end, chunk_size=DIGEST_CHUNK_SIZE):
+    """Tuples of DIGEST_FIELDS grouped by parent, in due order"""
+    return (
+        due_entries(start, end)
+        .annotate(
+            day=by_type('event_date', 'task_due_date'),
+            day_time=by_type('event_start_time', 'task_due_time'),
+        )
+        .order_by('child__parent_id', 'day', 'day_time', 'id')
+        .values_list(*DIGEST_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def digest_message(rows, start, end, connection=None):
+    """One parent's digest from their rows (all sharing parent and email)"""
+    _, email, username = rows[0][:3]
+    items = [
+        {
+            'date': day, 'time': at, 'entry_type': entry_type, 'title': title,
+            'location': location, 'child': child,
+        }
+        for _, _, _, day, at, entry_type, title, location, child in rows[:DIGEST_ITEMS_MAX]
+    ]
+    context = {
+        'username': username,
+        'items': items,
+        'more': len(rows) - len(items),
+        'start': start,
+        'end': end,
+        'dashboard_url': settings.PLANNER_SITE_URL + reverse('dashboard'),
+    }
+    count = len(rows)
+    subject = f"ParentPlanner: {count} thing{'s' if count != 1 else ''} coming up"
+    message = EmailMultiAlternatives(
+        subject,
+        render_to_string('planner/email/reminder_digest.txt', context),
+        to=[email],
+        connection=connection,
+    )
+    message.attach_alternative(render_to_string('planner/email/reminder_digest.html', context), 'text/html')
+    return message
+
+
+def digest_messages(start, end, connection=None, chunk_size=DIGEST_CHUNK_SIZE):
+    """Yield (digest, number of entries) per parent with anything due, one parent at a time"""
+    for _, rows in groupby(due_rows(start, end, chunk_size), key=itemgetter(0)):
+        rows = list(rows)
+        yield digest_message(rows, start, end, connection), len(rows)
+
+
+def send_digests(hours=24, now=None, batch_size=DIGEST_BATCH_SIZE, dry_run=False, progress=None):
+    """
+    Send every parent's digest for the next hours. Returns (digests, entries);
+    with dry_run the messages are built but not sent. progress, if given, is
+    called with the running totals after each batch.
+    """
+    start, end = due_window(hours, now)
+    connection = get_connection()
+    digests = entries = 0
+    with connection:
+        messages = digest_messages(start, end, connection)
+        while batch := list(islice(messages, batch_size)):
+            if not dry_run:
+                connection.send_messages([message for message, _ in batch])
+            digests += len(batch)
+            entries += sum(count for _, count in batch)
+            if progress:
+                progress(digests, entries)
+    return digests, entries
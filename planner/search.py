@@ -0,0 +1,166 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Entry
+
+
+# Full-text search over entry titles, locations and descriptions (weighted
+# in that order). On Postgres the entry table has a generated tsvector
+# column, search_vector, with a GIN index; on SQLite an external-content
+# FTS5 table, planner_entry_fts, is kept in step by triggers. Both are
+# created by migration 0016 and are not model fields, so queries reach them
+# through RawSQL. Other backends fall back to icontains with no ranking.
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_PAGE_SIZE_MAX = 50
+SEARCH_CONFIG = 'english'
+
+FTS_TABLE = 'planner_entry_fts'
+
+POSTGRES_INSTALL = [
+    f"""
+    ALTER TABLE planner_entry ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    'CREATE INDEX entry_search_idx ON planner_entry USING GIN (search_vector)',
+]
+POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS entry_search_idx',
+    'ALTER TABLE planner_entry DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON planner_entry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, location, description)
+        VALUES (new.id, new.title, new.location, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON planner_entry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, location, description)
+        VALUES ('delete', old.id, old.title, old.location, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF title, location, description ON planner_entry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, location, description)
+        VALUES ('delete', old.id, old.title, old.location, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, location, description)
+        VALUES (new.id, new.title, new.location, new.description);
+    END
+    """,
+]
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, location, description,
+        content='planner_entry', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    *SQLITE_TRIGGERS,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+#---------------------------schema---------------------------
+def install_search(schema_editor):
+    """
+    Create the search column or table for this backend. SQLite drops
+    triggers when a migration rebuilds planner_entry, so such migrations
+    should call uninstall_search() and install_search() again.
+    """
+    statements = {'postgresql': POSTGRES_INSTALL, 'sqlite': SQLITE_INSTALL}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def uninstall_search(schema_editor):
+    statements = {'postgresql': POSTGRES_UNINSTALL, 'sqlite': SQLITE_UNINSTALL}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+#---------------------------queries---------------------------
+def search_terms(query):
+    """The words of a search box query, lower-cased, at most 10"""
+    return re.findall(r'\w+', query.lower())[:10]
+
+
+def _postgres_search(entries, terms):
+    # Every word must match, the last as a prefix so results keep up with typing
+    tsquery = ' & '.join(f'{term}:*' if n == len(terms) - 1 else term for n, term in enumerate(terms))
+    match = f"to_tsquery('{SEARCH_CONFIG}', %s)"
+    return entries.filter(
+        RawSQL(f'planner_entry.search_vector @@ {match}', [tsquery], output_field=BooleanField()),
+    ).annotate(
+        rank=RawSQL(f'ts_rank_cd(planner_entry.search_vector, {match})', [tsquery], output_field=FloatField()),
+    )
+
+
+def _sqlite_search(entries, terms):
+    fts_query = ' '.join(f'"{term}"*' if n == len(terms) - 1 else f'"{term}"' for n, term in enumerate(terms))
+    # bm25() is lower for better matches; weights follow the Postgres A/B/C order
+    return entries.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [fts_query]),
+    ).annotate(
+        rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 5.0, 2.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = planner_entry.id',
+            [fts_query],
+            output_field=FloatField(),
+        ),
+    )
+
+
+def _fallback_search(entries, terms):
+    for term in terms:
+        entries = entries.filter(Q(title__icontains=term) | Q(location__icontains=term) | Q(description__icontains=term))
+    return entries.annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+SEARCH_BACKENDS = {
+    'postgresql': _postgres_search,
+    'sqlite': _sqlite_search,
+}
+
+
+def search_entries(parent, query, child_id=None, entry_type=None, category=None):
+    """
+    A parent's entries matching every word of query, best first, with a
+    rank annotation. Returns an empty queryset for a query with no words.
+    """
+    terms = search_terms(query)
+    entries = Entry.objects.for_parent(parent).with_child()
+    if not terms:
+        return entries.none()
+    if child_id is not None:
+        entries = entries.filter(child_id=child_id)
+    if entry_type:
+        entries = entries.filter(entry_type=entry_type)
+    if category:
+        entries = entries.filter(category=category)
+    search = SEARCH_BACKENDS.get(connection.vendor, _fallback_search)
+    return search(entries, terms).order_by('-rank', '-updated_at', '-id')
+
+
+def search_page(results, page=1, per_page=SEARCH_PAGE_SIZE):
+    """
+    One page of search results as (entries, has_next). One row past the
+    page is fetched instead of running a COUNT over every match.
+    """
+    offset = (page - 1) * per_page
+    rows = list(results[offset:offset + per_page + 1])
+    return rows[:per_page], len(rows) > per_page
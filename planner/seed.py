@@ -0,0 +1,228 @@
+import io
+import random
+import re
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import IntegerField, Max
+from django.db.models.functions import Cast, Substr
+from django.utils import timezone
+
+from .models import Parent, Child, Entry
+from .stats import rebuild_all_stats
+
+
+# Synthetic families for benchmarks and local load testing. Families are
+# created a chunk at a time and their entries are generated lazily as plain
+# tuples, so memory stays bounded whatever the volume. Users, parents and
+# children are bulk_created; entries go in with COPY on Postgres and a
+# batched executemany INSERT elsewhere. None of it fires model signals, so
+# the entry counters are rebuilt once at the end.
+
+SEED_PASSWORD = 'planner-seed'
+# How far back seeded entries were created
+HISTORY_DAYS = 365
+
+# Entry columns in the order entry_rows() yields them
+ENTRY_COLUMNS = [
+    'title', 'child_id', 'category', 'entry_type', 'description', 'created_at', 'updated_at',
+    'priority', 'is_completed', 'event_date', 'event_start_time', 'event_end_time',
+    'task_due_date', 'task_due_time', 'location',
+]
+
+ENTRY_TYPE_WEIGHTS = {'task': 45, 'event': 35, 'note': 20}
+CATEGORY_WEIGHTS = {
+    'none': 20, 'homework': 15, 'school': 15, 'activities': 10, 'chores': 10, 'health': 6,
+    'appointments': 6, 'reminders': 8, 'celebrations': 4, 'achievements': 3, 'other': 3,
+}
+PRIORITY_WEIGHTS = {'low': 3, 'medium': 5, 'high': 2}
+LOCATIONS = ['School', 'Home', 'Leisure centre', 'GP surgery', 'Dentist', 'Park', 'Library', "Grandma's"]
+TITLES = {
+    'task': ['Pack PE kit', 'Reading log', 'Spelling practice', 'Tidy bedroom', 'Return library book',
+             'Sign permission slip', 'Maths homework', 'Practise piano'],
+    'event': ['Swimming lesson', 'Parents evening', 'Dentist check-up', 'Football match', 'School trip',
+              'Birthday party', 'Music exam', 'Inset day'],
+    'note': ['Allergy note', 'Shoe size', 'Teacher feedback', 'Gift ideas', 'Medication dose',
+             'Friends to invite', 'Reading level', 'Club contacts'],
+}
+
+
+def _weighted(weights):
+    return list(weights), list(weights.values())
+
+
+def entry_rows(child_ids, entries_per_child, rng, today=None, now=None):
+    """
+    Yield entry tuples (see ENTRY_COLUMNS) for each child. Task due dates
+    cluster around the coming fortnight and past tasks are mostly done;
+    events spread across the school year either side of today. Entries were
+    created over the last HISTORY_DAYS, more of them recently, and about
+    half (most notes) edited some time after.
+    """
+    today = today or date.today()
+    now = now or timezone.now()
+    types, type_weights = _weighted(ENTRY_TYPE_WEIGHTS)
+    categories, category_weights = _weighted(CATEGORY_WEIGHTS)
+    priorities, priority_weights = _weighted(PRIORITY_WEIGHTS)
+
+    for child_id in child_ids:
+        for entry_type in rng.choices(types, type_weights, k=entries_per_child):
+            is_completed = False
+            event_date = event_start = event_end = task_due_date = task_due_time = None
+            location = ''
+            if entry_type == 'task':
+                if rng.random() < 0.85:
+                    task_due_date = today + timedelta(days=round(rng.gauss(7, 21)))
+                    if rng.random() < 0.5:
+                        task_due_time = time(rng.randint(7, 20), rng.choice((0, 15, 30, 45)))
+                overdue = task_due_date is not None and task_due_date < today
+                is_completed = rng.random() < (0.8 if overdue else 0.1)
+            elif entry_type == 'event':
+                event_date = today + timedelta(days=round(rng.triangular(-180, 180, 0)))
+                if rng.random() < 0.75:
+                    start = datetime.combine(today, time(rng.randint(7, 19), rng.choice((0, 15, 30, 45))))
+                    event_start = start.time()
+                    event_end = min(start + timedelta(minutes=rng.choice((30, 45, 60, 90, 120, 180))),
+                                    datetime.combine(today, time(23, 59))).time()
+                if rng.random() < 0.6:
+                    location = rng.choice(LOCATIONS)
+            created_at = now - timedelta(seconds=rng.triangular(0, HISTORY_DAYS * 86400, 0))
+            updated_at = created_at
+            if rng.random() < (0.8 if entry_type == 'note' else 0.4):
+                updated_at += (now - created_at) * rng.random()
+            yield (
+                rng.choice(TITLES[entry_type]), child_id,
+                rng.choices(categories, category_weights)[0], entry_type,
+                'Seeded entry' if rng.random() < 0.5 else '', created_at, updated_at,
+                rng.choices(priorities, priority_weights)[0], is_completed,
+                event_date, event_start, event_end, task_due_date, task_due_time, location,
+            )
+
+
+#---------------------------writers---------------------------
+def _copy_value(value):
+    # Postgres COPY text format
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _copy_entries(rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    sql = f'COPY {Entry._meta.db_table} ({", ".join(ENTRY_COLUMNS)}) FROM STDIN'
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):
+            raw.copy_expert(sql, buffer)  # psycopg2
+        else:
+            with raw.copy(sql) as copy:  # psycopg 3
+                copy.write(buffer.getvalue())
+
+
+def _insert_entries(rows):
+    # One prepared INSERT run with executemany: the same statement
+    # bulk_create would build, without a model instance per row
+    ops = connection.ops
+    adapters = {
+        datetime: ops.adapt_datetimefield_value,
+        date: ops.adapt_datefield_value,
+        time: ops.adapt_timefield_value,
+    }
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        ops.quote_name(Entry._meta.db_table),
+        ', '.join(ops.quote_name(column) for column in ENTRY_COLUMNS),
+        ', '.join(['%s'] * len(ENTRY_COLUMNS)),
+    )
+    params = [
+        [adapters[type(value)](value) if type(value) in adapters else value for value in row]
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def write_entries(rows, batch_size=5000, use_copy=None):
+    """Write entry tuples in batches; returns the number written"""
+    if use_copy is None:
+        use_copy = connection.vendor == 'postgresql'
+    write = _copy_entries if use_copy else _insert_entries
+    written = 0
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        write(batch)
+        written += len(batch)
+    return written
+
+
+#---------------------------families---------------------------
+def _next_number(prefix):
+    # Number after the highest existing prefix-N; a count would reuse names
+    # once any seeded user is deleted or another name shares the prefix
+    numbered = User.objects.filter(username__regex=rf'^{re.escape(prefix)}-[0-9]+$')
+    highest = numbered.aggregate(
+        highest=Max(Cast(Substr('username', len(prefix) + 2), IntegerField())),
+    )['highest']
+    return 0 if highest is None else highest + 1
+
+
+def _create_families(count, start, children_per_parent, prefix, password):
+    users = User.objects.bulk_create([
+        User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password=password)
+        for i in range(start, start + count)
+    ])
+    # SQLite and Postgres both return primary keys from bulk_create
+    parents = Parent.objects.bulk_create([Parent(user=user) for user in users])
+    colours = [choice[0] for choice in Child.COLOR_CHOICES]
+    children = Child.objects.bulk_create([
+        Child(parent=parent, name=f'Child {n + 1}', colour=colours[(parent.pk + n) % len(colours)])
+        for parent in parents
+        for n in range(children_per_parent)
+    ])
+    return users, [child.pk for child in children]
+
+
+def seed_families(parents=1, children_per_parent=2, entries_per_child=50, prefix='seed',
+                  batch_size=5000, families_per_chunk=500, seed=None, use_copy=None, progress=None):
+    """
+    Create parents (with users), children and entries and return a queryset
+    of the new users. Each chunk of families is committed in its own
+    transaction; progress, if given, is called with (families done, entries
+    written) after each.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    now = timezone.now()
+    password = make_password(SEED_PASSWORD)
+    start = _next_number(prefix)
+
+    user_ids = []
+    done = written = 0
+    while done < parents:
+        count = min(families_per_chunk, parents - done)
+        with transaction.atomic():
+            users, child_ids = _create_families(count, start + done, children_per_parent, prefix, password)
+            written += write_entries(
+                entry_rows(child_ids, entries_per_child, rng, today, now),
+                batch_size=batch_size,
+                use_copy=use_copy,
+            )
+        user_ids = [min(user_ids + [users[0].pk]), max(user_ids + [users[-1].pk])]
+        done += count
+        if progress:
+            progress(done, written)
+
+    rebuild_all_stats()
+    if not user_ids:
+        return User.objects.none()
+    return User.objects.filter(pk__range=user_ids, username__startswith=f'{prefix}-').order_by('pk')
@@ -0,0 +1,77 @@
+from operator import methodcaller
+
+
+# Field name -> the model columns it reads, in output order. The API's
+# ?fields= picks a subset of these and loads only their columns.
+CHILD_FIELDS = {
+    'id': ['id'],
+    'name': ['name'],
+    'colour': ['colour'],
+    'birth_date': ['birth_date'],
+    'school': ['school'],
+    'year': ['year'],
+    'class_name': ['class_name'],
+}
+# The child's badge on an entry
+CHILD_CARD_FIELDS = ['id', 'name', 'colour']
+
+ENTRY_FIELDS = {
+    'id': ['id'],
+    'title': ['title'],
+    'entry_type': ['entry_type'],
+    'category': ['category'],
+    'category_display': ['category'],
+    'priority': ['priority'],
+    'is_completed': ['is_completed'],
+    'description': ['description'],
+    'location': ['location'],
+    'event_date': ['event_date'],
+    'event_start_time': ['event_start_time'],
+    'event_end_time': ['event_end_time'],
+    'task_due_date': ['task_due_date'],
+    'task_due_time': ['task_due_time'],
+    'created_at': ['created_at'],
+    'updated_at': ['updated_at'],
+    'child': [f'child__{name}' for name in CHILD_CARD_FIELDS],
+    'child_id': ['child'],
+}
+# What the dashboard cards use, and the API's default
+ENTRY_CARD_FIELDS = [name for name in ENTRY_FIELDS if name != 'child_id']
+
+
+def sparse_fields(requested, available, default):
+    """
+    The field names asked for in a comma-separated ?fields= value, or
+    default when it is empty; id is always included. Raises ValueError for
+    unknown names.
+    """
+    if not requested:
+        return list(default)
+    names = ['id'] + [name.strip() for name in requested.split(',') if name.strip() and name.strip() != 'id']
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown field{'s' if len(unknown) > 1 else ''}: {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+
+def field_columns(fields, available):
+    """The columns to pass to .only() for these field names"""
+    return list(dict.fromkeys(column for name in fields for column in available[name]))
+
+
+def child_to_dict(child, fields=CHILD_CARD_FIELDS):
+    return {name: getattr(child, name) for name in fields}
+
+
+ENTRY_VALUES = {
+    'category_display': methodcaller('get_category_display'),
+    'child': lambda entry: child_to_dict(entry.child),
+}
+
+
+def entry_to_dict(entry, fields=ENTRY_CARD_FIELDS):
+    """Compact JSON-ready form of an entry for the dashboard cards"""
+    return {
+        name: ENTRY_VALUES[name](entry) if name in ENTRY_VALUES else getattr(entry, name)
+        for name in fields
+    }
@@ -0,0 +1,82 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_parent_version
+from .models import Parent, Child, Entry, ParentStats, ChildStats
+from .stats import apply_delta, entry_delta, merge_deltas
+
+
+def _entry_parent_id(entry):
+    # Use the loaded child when the caller already has it
+    if Entry._meta.get_field('child').is_cached(entry):
+        return entry.child.parent_id
+    return Child.objects.filter(pk=entry.child_id).values_list('parent_id', flat=True).first()
+
+
+def _counted_state(entry):
+    # What the counters know about this row; None when a field was deferred
+    state = (entry.__dict__.get('entry_type'), entry.__dict__.get('is_completed'), entry.__dict__.get('child_id'))
+    return None if None in state else state
+
+
+@receiver(post_init, sender=Entry)
+def remember_counted_state(sender, instance, **kwargs):
+    instance._counted_state = _counted_state(instance)
+
+
+def _update_counters_on_save(instance, parent_id, created):
+    new_state = _counted_state(instance)
+    old_state = None if created else instance._counted_state
+    instance._counted_state = new_state
+    if new_state is None or new_state == old_state:
+        return
+    added = entry_delta(new_state[0], new_state[1])
+    if created:
+        apply_delta([parent_id], [new_state[2]], added)
+        return
+    if old_state is None:
+        # Loaded with the counted fields deferred; rebuild_stats repairs this
+        return
+    removed = entry_delta(old_state[0], old_state[1], sign=-1)
+    if old_state[2] == new_state[2]:
+        apply_delta([parent_id], [new_state[2]], merge_deltas(removed, added))
+    else:
+        # Moved to another child of the same family
+        apply_delta([parent_id], None, merge_deltas(removed, added))
+        apply_delta(None, [old_state[2]], removed)
+        apply_delta(None, [new_state[2]], added)
+
+
+@receiver(post_save, sender=Entry)
+def entry_saved(sender, instance, created, **kwargs):
+    parent_id = _entry_parent_id(instance)
+    _update_counters_on_save(instance, parent_id, created)
+    if parent_id is not None:
+        bump_parent_version(parent_id)
+
+
+@receiver(post_delete, sender=Entry)
+def entry_deleted(sender, instance, **kwargs):
+    parent_id = _entry_parent_id(instance)
+    state = instance._counted_state or _counted_state(instance)
+    if state is not None:
+        apply_delta([parent_id], [state[2]], entry_delta(state[0], state[1], sign=-1))
+    if parent_id is not None:
+        bump_parent_version(parent_id)
+
+
+@receiver(post_save, sender=Parent)
+def create_parent_stats(sender, instance, created, **kwargs):
+    if created:
+        ParentStats.objects.bulk_create([ParentStats(parent_id=instance.pk)], ignore_conflicts=True)
+
+
+@receiver(post_save, sender=Child)
+def create_child_stats(sender, instance, created, **kwargs):
+    if created:
+        ChildStats.objects.bulk_create([ChildStats(child_id=instance.pk)], ignore_conflicts=True)
+
+
+@receiver([post_save, post_delete], sender=Child)
+def invalidate_parent_cache_for_child(sender, instance, **kwargs):
+    bump_parent_version(instance.parent_id)
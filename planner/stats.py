@@ -0,0 +1,142 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Value, When
+
+from .models import Parent, Child, Entry, ParentStats, ChildStats
+
+
+# Per-parent and per-child entry counters. Writes apply +/- deltas with
+# F-expressions in the same transaction as the entry change (Entry.save()
+# runs its post_save handler inside an atomic block, and deletes send
+# post_delete inside the collector's); reads are a primary-key lookup. A missing row is rebuilt from a COUNT on first read,
+# and the rebuild_stats command recomputes everything.
+
+COUNT_FIELDS = {
+    'note': 'notes_count',
+    'task': 'tasks_count',
+    'event': 'events_count',
+}
+
+COUNTS = {
+    'notes_count': Count('id', filter=Q(entry_type='note')),
+    'tasks_count': Count('id', filter=Q(entry_type='task')),
+    'events_count': Count('id', filter=Q(entry_type='event')),
+    'completed_tasks_count': Count('id', filter=Q(entry_type='task', is_completed=True)),
+}
+
+
+def entry_delta(entry_type, is_completed, sign=1):
+    """Counter changes for adding (sign=1) or removing (sign=-1) one entry"""
+    delta = {COUNT_FIELDS[entry_type]: sign}
+    if entry_type == 'task' and is_completed:
+        delta['completed_tasks_count'] = sign
+    return delta
+
+
+def merge_deltas(*deltas):
+    merged = defaultdict(int)
+    for delta in deltas:
+        for field, change in delta.items():
+            merged[field] += change
+    return {field: change for field, change in merged.items() if change}
+
+
+def _updates(delta):
+    return {field: F(field) + change for field, change in delta.items()}
+
+
+def apply_delta(parent_ids, child_ids, delta):
+    """
+    Add delta to the counters of the given parents and children. Either may
+    be a list of ids, a queryset of ids (so callers need not load them) or
+    None to leave that table alone.
+    Rows that do not exist yet are left alone; they are built on first read.
+    """
+    if not delta:
+        return
+    with transaction.atomic(savepoint=False):
+        if parent_ids is not None:
+            ParentStats.objects.filter(pk__in=parent_ids).update(**_updates(delta))
+        if child_ids is not None:
+            ChildStats.objects.filter(pk__in=child_ids).update(**_updates(delta))
+
+
+def apply_child_deltas(parent_id, deltas_by_child):
+    """
+    Apply a {child_id: delta} mapping, e.g. after a bulk update or delete,
+    as one UPDATE of the parent's row and one of all the children's rows.
+    """
+    deltas_by_child = {child_id: delta for child_id, delta in deltas_by_child.items() if delta}
+    if not deltas_by_child:
+        return
+    fields = {field for delta in deltas_by_child.values() for field in delta}
+    child_updates = {
+        field: F(field) + Case(
+            *[When(pk=child_id, then=Value(delta[field]))
+              for child_id, delta in deltas_by_child.items() if field in delta],
+            default=Value(0),
+        )
+        for field in fields
+    }
+    with transaction.atomic(savepoint=False):
+        apply_delta([parent_id], None, merge_deltas(*deltas_by_child.values()))
+        ChildStats.objects.filter(pk__in=deltas_by_child).update(**child_updates)
+
+
+#---------------------------reads---------------------------
+def get_parent_stats(parent):
+    # planner.backends.EmailBackend joins the stats row with the user
+    try:
+        return parent.stats
+    except ParentStats.DoesNotExist:
+        return rebuild_parent_stats(parent)
+
+
+def get_child_stats(child):
+    try:
+        return child.stats
+    except ChildStats.DoesNotExist:
+        return rebuild_child_stats(child)
+
+
+#---------------------------rebuilds---------------------------
+def rebuild_parent_stats(parent):
+    counts = Entry.objects.for_parent(parent).aggregate(**COUNTS)
+    stats, _ = ParentStats.objects.update_or_create(parent=parent, defaults=counts)
+    parent.stats = stats
+    return stats
+
+
+def rebuild_child_stats(child):
+    counts = Entry.objects.filter(child=child).aggregate(**COUNTS)
+    stats, _ = ChildStats.objects.update_or_create(child=child, defaults=counts)
+    child.stats = stats
+    return stats
+
+
+def rebuild_all_stats(batch_size=1000):
+    """Recompute every counter row with two grouped COUNT queries"""
+    empty = {field: 0 for field in COUNTS}
+    with transaction.atomic():
+        child_counts = {
+            row.pop('child'): row
+            for row in Entry.objects.order_by().values('child').annotate(**COUNTS)
+        }
+        parent_counts = {
+            row.pop('child__parent'): row
+            for row in Entry.objects.visible().order_by().values('child__parent').annotate(**COUNTS)
+        }
+        ChildStats.objects.all().delete()
+        ParentStats.objects.all().delete()
+        ChildStats.objects.bulk_create(
+            (ChildStats(child_id=pk, **child_counts.get(pk, empty))
+             for pk in Child.objects.values_list('pk', flat=True).iterator()),
+            batch_size=batch_size,
+        )
+        ParentStats.objects.bulk_create(
+            (ParentStats(parent_id=pk, **parent_counts.get(pk, empty))
+             for pk in Parent.objects.values_list('pk', flat=True).iterator()),
+            batch_size=batch_size,
+        )
+    return len(parent_counts), len(child_counts)
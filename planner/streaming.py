@@ -0,0 +1,33 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+# StreamingHttpResponse content for both deployments. Under WSGI a sync
+# iterator is sent as it is produced. Under ASGI Django reads a sync
+# iterator with sync_to_async(list), i.e. the whole body in memory before
+# the first byte goes out, so there the lines are handed over as an async
+# iterator instead, a batch at a time.
+
+STREAM_BATCH_LINES = 500
+
+
+async def aiter_batches(lines, batch_size=None):
+    """
+    Async iterator of lines joined batch_size at a time. Each batch is
+    pulled on the thread-sensitive executor, the thread the ORM cursor
+    behind lines was opened on.
+    """
+    batch_size = batch_size or STREAM_BATCH_LINES
+    lines = iter(lines)
+    next_batch = sync_to_async(lambda: ''.join(islice(lines, batch_size)))
+    while batch := await next_batch():
+        yield batch
+
+
+def streaming_content(request, lines, batch_size=None):
+    """lines as StreamingHttpResponse content that stays streamed for request's handler"""
+    if isinstance(request, ASGIRequest):
+        return aiter_batches(lines, batch_size)
+    return lines
@@ -1,3 +1,1400 @@
-from django.test import TestCase
+import csv
+import json
+import re
+from datetime import date, datetime, time, timedelta
+from html import unescape
+from io import StringIO
+
+import tempfile
+from time import sleep
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, When, Value, DateField, F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .benchmark import ENDPOINTS, measure_connection_setup, run_benchmark
+from .export import EXPORT_COLUMNS, export_lines, parent_entries
+from .importer import IMPORT_INLINE_MAX_BYTES, IMPORT_MAX_BYTES
+from .jobs import HANDLERS, claim_jobs, enqueue, enqueue_import, purge_child_job, run_job, run_pending
+from .ics import get_feed_token, feed_entries, escape_text, fold, render_feed
+from .cache import HITS_KEY, MISSES_KEY, _version_key, get_dashboard_data, get_parent_version, render_dashboard_sections, cache_stats, reset_cache_stats
+from .models import Parent, Child, Entry, ParentStats, ChildStats, Job, JobFile
+from .pagination import keyset_filter, ordering_terms
+from .queries import load_dashboard_data, task_ordering, event_ordering, section_ordering, section_page, calendar_window, load_calendar
+from .reminders import due_entries, due_rows, due_window, send_digests
+from .search import search_entries
+from .seed import seed_families
+from .stats import COUNTS, get_child_stats
+
+
+def make_family(username='parent', children=2, entries_per_type=25):
+    """Create a parent with children and a spread of tasks, events and notes."""
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='pass12345')
+    parent = Parent.objects.create(user=user)
+    kids = [
+        Child.objects.create(parent=parent, name=f'Child {i}', colour=Child.COLOR_CHOICES[i][0])
+        for i in range(children)
+    ]
+    start = date(2025, 1, 1)
+    for i in range(entries_per_type):
+        child = kids[i % children]
+        Entry.objects.create(
+            child=child, title=f'Task {i}', entry_type='task',
+            is_completed=(i % 4 == 0),
+            task_due_date=None if i % 5 == 0 else start + timedelta(days=i % 7),
+            task_due_time=None if i % 3 == 0 else time(9 + i % 8),
+        )
+        Entry.objects.create(
+            child=child, title=f'Event {i}', entry_type='event',
+            event_date=None if i % 6 == 0 else start + timedelta(days=i % 9),
+            event_start_time=None if i % 2 == 0 else time(8 + i % 10),
+        )
+        Entry.objects.create(child=child, title=f'Note {i}', entry_type='note')
+    return user, parent, kids
+
+
+def reload_parent(parent):
+    """The parent as a request sees it: fresh, with its counters joined"""
+    return Parent.objects.select_related('stats').get(pk=parent.pk)
+
+
+class DashboardLoaderTests(TestCase):
+    def setUp(self):
+        self.user, self.parent, self.children = make_family()
+        self.base = Entry.objects.filter(child__parent=self.parent)
+
+    def test_sections_match_per_section_queries(self):
+        data = load_dashboard_data(self.parent)
+        self.assertEqual(
+            [e.id for e in data['tasks']],
+            list(self.base.filter(entry_type='task').order_by(*task_ordering()).values_list('id', flat=True)[:20]),
+        )
+        self.assertEqual(
+            [e.id for e in data['events']],
+            list(self.base.filter(entry_type='event').order_by(*event_ordering()).values_list('id', flat=True)[:20]),
+        )
+        self.assertEqual(
+            [e.id for e in data['notes']],
+            list(self.base.filter(entry_type='note').order_by('-updated_at').values_list('id', flat=True)[:15]),
+        )
+        self.assertEqual(
+            [e.id for e in data['active_entries']],
+            list(self.base.exclude(entry_type='note').order_by('-created_at').values_list('id', flat=True)[:20]),
+        )
+
+    def test_index_friendly_orderings_match_legacy_case_sort(self):
+        legacy_tasks = self.base.filter(entry_type='task').order_by(
+            'is_completed',
+            Case(When(task_due_date__isnull=True, then=Value('9999-12-31')), default='task_due_date', output_field=DateField()),
+            F('task_due_time').asc(nulls_last=True),
+            'created_at',
+        )
+        legacy_events = self.base.filter(entry_type='event').order_by(
+            Case(When(event_date__isnull=True, then=Value('9999-12-31')), default='event_date', output_field=DateField()),
+            F('event_start_time').asc(nulls_last=True),
+            'created_at',
+        )
+        self.assertEqual(
+            list(self.base.filter(entry_type='task').order_by(*task_ordering()).values_list('id', flat=True)),
+            list(legacy_tasks.values_list('id', flat=True)),
+        )
+        self.assertEqual(
+            list(self.base.filter(entry_type='event').order_by(*event_ordering()).values_list('id', flat=True)),
+            list(legacy_events.values_list('id', flat=True)),
+        )
+
+    def test_counts_cover_all_entries(self):
+        data = load_dashboard_data(self.parent, 'task')
+        self.assertEqual(data['total_entries'], 75)
+        self.assertEqual(data['tasks_count'], 25)
+        self.assertEqual(data['events_count'], 25)
+        self.assertEqual(data['notes_count'], 25)
+        self.assertEqual(data['filtered_count'], 25)
+        self.assertEqual(data['active_entries'], data['tasks'])
+        self.assertEqual(data['children_count'], 2)
+
+    def test_one_query_per_section(self):
+        parent = reload_parent(self.parent)
+        # Children, then tasks, events, notes and the timeline
+        with self.assertNumQueries(5):
+            data = load_dashboard_data(parent)
+            for entry in data['tasks'] + data['events'] + data['notes']:
+                entry.child.name
+
+    def test_empty_family(self):
+        user = User.objects.create_user(username='empty', password='pass12345')
+        data = load_dashboard_data(Parent.objects.create(user=user))
+        self.assertEqual(data['children_count'], 0)
+        self.assertEqual(data['total_entries'], 0)
+        self.assertEqual(data['tasks'], [])
+
+
+class DashboardViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=5)
+        self.client.force_login(self.user)
+
+    def test_dashboard_renders_sections(self):
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['tasks']), 5)
+        self.assertEqual(len(response.context['notes']), 5)
+        self.assertEqual(response.context['total_entries'], 15)
+        self.assertContains(response, 'Event 1')
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.user, self.parent, self.children = make_family(entries_per_type=5)
+
+    def test_repeat_load_is_a_cache_hit_without_sql(self):
+        data = get_dashboard_data(self.parent)
+        render_dashboard_sections(self.parent, data)
+        reset_cache_stats()
+        with self.assertNumQueries(0):
+            data = get_dashboard_data(self.parent)
+            sections = render_dashboard_sections(self.parent, data)
+        self.assertIn('Task 1', sections['tasks_section_html'])
+        self.assertEqual(cache_stats()['hits'], 5)
+        self.assertEqual(cache_stats()['misses'], 0)
+
+    def test_entry_changes_invalidate(self):
+        get_dashboard_data(self.parent)
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = Entry.objects.create(child=self.children[0], title='Fresh task', entry_type='task')
+        self.assertEqual(get_dashboard_data(reload_parent(self.parent))['tasks_count'], 6)
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.delete()
+        self.assertEqual(get_dashboard_data(reload_parent(self.parent))['tasks_count'], 5)
+
+    def test_child_changes_invalidate(self):
+        data = get_dashboard_data(self.parent)
+        render_dashboard_sections(self.parent, data)
+        child = self.children[0]
+        child.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            child.save()
+        sections = render_dashboard_sections(self.parent, get_dashboard_data(self.parent))
+        self.assertIn('Renamed', sections['children_section_html'])
+
+    def test_other_families_are_not_invalidated(self):
+        _, other_parent, other_children = make_family(username='other', entries_per_type=1)
+        get_dashboard_data(self.parent)
+        Entry.objects.create(child=other_children[0], title='Elsewhere', entry_type='note')
+        with self.assertNumQueries(0):
+            get_dashboard_data(self.parent)
+
+    def test_evicted_version_never_reuses_a_number(self):
+        get_dashboard_data(self.parent)
+        cache.delete(_version_key(self.parent.pk))
+        Entry.objects.create(child=self.children[0], title='Fresh task', entry_type='task')
+        self.assertEqual(get_dashboard_data(reload_parent(self.parent))['tasks_count'], 6)
+
+    def test_database_backend(self):
+        backend = {'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'planner_cache',
+        }}
+        with override_settings(CACHES=backend):
+            call_command('createcachetable', verbosity=0)
+            get_dashboard_data(self.parent)
+            with CaptureQueriesContext(connection) as queries:
+                data = get_dashboard_data(self.parent)
+            self.assertEqual(data['tasks_count'], 5)
+            self.assertFalse([q for q in queries.captured_queries if 'planner_cache' in q['sql']])
+            self.assertEqual(cache_stats()['hits'], 0)
+            with self.captureOnCommitCallbacks(execute=True):
+                Entry.objects.create(child=self.children[0], title='Fresh task', entry_type='task')
+            self.assertEqual(get_dashboard_data(reload_parent(self.parent))['tasks_count'], 6)
+
+    def test_file_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}
+            with override_settings(CACHES=backend, PLANNER_CACHE_ENABLED=True):
+                get_dashboard_data(self.parent)
+                with self.assertNumQueries(0):
+                    self.assertEqual(get_dashboard_data(self.parent)['total_entries'], 15)
+
+    def test_stats_are_flushed_periodically(self):
+        get_dashboard_data(self.parent)
+        get_dashboard_data(self.parent)
+        self.assertIsNone(cache.get(HITS_KEY))
+        with mock.patch('planner.cache.STATS_FLUSH_SECONDS', 0):
+            get_dashboard_data(self.parent)
+        self.assertEqual(cache.get(HITS_KEY), 2)
+        self.assertEqual(cache.get(MISSES_KEY), 1)
+
+
+class CommitInvalidationTests(TransactionTestCase):
+    """Version bumps wait for the write's transaction to commit"""
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=2)
+
+    def test_read_between_write_and_commit_is_not_kept(self):
+        before = load_dashboard_data(self.parent)
+        version = get_parent_version(self.parent.pk)
+        with transaction.atomic():
+            Entry.objects.create(child=self.children[0], title='Fresh task', entry_type='task')
+            self.assertEqual(get_parent_version(self.parent.pk), version)
+            # Another request reading now only sees the committed rows
+            with mock.patch('planner.cache.load_dashboard_data', return_value=before):
+                self.assertEqual(get_dashboard_data(self.parent)['tasks_count'], 2)
+        self.assertNotEqual(get_parent_version(self.parent.pk), version)
+        self.assertEqual(get_dashboard_data(reload_parent(self.parent))['tasks_count'], 3)
+
+    def test_rolled_back_write_keeps_the_cache(self):
+        get_dashboard_data(self.parent)
+        version = get_parent_version(self.parent.pk)
+        with self.assertRaises(DatabaseError):
+            with transaction.atomic():
+                Entry.objects.create(child=self.children[0], title='Lost', entry_type='task')
+                raise DatabaseError('rolled back')
+        self.assertEqual(get_parent_version(self.parent.pk), version)
+
+
+class SectionPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=45)
+        self.client.force_login(self.user)
+        self.base = Entry.objects.filter(child__parent=self.parent)
+
+    def walk(self, url, cursor='', **params):
+        ids = []
+        while True:
+            response = self.client.get(url, {'cursor': cursor, 'limit': 7, **params})
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            ids += [row['id'] for row in body['results']]
+            cursor = body['next_cursor']
+            if not cursor:
+                return ids
+
+    def test_pages_cover_each_section_in_order(self):
+        for url, entry_type in [('/api/tasks/', 'task'), ('/api/events/', 'event'), ('/api/notes/', 'note')]:
+            expected = list(
+                self.base.filter(entry_type=entry_type)
+                .order_by(*section_ordering(entry_type)).values_list('id', flat=True)
+            )
+            self.assertEqual(self.walk(url), expected)
+
+    def test_dashboard_cursor_continues_first_page(self):
+        data = load_dashboard_data(self.parent)
+        ids = [task.id for task in data['tasks']] + self.walk('/api/tasks/', data['tasks_next_cursor'])
+        expected = self.base.filter(entry_type='task').order_by(*section_ordering('task'))
+        self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+
+    def test_child_filter(self):
+        child = self.children[1]
+        ids = self.walk('/api/notes/', child=child.id)
+        self.assertEqual(set(ids), set(self.base.filter(child=child, entry_type='note').values_list('id', flat=True)))
+
+    def test_other_parents_entries_are_hidden(self):
+        other_user, _, _ = make_family(username='other', entries_per_type=3)
+        self.client.force_login(other_user)
+        self.assertEqual(len(self.walk('/api/tasks/')), 3)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/tasks/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pages_seek_the_section_index(self):
+        child = self.children[0]
+        for entry_type in ('task', 'event', 'note'):
+            ordering = section_ordering(entry_type)
+            terms = ordering_terms(ordering)
+            entries = Entry.objects.filter(child=child, entry_type=entry_type).order_by(*ordering)
+            after = entries[4]
+            page = entries.filter(keyset_filter(terms, [getattr(after, name) for name, _, _ in terms]))[:7]
+            plan = page.explain()
+            self.assertIn(f'entry_{entry_type}_order_idx', plan)
+            if connection.vendor == 'postgresql':
+                self.assertNotIn('Sort', plan)
+            elif entry_type == 'note':
+                self.assertIn('updated_at<?', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+            else:
+                # SQLite indexes sort NULLs first, so the NULLS LAST date and
+                # time terms are sorted after the index supplies the rest
+                self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+
+
+class ChildEntriesViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(children=1, entries_per_type=30)
+        self.client.force_login(self.user)
+        self.child = self.children[0]
+
+    def test_only_first_page_is_rendered(self):
+        response = self.client.get(f'/child/{self.child.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['tasks']), 20)
+        self.assertEqual(len(response.context['events']), 20)
+        self.assertEqual(len(response.context['notes']), 15)
+        self.assertEqual(response.context['tasks_count'], 30)
+        self.assertNotIn('categories', response.context)
+        self.assertContains(response, 'data-next-cursor="%s"' % response.context['tasks_next_cursor'])
+
+    def test_other_parents_child_is_404(self):
+        other_user, _, _ = make_family(username='other', entries_per_type=1)
+        self.client.force_login(other_user)
+        self.assertEqual(self.client.get(f'/child/{self.child.id}/').status_code, 404)
+
+    def test_load_more_links_walk_the_rest_of_a_section(self):
+        def next_link(html):
+            match = re.search(r'href="(/api/tasks/[^"]*)" data-cursor', html)
+            return unescape(match.group(1)) if match else None
+
+        html = self.client.get(f'/child/{self.child.id}/').content.decode()
+        ids = []
+        url = next_link(html)
+        while url:
+            ids += [int(i) for i in re.findall(r'id="task-title-(\d+)"', html)]
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            html = response.content.decode()
+            url = next_link(html)
+        ids += [int(i) for i in re.findall(r'id="task-title-(\d+)"', html)]
+        expected = Entry.objects.filter(child=self.child, entry_type='task').order_by(*section_ordering('task'))
+        # The child page renders each section twice (mobile and desktop)
+        self.assertEqual(list(dict.fromkeys(ids)), list(expected.values_list('id', flat=True)))
+
+
+class QueryCountTests(TestCase):
+    """Each page costs a fixed number of queries however large the family is"""
+
+    def assertPageQueries(self, num, url_for):
+        for size in (3, 30):
+            cache.clear()
+            user, parent, children = make_family(username=f'parent{size}', entries_per_type=size)
+            self.client.force_login(user)
+            with self.assertNumQueries(num):
+                self.assertEqual(self.client.get(url_for(parent, children)).status_code, 200)
+
+    def test_dashboard(self):
+        self.assertPageQueries(11, lambda parent, children: '/dashboard/')
+
+    def test_child_entries(self):
+        self.assertPageQueries(8, lambda parent, children: f'/child/{children[0].id}/')
+
+    def test_section_page(self):
+        self.assertPageQueries(3, lambda parent, children: '/api/events/')
+
+    def test_with_child_loads_card_columns_only(self):
+        user, parent, children = make_family(entries_per_type=3)
+        with self.assertNumQueries(1):
+            for entry in Entry.objects.for_parent(parent).tasks().with_child():
+                entry.title, entry.description, entry.child.name, entry.child.colour
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=3)
+        self.client.force_login(self.user)
+
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs('planner.metrics', 'INFO') as logs:
+            response = self.client.get('/dashboard/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('desc="11 queries"', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+        record = logs.records[0]
+        self.assertEqual(record.view, 'dashboard')
+        self.assertEqual(record.queries, 11)
+        self.assertEqual(record.bytes, len(response.content))
+        self.assertGreater(record.template_ms, 0)
+
+
+class RequestParentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=1)
+
+    def request_for(self, user):
+        from django.contrib.auth.middleware import AuthenticationMiddleware
+        from django.contrib.sessions.middleware import SessionMiddleware
+        from django.test import RequestFactory
+        from .middleware import ParentMiddleware
+
+        self.client.force_login(user)
+        request = RequestFactory().get('/')
+        request.COOKIES.update({k: v.value for k, v in self.client.cookies.items()})
+        captured = {}
+
+        def view(request):
+            captured['request'] = request
+            return None
+
+        SessionMiddleware(AuthenticationMiddleware(ParentMiddleware(view)))(request)
+        return captured['request']
+
+    def test_user_and_parent_load_in_one_query(self):
+        request = self.request_for(self.user)
+        with self.assertNumQueries(2):  # session + user joined with parent
+            self.assertEqual(request.parent.pk, self.parent.pk)
+            self.assertEqual(request.parent.user.username, 'parent')
+        with self.assertNumQueries(0):
+            request.parent.pk
+
+    def test_user_without_parent(self):
+        user = User.objects.create_user(username='newcomer', password='pass12345')
+        request = self.request_for(user)
+        self.assertFalse(request.parent)
+
+    @override_settings(PLANNER_PARENT_IN_SESSION=True)
+    def test_parent_id_cached_in_session(self):
+        self.client.force_login(self.user)
+        self.client.get('/dashboard/')
+        self.assertEqual(self.client.session['_planner_parent_id'], self.parent.pk)
+
+
+class BulkEntriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=4)
+        self.client.force_login(self.user)
+        self.tasks = list(Entry.objects.for_parent(self.parent).tasks().values_list('id', flat=True))
+
+    def post(self, **body):
+        return self.client.post('/entries/bulk/', body, content_type='application/json')
+
+    def test_complete_tasks_in_one_update(self):
+        note = Entry.objects.for_parent(self.parent).notes().first()
+        # session, user + parent, authorize, savepoint, update, parent and
+        # child counters, release
+        with self.assertNumQueries(8):
+            response = self.post(ids=self.tasks + [note.id, 999999], operation='complete')
+        body = response.json()
+        self.assertEqual(body['updated'], 4)
+        self.assertEqual(body['results'][str(note.id)], 'not_a_task')
+        self.assertEqual(body['results']['999999'], 'not_found')
+        self.assertEqual(Entry.objects.filter(id__in=self.tasks, is_completed=True).count(), 4)
+
+    def test_repeat_complete_leaves_done_tasks_alone(self):
+        self.post(ids=self.tasks[:1], operation='complete')
+        done = Entry.objects.get(id=self.tasks[0])
+        self.post(ids=self.tasks, operation='complete')
+        self.assertEqual(Entry.objects.get(id=self.tasks[0]).updated_at, done.updated_at)
+        self.assertEqual(ParentStats.objects.get(parent=self.parent).completed_tasks_count, 4)
+
+    def test_delete_and_cache_invalidation(self):
+        self.assertEqual(get_dashboard_data(self.parent)['tasks_count'], 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post(ids=self.tasks[:2], operation='delete')
+        self.assertFalse(Entry.objects.filter(id__in=self.tasks[:2]).exists())
+        self.assertEqual(get_dashboard_data(reload_parent(self.parent))['tasks_count'], 2)
+
+    def test_set_category(self):
+        self.post(ids=self.tasks, operation='set_category', value='chores')
+        self.assertEqual(Entry.objects.filter(id__in=self.tasks, category='chores').count(), 4)
+        self.assertEqual(self.post(ids=self.tasks, operation='set_category', value='bogus').status_code, 400)
+
+    def test_other_parents_entries_are_not_touched(self):
+        other_user, _, _ = make_family(username='other', entries_per_type=1)
+        self.client.force_login(other_user)
+        body = self.post(ids=self.tasks, operation='delete').json()
+        self.assertEqual(body['updated'], 0)
+        self.assertEqual(Entry.objects.filter(id__in=self.tasks).count(), 4)
+
+
+class PartialWriteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=2)
+        self.client.force_login(self.user)
+        self.task = Entry.objects.for_parent(self.parent).tasks().first()
+
+    def test_toggle_is_one_narrow_update(self):
+        before = self.task.updated_at
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f'/tasks/{self.task.id}/toggle-completion/', {'is_completed': True}, content_type='application/json',
+            )
+        self.assertTrue(response.json()['success'])
+        entry_sql = [q['sql'] for q in queries.captured_queries if q['sql'].startswith(('SELECT', 'UPDATE "planner_entry"')) and 'planner_entry' in q['sql']]
+        self.assertEqual(len(entry_sql), 1, entry_sql)
+        self.assertTrue(entry_sql[0].startswith('UPDATE'))
+        self.assertNotIn('"description"', entry_sql[0].split('WHERE')[0])
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.is_completed)
+        self.assertGreater(self.task.updated_at, before)
+
+    def test_toggle_other_parents_task(self):
+        other_user, _, _ = make_family(username='other', entries_per_type=1)
+        self.client.force_login(other_user)
+        response = self.client.post(
+            f'/tasks/{self.task.id}/toggle-completion/', {'is_completed': True}, content_type='application/json',
+        )
+        self.assertFalse(response.json()['success'])
+        self.task.refresh_from_db()
+        self.assertFalse(self.task.is_completed)
+
+    def test_save_entry_writes_changed_columns_only(self):
+        data = {
+            'title': 'Renamed task', 'child': self.task.child_id, 'category': self.task.category,
+            'entry_type': 'task', 'description': self.task.description, 'priority': self.task.priority,
+            'location': '',
+        }
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(f'/save-entry/{self.task.id}/', data)
+        update = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "planner_entry"')]
+        self.assertEqual(len(update), 1)
+        set_clause = update[0].split('WHERE')[0]
+        self.assertIn('"title"', set_clause)
+        self.assertIn('"updated_at"', set_clause)
+        self.assertNotIn('"description"', set_clause)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Renamed task')
+
+
+class EntryCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=4)
+        self.client.force_login(self.user)
+
+    def assertCountersMatch(self):
+        parent = ParentStats.objects.get(parent=self.parent)
+        expected = Entry.objects.for_parent(self.parent).aggregate(**COUNTS)
+        self.assertEqual({field: getattr(parent, field) for field in COUNTS}, expected)
+        for child in self.children:
+            stats = ChildStats.objects.get(child=child)
+            expected = Entry.objects.filter(child=child).aggregate(**COUNTS)
+            self.assertEqual({field: getattr(stats, field) for field in COUNTS}, expected)
+
+    def test_create_edit_and_delete(self):
+        self.assertCountersMatch()
+        entry = Entry.objects.create(child=self.children[0], title='New', entry_type='task', is_completed=True)
+        self.assertCountersMatch()
+        entry.entry_type = 'event'
+        entry.child = self.children[1]
+        entry.save()
+        self.assertCountersMatch()
+        entry.delete()
+        self.assertCountersMatch()
+
+    def test_failed_counter_update_rolls_back_the_save(self):
+        with mock.patch('planner.signals.apply_delta', side_effect=DatabaseError('counters')):
+            with self.assertRaises(DatabaseError):
+                Entry.objects.create(child=self.children[0], title='Lost', entry_type='task')
+        self.assertFalse(Entry.objects.filter(title='Lost').exists())
+        self.assertCountersMatch()
+
+    def test_toggle_only_counts_real_changes(self):
+        task = Entry.objects.for_parent(self.parent).tasks().filter(is_completed=False).first()
+        for _ in range(2):
+            response = self.client.post(
+                f'/tasks/{task.id}/toggle-completion/', {'is_completed': True}, content_type='application/json',
+            )
+            self.assertTrue(response.json()['success'])
+            self.assertCountersMatch()
+
+    def test_bulk_operations(self):
+        tasks = list(Entry.objects.for_parent(self.parent).tasks().values_list('id', flat=True))
+        self.client.post('/entries/bulk/', {'ids': tasks, 'operation': 'complete'}, content_type='application/json')
+        self.assertCountersMatch()
+        notes = list(Entry.objects.for_parent(self.parent).notes().values_list('id', flat=True))
+        self.client.post('/entries/bulk/', {'ids': tasks[:1] + notes, 'operation': 'delete'}, content_type='application/json')
+        self.assertCountersMatch()
+
+    def test_rebuild_command(self):
+        ParentStats.objects.update(tasks_count=0)
+        ChildStats.objects.all().delete()
+        call_command('rebuild_stats', stdout=StringIO())
+        self.assertCountersMatch()
+
+    def test_missing_row_is_rebuilt_on_read(self):
+        ChildStats.objects.filter(child=self.children[0]).delete()
+        child = Child.objects.get(pk=self.children[0].pk)
+        self.assertEqual(get_child_stats(child).tasks_count, 2)
+        self.assertCountersMatch()
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_and_run(self):
+        users = seed_families(parents=2, children_per_parent=2, entries_per_child=9, prefix='bench', seed=1)
+        self.assertEqual(Entry.objects.filter(child__parent__user__in=users).count(), 36)
+        self.assertEqual(ParentStats.objects.get(parent__user=users[0]).total_entries, 18)
+
+        report = run_benchmark(users, iterations=4, warmup=1)
+        self.assertEqual(set(report), set(ENDPOINTS))
+        self.assertEqual(report['dashboard']['statuses'], {'200': 4})
+        self.assertEqual(report['toggle_task_completion']['statuses'], {'200': 4})
+        self.assertEqual(report['save_entry']['statuses'], {'302': 4})
+        for stats in report.values():
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+            self.assertGreater(stats['queries_max'], 0)
+
+    def test_connection_setup(self):
+        report = measure_connection_setup(samples=3)
+        self.assertEqual(report['samples'], 3)
+        self.assertGreaterEqual(report['fresh_connection_ms'], 0)
+        self.assertGreaterEqual(report['reused_connection_ms'], 0)
+
+
+class SeedCommandTests(TestCase):
+    def test_seed_planner(self):
+        call_command(
+            'seed_planner', parents=3, children=2, entries=40, batch_size=25, families_per_chunk=2, seed=7,
+            stdout=StringIO(),
+        )
+        entries = Entry.objects.filter(child__parent__user__username__startswith='seed-')
+        self.assertEqual(entries.count(), 240)
+        self.assertEqual(set(entries.values_list('entry_type', flat=True)), {'task', 'event', 'note'})
+        self.assertFalse(entries.exclude(entry_type='event').exclude(event_date=None).exists())
+        self.assertEqual(sum(ParentStats.objects.values_list('tasks_count', flat=True)), entries.tasks().count())
+        self.assertEqual(Child.objects.filter(parent__user__username='seed-2').count(), 2)
+
+    def test_reseeding_numbers_after_the_highest_user(self):
+        seed_families(parents=3, entries_per_child=0, seed=1)
+        User.objects.filter(username='seed-0').delete()
+        User.objects.create_user(username='seed-admin')
+        users = seed_families(parents=2, entries_per_child=0, seed=2)
+        self.assertEqual([user.username for user in users], ['seed-3', 'seed-4'])
+
+    def test_entry_timestamps_are_spread(self):
+        users = seed_families(parents=1, entries_per_child=50, seed=3)
+        entries = Entry.objects.filter(child__parent__user__in=users)
+        self.assertGreater(entries.values('created_at').distinct().count(), 90)
+        self.assertFalse(entries.filter(updated_at__lt=F('created_at')).exists())
+        self.assertTrue(entries.filter(updated_at__gt=F('created_at')).exists())
+        self.assertFalse(entries.filter(created_at__gt=timezone.now()).exists())
+
+
+class AsyncViewTests(TestCase):
+    """The async views driven through the ASGI handler"""
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=5)
+
+    async def test_dashboard_and_child_page(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_entries'], 15)
+        # Queries issued from the ORM's worker thread are still counted
+        self.assertIn('desc="11 queries"', response['Server-Timing'])
+
+        response = await self.async_client.get(f'/child/{self.children[0].id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['tasks']), 3)
+
+    async def test_toggle(self):
+        await self.async_client.aforce_login(self.user)
+        task = await Entry.objects.for_parent(self.parent).tasks().filter(is_completed=False).afirst()
+        response = await self.async_client.post(
+            f'/tasks/{task.id}/toggle-completion/', {'is_completed': True}, content_type='application/json',
+        )
+        self.assertTrue(response.json()['success'])
+        await task.arefresh_from_db()
+        self.assertTrue(task.is_completed)
+        response = await self.async_client.post(
+            '/tasks/999999/toggle-completion/', {'is_completed': True}, content_type='application/json',
+        )
+        self.assertEqual(response.json()['error'], 'Task not found')
+
+
+class CalendarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=10)
+        self.client.force_login(self.user)
+
+    def test_window(self):
+        self.assertEqual(
+            calendar_window('month', date(2025, 3, 15)),
+            (date(2025, 2, 24), date(2025, 4, 6), date(2025, 2, 1), date(2025, 4, 1)),
+        )
+        self.assertEqual(
+            calendar_window('week', date(2025, 1, 1)),
+            (date(2024, 12, 30), date(2025, 1, 5), date(2024, 12, 23), date(2025, 1, 6)),
+        )
+
+    def test_days_grouped_in_one_query(self):
+        start, end = date(2025, 1, 1), date(2025, 1, 7)
+        with self.assertNumQueries(1):
+            days = load_calendar(self.parent, start, end)
+        self.assertEqual([day['date'] for day in days], [start + timedelta(days=n) for n in range(7)])
+        expected = self.base_ids(start, end)
+        self.assertEqual(sorted(e['id'] for day in days for e in day['entries']), sorted(expected))
+        for day in days:
+            for entry in day['entries']:
+                self.assertIn(entry['child']['colour'], dict(Child.COLOR_CHOICES))
+        tasks = load_calendar(self.parent, start, end, child_id=self.children[0].id, entry_type='task')
+        self.assertTrue(all(
+            e['entry_type'] == 'task' and e['child']['id'] == self.children[0].id
+            for day in tasks for e in day['entries']
+        ))
+
+    def test_task_with_leftover_event_date_is_bucketed_by_due_date(self):
+        # An event edited into a task keeps its old event columns
+        task = Entry.objects.create(
+            child=self.children[0], title='Was an event', entry_type='task',
+            event_date=date(2024, 6, 1), event_start_time=time(9, 0), event_end_time=time(10, 0),
+            task_due_date=date(2025, 1, 3), task_due_time=time(15, 30),
+        )
+        days = load_calendar(self.parent, date(2025, 1, 1), date(2025, 1, 7))
+        found = [(day['date'], e) for day in days for e in day['entries'] if e['id'] == task.id]
+        self.assertEqual(len(found), 1)
+        day, entry = found[0]
+        self.assertEqual(day, date(2025, 1, 3))
+        self.assertEqual(entry['start_time'], time(15, 30))
+        self.assertIsNone(entry['end_time'])
+        self.assertEqual(self.client.get('/calendar/?view=week&date=2025-01-03').status_code, 200)
+
+    def base_ids(self, start, end):
+        family = Entry.objects.filter(child__parent=self.parent)
+        return list(
+            family.filter(entry_type='event', event_date__range=(start, end)).values_list('id', flat=True)
+        ) + list(family.filter(entry_type='task', task_due_date__range=(start, end)).values_list('id', flat=True))
+
+    def test_etag_revalidation(self):
+        url = '/api/calendar/?view=month&date=2025-01-10'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['days']), 35)
+        etag = response['ETag']
+
+        # Only the session and the user (with its parent joined)
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Entry.objects.create(child=self.children[0], title='New', entry_type='event', event_date=date(2025, 1, 20))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_bad_params(self):
+        self.assertEqual(self.client.get('/api/calendar/?view=year').status_code, 400)
+        self.assertEqual(self.client.get('/api/calendar/?date=soon').status_code, 400)
+
+    def test_page(self):
+        response = self.client.get('/calendar/?view=week&date=2025-01-02')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['weeks']), 1)
+        self.assertContains(response, 'Event 1')
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.user, self.parent, self.children = make_family(entries_per_type=5)
+        self.token = get_feed_token(self.parent)
+        self.url = f'/feeds/{self.token}/planner.ics'
+
+    def feed(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_feed_lists_events_and_dated_tasks(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = self.feed(response)
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+        expected = feed_entries(self.parent).count()
+        self.assertEqual(body.count('BEGIN:VEVENT'), expected)
+        self.assertEqual(expected, 5 + 4 - 1)  # undated task and event left out
+        self.assertNotIn('Note 1', body)
+
+    def test_child_feed(self):
+        child = self.children[1]
+        body = self.feed(self.client.get(f'/feeds/{self.token}/child/{child.id}.ics'))
+        self.assertEqual(body.count('BEGIN:VEVENT'), feed_entries(self.parent, child.id).count())
+        self.assertIn(f'SUMMARY:{child.name}: ', body)
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Entry.objects.filter(child__parent=self.parent, entry_type='event').first().delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_child_rename_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        child = self.children[0]
+        child.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            child.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('SUMMARY:Renamed: ', self.feed(response))
+
+    async def test_asgi_feed_is_not_buffered(self):
+        pulled = []
+
+        def counted_feed(*args):
+            for line in render_feed(*args):
+                pulled.append(line)
+                yield line
+
+        with mock.patch('planner.views.render_feed', counted_feed), \
+                mock.patch('planner.streaming.STREAM_BATCH_LINES', 5):
+            response = await self.async_client.get(self.url)
+            self.assertTrue(response.is_async)
+            content = aiter(response.streaming_content)
+            first = await anext(content)
+            self.assertEqual(len(pulled), 5)
+            rest = [chunk async for chunk in content]
+        body = b''.join([first, *rest]).decode()
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+        self.assertGreater(len(pulled), 5)
+
+    def test_token_required(self):
+        self.assertEqual(self.client.get('/feeds/not-a-token/planner.ics').status_code, 404)
+        other = make_family(username='other', entries_per_type=1)[2][0]
+        self.assertEqual(self.client.get(f'/feeds/{self.token}/child/{other.id}.ics').status_code, 404)
+
+        self.client.force_login(self.user)
+        self.client.post('/feeds/reset/')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_text_is_escaped_and_folded(self):
+        self.assertEqual(escape_text('a,b;c\\d\ne'), 'a\\,b\\;c\\\\d\\ne')
+        folded = fold('DESCRIPTION:' + 'é' * 60)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in folded.split('\r\n')))
+        self.assertEqual(folded.replace('\r\n ', ''), 'DESCRIPTION:' + 'é' * 60 + '\r\n')
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user, self.parent, self.children = make_family(entries_per_type=4)
+        self.other_user, self.other_parent, _ = make_family(username='other', entries_per_type=2)
+        self.client.force_login(self.user)
+
+    def test_csv(self):
+        response = self.client.get('/export/')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0], list(EXPORT_COLUMNS))
+        self.assertEqual(len(rows), 13)
+        self.assertEqual({row[2] for row in rows[1:]}, {'Child 0', 'Child 1'})
+
+    def test_child_ndjson(self):
+        child = self.children[0]
+        response = self.client.get(f'/export/child/{child.id}/?format=ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(lines), Entry.objects.filter(child=child).count())
+        self.assertEqual({line['child'] for line in lines}, {child.name})
+        self.assertEqual(self.client.get('/export/?format=xml').status_code, 400)
+        other_child = Child.objects.filter(parent=self.other_parent).first()
+        self.assertEqual(self.client.get(f'/export/child/{other_child.id}/').status_code, 404)
+
+    async def test_asgi_export_is_not_buffered(self):
+        pulled = []
+
+        def counted_lines(*args, **kwargs):
+            for line in export_lines(*args, **kwargs):
+                pulled.append(line)
+                yield line
+
+        await self.async_client.aforce_login(self.user)
+        with mock.patch('planner.views.export_lines', counted_lines), \
+                mock.patch('planner.streaming.STREAM_BATCH_LINES', 3):
+            response = await self.async_client.get('/export/')
+            self.assertTrue(response.is_async)
+            content = aiter(response.streaming_content)
+            first = await anext(content)
+            # The header and two rows, not the family's 12
+            self.assertEqual(len(pulled), 3)
+            rest = [chunk async for chunk in content]
+        rows = list(csv.reader(b''.join([first, *rest]).decode().splitlines()))
+        self.assertEqual(len(rows), 13)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_entries', export_format='ndjson', chunk_size=5, stdout=out)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(lines), 18)
+        self.assertEqual({line['username'] for line in lines}, {'parent', 'other'})
+
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('export_entries', directory=directory, stderr=StringIO())
+            with open(f'{directory}/parent-{self.other_parent.id}.csv', newline='') as f:
+                rows = list(csv.reader(f))
+        self.assertEqual(rows[0], list(EXPORT_COLUMNS))
+        self.assertEqual(len(rows), 7)
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=1)
+        self.client.force_login(self.user)
+
+    def upload(self, name, content, **data):
+        upload = SimpleUploadedFile(name, content.encode())
+        return self.client.post('/import/', {'file': upload, **data})
+
+    def test_csv_rows_are_validated_and_saved(self):
+        content = (
+            'title,child,entry_type,category,event_date,event_start_time,event_end_time,task_due_date,is_completed\n'
+            'Sports day,Child 0,event,school,2025-06-01,09:00,15:00,,\n'
+            'Spellings,child 1,task,homework,,,,2025-06-02,true\n'
+            'Backwards,Child 0,event,,2025-06-03,10:00,09:00,,\n'
+            ',Child 0,task,,,,,,\n'
+            'Stranger,Nobody,task,,,,,,\n'
+            'Bad date,Child 1,task,,,,,2025-13-40,\n'
+        )
+        response = self.upload('school.csv', content)
+        result = response.context['result']
+        self.assertEqual((result['created'], result['skipped']), (2, 4))
+        self.assertEqual([error['row'] for error in result['errors']], [4, 5, 6, 7])
+        self.assertIn('event_end_time', result['errors'][0]['errors'])
+        self.assertIn('child', result['errors'][2]['errors'])
+
+        spellings = Entry.objects.get(title='Spellings')
+        self.assertEqual((spellings.child, spellings.is_completed), (self.children[1], True))
+        stats = reload_parent(self.parent).stats
+        self.assertEqual((stats.events_count, stats.tasks_count, stats.completed_tasks_count), (2, 2, 2))
+        self.assertEqual(get_dashboard_data(reload_parent(self.parent))['events_count'], 2)
+
+    def test_export_round_trip(self):
+        before = Entry.objects.filter(child__parent=self.parent).count()
+        with self.assertNumQueries(1):
+            content = ''.join(export_lines(parent_entries(self.parent), 'csv'))
+        result = self.upload('planner.csv', content).context['result']
+        self.assertEqual((result['created'], result['skipped']), (before, 0))
+
+    def test_ics_uses_default_child(self):
+        content = (
+            'BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nSUMMARY:Inset day\r\nDTSTART;VALUE=DATE:20250901\r\n'
+            'END:VEVENT\r\nBEGIN:VEVENT\r\nSUMMARY:Concert\r\nLOCATION:Hall\\, main\r\n'
+            'DTSTART:20251201T180000Z\r\nDTEND:20251201T193000Z\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n'
+        )
+        child = self.children[0]
+        result = self.upload('term.ics', content, child=child.id).context['result']
+        self.assertEqual(result['created'], 2)
+        concert = Entry.objects.get(title='Concert')
+        self.assertEqual((concert.child, concert.location), (child, 'Hall, main'))
+        self.assertEqual((concert.event_start_time, concert.event_end_time), (time(18), time(19, 30)))
+
+    def test_bad_files(self):
+        self.assertEqual(self.upload('notes.txt', 'title\nx\n').status_code, 400)
+        self.assertEqual(self.upload('notes.csv', 'name\nx\n').status_code, 400)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user, self.parent, self.children = make_family(entries_per_type=2)
+        self.client.force_login(self.user)
+        first, second = self.children
+        self.gala = Entry.objects.create(child=first, title='Swimming gala', entry_type='event', location='Leisure centre')
+        self.kit = Entry.objects.create(child=second, title='Pack kit', entry_type='task', category='activities',
+                                        description='Goggles for swimming')
+        self.note = Entry.objects.create(child=second, title='Allergy', entry_type='note', description='Penicillin')
+
+    def titles(self, query, **filters):
+        return [entry.title for entry in search_entries(self.parent, query, **filters)]
+
+    def test_ranked_by_field_weight(self):
+        self.assertEqual(self.titles('swimming'), ['Swimming gala', 'Pack kit'])
+        self.assertEqual(self.titles('swim'), ['Swimming gala', 'Pack kit'])
+        self.assertEqual(self.titles('leisure swim'), ['Swimming gala'])
+        self.assertEqual(self.titles('   '), [])
+
+    def test_filters_and_other_families(self):
+        self.assertEqual(self.titles('swimming', child_id=self.children[1].id), ['Pack kit'])
+        self.assertEqual(self.titles('swimming', entry_type='event'), ['Swimming gala'])
+        self.assertEqual(self.titles('swimming', category='activities'), ['Pack kit'])
+        _, _, other_children = make_family(username='other', entries_per_type=0)
+        Entry.objects.create(child=other_children[0], title='Swimming lesson', entry_type='event')
+        self.assertEqual(len(self.titles('swimming')), 2)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.note.description = 'Amoxicillin'
+        self.note.save()
+        self.assertEqual(self.titles('penicillin'), [])
+        self.assertEqual(self.titles('amoxicillin'), ['Allergy'])
+        self.gala.delete()
+        self.assertEqual(self.titles('gala'), [])
+
+    def test_json_pages(self):
+        response = self.client.get('/search/?q=swimming&format=json&limit=1')
+        data = response.json()
+        self.assertEqual([entry['title'] for entry in data['results']], ['Swimming gala'])
+        self.assertTrue(data['has_next'])
+        data = self.client.get('/search/?q=swimming&format=json&limit=1&page=2').json()
+        self.assertEqual([entry['title'] for entry in data['results']], ['Pack kit'])
+        self.assertFalse(data['has_next'])
+        self.assertEqual(self.client.get('/search/?q=x&type=memo&format=json').status_code, 400)
+        self.assertContains(self.client.get('/search/?q=allergy'), 'Penicillin')
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class ReminderTests(TestCase):
+    def setUp(self):
+        self.now = timezone.make_aware(datetime(2025, 3, 10, 18, 0))
+        self.user, self.parent, self.children = make_family(entries_per_type=0)
+        child = self.children[0]
+        make = lambda **fields: Entry.objects.create(child=child, **fields)
+        make(title='Tonight', entry_type='event', event_date=date(2025, 3, 10), event_start_time=time(19))
+        make(title='Earlier today', entry_type='event', event_date=date(2025, 3, 10), event_start_time=time(8))
+        make(title='Spellings', entry_type='task', task_due_date=date(2025, 3, 11), task_due_time=time(9))
+        make(title='Done already', entry_type='task', task_due_date=date(2025, 3, 11), is_completed=True)
+        make(title='All day tomorrow', entry_type='event', event_date=date(2025, 3, 11))
+        make(title='Next week', entry_type='task', task_due_date=date(2025, 3, 17))
+        make(title='Untimed today', entry_type='task', task_due_date=date(2025, 3, 10))
+
+    def test_window(self):
+        start, end = due_window(24, self.now)
+        titles = set(due_entries(start, end).values_list('title', flat=True))
+        self.assertEqual(titles, {'Tonight', 'Spellings', 'Untimed today'})
+
+    def test_digests_for_all_parents_in_one_query(self):
+        other_user, _, other_children = make_family(username='other', entries_per_type=0)
+        Entry.objects.create(child=other_children[0], title='Other event', entry_type='event',
+                             event_date=date(2025, 3, 11), event_start_time=time(10))
+        quiet, _, quiet_children = make_family(username='quiet', entries_per_type=0)
+        quiet.email = ''
+        quiet.save()
+        Entry.objects.create(child=quiet_children[0], title='Unsent', entry_type='event', event_date=date(2025, 3, 11))
+
+        with self.assertNumQueries(1):
+            digests, entries = send_digests(hours=24, now=self.now, batch_size=1)
+        self.assertEqual((digests, entries), (2, 4))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [other_user.email, self.user.email])
+        mine = next(message for message in mail.outbox if message.to == [self.user.email])
+        self.assertEqual(mine.subject, 'ParentPlanner: 3 things coming up')
+        self.assertLess(mine.body.index('Untimed today'), mine.body.index('Tonight'))
+        self.assertIn('Tonight', mine.alternatives[0][0])
+
+    def test_event_with_leftover_task_columns_uses_its_event_time(self):
+        # A task edited into an event keeps its old due date
+        Entry.objects.create(child=self.children[0], title='Was a task', entry_type='event',
+                             event_date=date(2025, 3, 10), event_start_time=time(20),
+                             task_due_date=date(2025, 1, 1), task_due_time=time(7))
+        start, end = due_window(24, self.now)
+        rows = [row for row in due_rows(start, end) if row[6] == 'Was a task']
+        self.assertEqual(rows[0][3:5], (date(2025, 3, 10), time(20)))
+
+    def test_command_dry_run(self):
+        out = StringIO()
+        call_command('send_reminders', dry_run=True, stdout=out)
+        self.assertIn('Built', out.getvalue())
+        self.assertEqual(mail.outbox, [])
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.user, self.parent, self.children = make_family(entries_per_type=0)
+        self.client.force_login(self.user)
+        self.calls = []
+
+        def flaky(job, fail_times=0):
+            self.calls.append(job.attempts)
+            if job.attempts <= fail_times:
+                raise RuntimeError('try again')
+            return {'attempts': job.attempts}
+
+        patcher = mock.patch.dict(HANDLERS, {'flaky': flaky})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_claim_run_and_succeed(self):
+        job = enqueue('flaky', parent=self.parent)
+        later = enqueue('flaky', delay=3600)
+        self.assertEqual(claim_jobs('w1', limit=5), [job.id])
+        self.assertEqual(claim_jobs('w2', limit=5), [])
+        self.assertEqual(run_job(job.id, 'w1'), 'succeeded')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.attempts), ('succeeded', {'attempts': 1}, 1))
+        self.assertEqual(Job.objects.get(pk=later.id).status, 'queued')
+
+    def test_retries_with_backoff_then_fails(self):
+        job = enqueue('flaky', payload={'fail_times': 5}, max_attempts=2)
+        self.assertEqual(run_pending(), ['retrying'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('try again', job.error)
+
+        Job.objects.filter(pk=job.id).update(run_after=timezone.now())
+        self.assertEqual(run_pending(), ['failed'])
+        self.assertEqual(Job.objects.get(pk=job.id).status, 'failed')
+        self.assertEqual(self.calls, [1, 2])
+
+    def test_expired_claim_is_taken_over(self):
+        job = enqueue('flaky', timeout=60)
+        claim_jobs('dead', limit=1)
+        self.assertEqual(claim_jobs('w2', limit=1), [])
+        later = timezone.now() + timedelta(seconds=61)
+        self.assertEqual(claim_jobs('w2', limit=1, now=later), [job.id])
+        # The first worker's late result is ignored
+        run_job(job.id, 'dead')
+        self.assertEqual(Job.objects.get(pk=job.id).status, 'running')
+        self.assertEqual(run_job(job.id, 'w2'), 'succeeded')
+
+    def test_expired_last_attempt_is_failed(self):
+        job = enqueue('flaky', timeout=60, max_attempts=1)
+        claim_jobs('dead', limit=1)
+        later = timezone.now() + timedelta(seconds=61)
+        self.assertEqual(claim_jobs('w2', limit=1, now=later), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_until), ('failed', 1, None))
+        self.assertEqual(self.calls, [])
+
+    def test_status_endpoint_is_per_parent(self):
+        job = enqueue('flaky', parent=self.parent)
+        response = self.client.get(f'/jobs/{job.id}/')
+        self.assertEqual(response.json()['status'], 'queued')
+        other = enqueue('flaky', parent=make_family(username='other', entries_per_type=0)[1])
+        self.assertEqual(self.client.get(f'/jobs/{other.id}/').status_code, 404)
+
+    def test_large_import_runs_in_worker(self):
+        row = 'Spellings,Child 0,task,homework\n'
+        content = 'title,child,entry_type,category\n' + row * (IMPORT_INLINE_MAX_BYTES // len(row) + 1)
+        response = self.client.post('/import/', {'file': SimpleUploadedFile('big.csv', content.encode())})
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(Entry.objects.filter(title='Spellings').exists())
+
+        job = Job.objects.get(pk=response.context['job']['id'])
+        # The file waits beside the job, not in the row the workers poll
+        self.assertNotIn('content', job.payload)
+        self.assertTrue(JobFile.objects.filter(job=job).exists())
+
+        version = get_parent_version(self.parent.pk)
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('run_worker', once=True, concurrency=1, stdout=out)
+        self.assertIn('1 succeeded', out.getvalue())
+        result = self.client.get(f"/jobs/{job.id}/").json()['result']
+        self.assertEqual(result['created'], Entry.objects.filter(title='Spellings').count())
+        self.assertEqual(reload_parent(self.parent).stats.tasks_count, result['created'])
+        self.assertFalse(JobFile.objects.filter(job=job).exists())
+        # The web processes see this through the shared cache backend
+        self.assertNotEqual(get_parent_version(self.parent.pk), version)
+
+    def test_import_retry_after_commit_does_not_duplicate(self):
+        upload = SimpleUploadedFile('term.csv', b'title,child,entry_type\nSpellings,Child 0,task\n')
+        job = enqueue_import(self.parent, upload, 'csv')
+        first = HANDLERS['import_entries'](job, **job.payload)
+        # As if the worker died before run_job recorded the result
+        again = HANDLERS['import_entries'](job, **job.payload)
+        self.assertEqual(first, again)
+        self.assertEqual(Entry.objects.filter(title='Spellings').count(), 1)
+        self.assertEqual(reload_parent(self.parent).stats.tasks_count, 1)
+
+    def test_oversized_import_is_refused(self):
+        upload = SimpleUploadedFile('huge.csv', b'title\n' + b'x\n' * (IMPORT_MAX_BYTES // 2))
+        response = self.client.post('/import/', {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    def test_claim_is_extended_while_the_handler_runs(self):
+        seen = []
+
+        def slow(job):
+            claimed_until = Job.objects.get(pk=job.pk).locked_until
+            sleep(0.5)
+            seen.append(Job.objects.get(pk=job.pk).locked_until > claimed_until)
+
+        with mock.patch.dict(HANDLERS, {'slow': slow}):
+            job = enqueue('slow', timeout=1)
+            self.assertEqual(claim_jobs('w1', limit=1), [job.id])
+            self.assertEqual(run_job(job.id, 'w1'), 'succeeded')
+        self.assertEqual(seen, [True])
+
+
+class ChildDeleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=10)
+        self.client.force_login(self.user)
+        self.child, self.sibling = self.children
+
+    def test_child_is_hidden_at_once_and_purged_later(self):
+        kept = Entry.objects.filter(child=self.sibling).count()
+        response = self.client.post(f'/delete-child/{self.child.id}/', follow=True)
+        self.assertContains(response, "Child 0&#x27;s profile and all associated entries have been deleted.")
+        self.assertEqual(Entry.objects.filter(child=self.child).count(), 15)
+
+        # Gone from every read path before the worker runs
+        self.assertFalse(Child.objects.filter(pk=self.child.id).exists())
+        self.assertEqual(self.client.get(f'/child/{self.child.id}/').status_code, 404)
+        self.assertEqual(Entry.objects.for_parent(self.parent).count(), kept)
+        self.assertEqual(search_entries(self.parent, 'Task').filter(child=self.child).count(), 0)
+        stats = reload_parent(self.parent).stats
+        self.assertEqual(stats.tasks_count + stats.events_count + stats.notes_count, kept)
+        self.assertNotIn('Child 0', self.client.get('/dashboard/').content.decode())
+        self.assertEqual(self.client.post(f'/delete-child/{self.child.id}/').status_code, 404)
+
+        self.assertEqual(run_pending(), ['succeeded'])
+        self.assertFalse(Child.all_objects.filter(pk=self.child.id).exists())
+        self.assertFalse(Entry.objects.filter(child_id=self.child.id).exists())
+        self.assertEqual(Job.objects.get(name='purge_child').result, {'deleted_entries': 15})
+        self.assertEqual(Entry.objects.filter(child=self.sibling).count(), kept)
+
+    def test_purge_deletes_in_batches(self):
+        Child.objects.filter(pk=self.child.id).update(deleted_at=timezone.now())
+        job = Job(parent=self.parent)
+        # One id query and one DELETE per batch of 4 (15 entries), an empty
+        # id query, then the child delete's collector queries
+        with self.assertNumQueries(4 * 2 + 1 + 4):
+            result = purge_child_job(job, self.child.id, batch_size=4)
+        self.assertEqual(result, {'deleted_entries': 15})
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=5)
+        self.client.force_login(self.user)
+
+    def revalidate(self, url, **headers):
+        # The first page sets the CSRF cookie its forms (and so its ETag) use
+        self.client.get(url, **headers)
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+        # Only the session and the user (with its parent joined)
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_dashboard(self):
+        etag = self.revalidate('/dashboard/')
+        self.assertNotEqual(self.revalidate('/dashboard/?type=task'), etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Entry.objects.create(child=self.children[0], title='New', entry_type='note')
+        self.assertEqual(self.client.get('/dashboard/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_pending_messages_are_rendered(self):
+        etag = self.revalidate('/dashboard/')
+        self.client.post(f'/toggle-completion/{Entry.objects.filter(child__parent=self.parent).first().id}/')
+        response = self.client.get('/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Completion toggle temporarily disabled')
+
+    def test_child_page(self):
+        child = self.children[1]
+        etag = self.revalidate(f'/child/{child.id}/')
+        child.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            child.save()
+        response = self.client.get(f'/child/{child.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Renamed')
+
+    def test_json_lists(self):
+        etag = self.revalidate('/api/tasks/?limit=3')
+        self.assertNotEqual(self.revalidate('/api/notes/?limit=3'), etag)
+        self.revalidate('/search/?q=task&format=json')
+        self.assertFalse(self.client.get('/search/?q=task').has_header('ETag'))
+
+
+class JsonApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.parent, self.children = make_family(entries_per_type=12)
+        self.client.force_login(self.user)
+        self.task = Entry.objects.filter(child=self.children[0], entry_type='task').first()
+
+    def test_sparse_list_pages_through_a_section(self):
+        seen = []
+        url = '/api/v1/entries/?type=task&fields=title,child&limit=5'
+        while url:
+            with self.assertNumQueries(3):  # session, user, one page
+                body = self.client.get(url).json()
+            seen += body['results']
+            url = body['next_cursor'] and f"/api/v1/entries/?type=task&fields=title,child&limit=5&cursor={body['next_cursor']}"
+        self.assertEqual(len(seen), 12)
+        self.assertEqual(set(seen[0]), {'id', 'title', 'child'})
+        page, _ = section_page(Entry.objects.for_parent(self.parent), 'task', limit=12)
+        self.assertEqual([row['id'] for row in seen], [entry.id for entry in page])
+
+    def test_list_filters(self):
+        body = self.client.get(f'/api/v1/entries/?child={self.children[1].id}&completed=false&type=task').json()
+        expected = Entry.objects.filter(child=self.children[1], entry_type='task', is_completed=False).count()
+        self.assertEqual(len(body['results']), expected)
+        self.assertEqual(self.client.get('/api/v1/entries/?fields=title,secret').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/entries/?priority=urgent').status_code, 400)
+
+    def test_read_loads_only_requested_columns(self):
+        with self.assertNumQueries(3):
+            body = self.client.get(f'/api/v1/entries/{self.task.id}/?fields=title,category_display').json()
+        self.assertEqual(body['entry'], {'id': self.task.id, 'title': self.task.title, 'category_display': 'None'})
+        other = make_family(username='other', entries_per_type=1)[2][0]
+        self.assertEqual(self.client.get(f'/api/v1/children/{other.id}/').status_code, 404)
+
+    def test_partial_update_returns_object(self):
+        response = self.client.patch(
+            f'/api/v1/entries/{self.task.id}/', json.dumps({'title': 'Renamed', 'priority': 'high'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        entry = response.json()['entry']
+        self.assertEqual((entry['title'], entry['priority'], entry['child']['id']), ('Renamed', 'high', self.children[0].id))
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.child_id), ('Renamed', self.children[0].id))
+
+        # The modal forms post form data
+        response = self.client.post(f'/api/v1/entries/{self.task.id}/', {'title': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('title', response.json()['errors'])
+
+    def test_form_encoded_patch_and_unreadable_bodies(self):
+        response = self.client.patch(f'/api/v1/entries/{self.task.id}/', 'title=Form+patch',
+                                     content_type='application/x-www-form-urlencoded')
+        self.assertEqual(response.json()['entry']['title'], 'Form patch')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Form patch')
+
+        response = self.client.patch(f'/api/v1/entries/{self.task.id}/', 'title=Lost', content_type='text/plain')
+        self.assertEqual(response.status_code, 415)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Form patch')
+
+    def test_update_can_return_the_rendered_card(self):
+        response = self.client.post(f'/api/v1/entries/{self.task.id}/?format=html',
+                                    {'category': 'chores', 'description': 'Bins out'})
+        html = response.json()['html']
+        self.assertIn(f'data-entry-id="{self.task.id}"', html)
+        self.assertIn('Chores', html)
+        self.assertIn('Bins out', html)
+
+    def test_create_entry_and_child(self):
+        response = self.client.post('/api/v1/entries/', json.dumps({
+            'title': 'Swimming', 'child': self.children[1].id, 'entry_type': 'event', 'category': 'activities',
+            'priority': 'medium', 'event_date': '2025-05-01', 'event_start_time': '10:00',
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(reload_parent(self.parent).stats.events_count, 13)
+
+        response = self.client.post('/api/v1/children/', {'name': 'Third', 'colour': '#4ECDC4'})
+        self.assertEqual(response.status_code, 201)
+        children = self.client.get('/api/v1/children/?fields=name').json()['results']
+        self.assertEqual([child['name'] for child in children], ['Child 0', 'Child 1', 'Third'])
+
+        response = self.client.patch(f"/api/v1/children/{response.json()['child']['id']}/",
+                                     json.dumps({'school': 'Oak Lane'}), content_type='application/json')
+        self.assertEqual(response.json()['child']['school'], 'Oak Lane')
 
-# Create your tests here.
@@ -28,6 +28,36 @@ urlpatterns = [
     path('toggle-completion/<int:entry_id>/', views.toggle_entry_completion, name='toggle_entry_completion'),
     path('tasks/<int:task_id>/toggle-completion/', views.toggle_task_completion, name='toggle_task_completion'),
     path('quick-delete/<int:entry_id>/', views.quick_delete_entry, name='quick_delete_entry'),
+    path('entries/bulk/', views.bulk_entries, name='bulk_entries'),
+
+    # Keyset-paginated JSON pages for infinite scroll
+    path('api/tasks/', views.section_entries, {'entry_type': 'task'}, name='task_page'),
+    path('api/events/', views.section_entries, {'entry_type': 'event'}, name='event_page'),
+    path('api/notes/', views.section_entries, {'entry_type': 'note'}, name='note_page'),
+
+    # Month/week calendar and its date-range API
+    path('calendar/', views.calendar_view, name='calendar'),
+    path('api/calendar/', views.calendar_entries, name='calendar_entries'),
+
+    # iCalendar subscriptions (authenticated by the token in the URL)
+    path('feeds/<str:token>/planner.ics', views.calendar_feed, name='calendar_feed'),
+    path('feeds/<str:token>/child/<int:child_id>.ics', views.calendar_feed, name='child_calendar_feed'),
+    path('feeds/reset/', views.reset_feed, name='reset_feed'),
+
+    # Full history downloads (?format=csv or ndjson)
+    path('export/', views.export_entries, name='export_entries'),
+    path('export/child/<int:child_id>/', views.export_entries, name='export_child_entries'),
+    path('import/', views.import_entries_view, name='import_entries'),
+    path('jobs/<int:job_id>/', views.job_status_view, name='job_status'),
+
+    # Full-text search (?format=json for the API)
+    path('search/', views.search, name='search'),
+
+    # Versioned JSON API for the front-end scripts
+    path('api/v1/entries/', views.api_entry_list, name='api_entry_list'),
+    path('api/v1/entries/<int:entry_id>/', views.api_entry_detail, name='api_entry_detail'),
+    path('api/v1/children/', views.api_child_list, name='api_child_list'),
+    path('api/v1/children/<int:child_id>/', views.api_child_detail, name='api_child_detail'),
     # path('register/', views.registration, name='register'),
     # path('logout/', views.logout_view, name='logout'),
 ]
\ No newline at end of file
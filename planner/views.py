@@ -1,27 +1,72 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
-from django.db.models import Case, When, Value, DateField, Count, Q
+import csv
+import json
+import logging
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.template.loader import render_to_string
+from django.http import JsonResponse, QueryDict, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.template.defaultfilters import filesizeformat
+from django.utils.dateparse import parse_date
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_http_methods, condition
 from .forms import registrationForm, childForm, entryForm, noteForm
-from .models import Parent, Child, Entry, Category
+from .models import Parent, Child, Entry, Category, Job
+from .queries import aload_child_data, section_page, section_ordering, calendar_window, DASHBOARD_SECTION_LIMIT, CALENDAR_VIEWS
+from .pagination import paginate, ordering_terms
+from .pagination import PAGE_SIZE_MAX
+from .serializers import (
+    CHILD_FIELDS, ENTRY_CARD_FIELDS, ENTRY_FIELDS, child_to_dict, entry_to_dict, field_columns, sparse_fields,
+)
+from .cache import aget_dashboard_data, render_dashboard_sections, bump_parent_version, get_calendar_data, parent_etag
+from .export import EXPORT_FORMATS, export_lines, parent_entries
+from .importer import IMPORT_INLINE_MAX_BYTES, IMPORT_MAX_BYTES, IMPORT_READERS, ImportFileError, import_entries, import_format
+from .jobs import enqueue_import, job_status, delete_child_later
+from .ics import get_feed_token, reset_feed_token, feed_entries, feed_state, feed_etag, render_feed
+from .streaming import streaming_content
+from .search import SEARCH_PAGE_SIZE, SEARCH_PAGE_SIZE_MAX, search_entries, search_page
+from .stats import get_parent_stats, get_child_stats, apply_delta, apply_child_deltas, entry_delta, merge_deltas
+from .middleware import get_parent, set_parent, aget_parent
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
+from django.utils import timezone
 
-# Create your views here.
+logger = logging.getLogger(__name__)
 
 #---------------find parent or redirect-------------------
 def get_parent_or_redirect(request):
-    try:
-        return Parent.objects.get(user=request.user)
-    except Parent.DoesNotExist:
-        # For onboarding flow, create Parent object automatically
-        if request.GET.get('onboarding') == 'true' or request.POST.get('onboarding') == 'true':
-            parent = Parent.objects.create(user=request.user)
-            return parent
-        else:
-            messages.error(request, 'Access denied.')
-            return None
+    parent = get_parent(request)
+    if parent is not None:
+        return parent
+    # For onboarding flow, create Parent object automatically
+    if request.GET.get('onboarding') == 'true' or request.POST.get('onboarding') == 'true':
+        return get_or_create_parent(request)
+    messages.error(request, 'Access denied.')
+    return None
+
+
+def get_or_create_parent(request):
+    parent = get_parent(request)
+    if parent is None:
+        parent, _ = Parent.objects.get_or_create(user=request.user)
+        set_parent(request, parent)
+    return parent
+
+
+async def aget_parent_or_redirect(request):
+    await aget_parent(request)
+    return await sync_to_async(get_parent_or_redirect)(request)
+
+
+async def aget_or_create_parent(request):
+    if await aget_parent(request) is not None:
+        return request._cached_parent
+    return await sync_to_async(get_or_create_parent)(request)
 
 
 # ----------------------------home view----------------------------
@@ -44,20 +89,90 @@ def home(request):
 #     return render(request, 'registration/registration.html', {'form': form})
 
 
+#----------------------- conditional GET ----------------------------
+def data_etag(request, *parts):
+    """
+    ETag for a response built from the signed-in parent's data: their cache
+    version (bumped on every change), parts, the query string and today's
+    date, which moves the overdue and upcoming markers. None for anonymous
+    requests, which the view answers.
+    """
+    parent = get_parent(request)
+    if parent is None:
+        return None
+    return parent_etag(parent.id, *parts, request.GET.urlencode(), timezone.localdate())
+
+
+def page_etag(request, *parts):
+    """
+    data_etag() for a rendered page. It also covers the CSRF cookie the
+    page's forms embed, and a page with flash messages waiting is always
+    rendered so they are shown once.
+    """
+    if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+        return None
+    return data_etag(request, *parts, request.META.get('CSRF_COOKIE', ''))
+
+
+def parent_condition(etag_func):
+    """
+    condition(etag_func=...) for sync and async views. Django calls
+    etag_func synchronously, which an async view can't do when the parent
+    isn't loaded yet, so for those the parent is loaded first (sharing the
+    user login_required already fetched) and etag_func runs in sync_to_async.
+    """
+    def decorator(view):
+        if not iscoroutinefunction(view):
+            return condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            await aget_parent(request)
+            etag = await sync_to_async(etag_func)(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if etag is not None and request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
+
+
+def revalidate(response):
+    # Browsers keep the page but check the ETag on every load
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 #-----------------------------dashboard view---------------------------------
+def dashboard_etag(request):
+    return page_etag(request, 'dashboard')
+
+
 @login_required
-def dashboard(request):
-    parent, _ = Parent.objects.get_or_create(user=request.user)
+@parent_condition(dashboard_etag)
+async def dashboard(request):
+    parent = await aget_or_create_parent(request)
     
+    # Children and a windowed slice of entries for every section, cached per
+    # family and invalidated by planner.signals whenever their data changes
+    data = await aget_dashboard_data(parent, request.GET.get('type', ''))
+    # Forms, messages and rendering touch the ORM and session synchronously
+    response = await sync_to_async(dashboard_response)(request, parent, data)
+    return revalidate(response)
+
+
+def dashboard_response(request, parent, data):
     # Clear any old messages on fresh dashboard access (e.g. after login)
     # This prevents messages from previous users/sessions from persisting
     if request.method == 'GET' and not request.GET.get('page'):
         storage = messages.get_messages(request)
         list(storage)  # This clears the messages
     
-    # Optimized queries with select_related for better performance
-    children = Child.objects.filter(parent=parent).order_by('name')
-    children_count = children.count()
+    children = data['children']
+    children_count = data['children_count']
     
     # Adaptive dashboard logic based on child count
     dashboard_mode = 'empty'  # 0 children
@@ -65,38 +180,7 @@ def dashboard(request):
         dashboard_mode = 'single_child'
     elif children_count >= 2:
         dashboard_mode = 'multi_child'
-    
-    # Optimized entry query - only fetch what we need with select_related
-    all_entries = Entry.objects.filter(child__parent=parent)\
-        .select_related('child')\
-        .order_by('-created_at')
-    
-    # Handle filtering by entry type (for All/Tasks/Events buttons)
-    entry_type_filter = request.GET.get('type', '')
-    if entry_type_filter == 'task':
-        filtered_entries = all_entries.filter(entry_type='task').order_by(
-            'is_completed',  # Incomplete tasks first
-            Case(
-                When(task_due_date__isnull=True, then=Value('9999-12-31')),
-                default='task_due_date',
-                output_field=DateField(),
-            ),
-            'task_due_time',
-            'created_at'
-        )
-    elif entry_type_filter == 'event':
-        filtered_entries = all_entries.filter(entry_type='event').order_by(
-            Case(
-                When(event_date__isnull=True, then=Value('9999-12-31')),
-                default='event_date',
-                output_field=DateField(),
-            ),
-            'event_start_time',
-            'created_at'  # Changed from -created_at to put newer events with same date first
-        )
-    else:
-        # 'All' or no filter - exclude notes from main timeline
-        filtered_entries = all_entries.exclude(entry_type='note')
+    primary_child = children[0] if children_count == 1 else None
     
     # Handle entry form submission
     if request.method == 'POST' and 'add_entry' in request.POST:
@@ -108,7 +192,7 @@ def dashboard(request):
     else:
         # Pre-select child for single child mode
         if dashboard_mode == 'single_child':
-            form = entryForm(parent=parent, initial={'child': children.first()})
+            form = entryForm(parent=parent, initial={'child': primary_child})
         else:
             form = entryForm(parent=parent)
     
@@ -122,7 +206,7 @@ def dashboard(request):
     else:
         # Pre-select child for single child mode
         if dashboard_mode == 'single_child':
-            note_form = noteForm(parent=parent, initial={'child': children.first()})
+            note_form = noteForm(parent=parent, initial={'child': primary_child})
         else:
             note_form = noteForm(parent=parent)
     
@@ -138,74 +222,39 @@ def dashboard(request):
     else:
         child_form = childForm()
     
-    # Limit entries for better performance - only show recent entries on dashboard
-    active_entries = filtered_entries[:20]
-    
-    # DEBUG: Print what we're getting
-    print(f"DEBUG: filtered_entries count = {filtered_entries.count()}")
-    print(f"DEBUG: active_entries count = {len(active_entries)}")
-    for entry in active_entries[:5]:  # Print first 5
-        print(f"  - {entry.title} ({entry.entry_type})")
-    
-    # Get recent notes for the notes section - limit to 15, ordered by most recently updated
-    notes = all_entries.filter(entry_type='note').order_by('-updated_at')[:15]
-    
-    # Get tasks and events separately for the new 4-section layout
-    # Order tasks by incomplete first, then by due date (soonest first)
-    tasks = all_entries.filter(entry_type='task').order_by(
-        'is_completed',  # Incomplete tasks first
-        Case(
-            When(task_due_date__isnull=True, then=Value('9999-12-31')),
-            default='task_due_date',
-            output_field=DateField(),
-        ),
-        'task_due_time',
-        'created_at'
-    )[:20]
-    
-    # Order events by upcoming dates first (closest dates to today at top)
-    # Events with dates come first, sorted by date ascending (soonest first)
-    # Events without dates come after, sorted by creation date descending (newest first)
-    events = all_entries.filter(entry_type='event').order_by(
-        Case(
-            When(event_date__isnull=True, then=Value('9999-12-31')),
-            default='event_date',
-            output_field=DateField(),
-        ),
-        'event_start_time',
-        'created_at'  # Changed from -created_at to put newer events with same date first
-    )[:20]
+    active_entries = data['active_entries']
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            'dashboard: filtered_entries=%s active_entries=%s first=%s',
+            data['filtered_count'], len(active_entries),
+            [(entry.title, entry.entry_type) for entry in active_entries[:5]],
+        )
     
     # Keep timeline entries for backward compatibility (now events only)
-    timeline_entries = events
-    
-    # Efficient counting using database aggregation
-    entry_counts = all_entries.aggregate(
-        total=Count('id'),
-        notes=Count('id', filter=Q(entry_type='note')),
-        tasks=Count('id', filter=Q(entry_type='task')),
-        events=Count('id', filter=Q(entry_type='event'))
-    )
+    timeline_entries = data['events']
     
     context = {
         'parent': parent,
         'children': children,
         'children_count': children_count,
         'dashboard_mode': dashboard_mode,
-        'primary_child': children.first() if children_count == 1 else None,
+        'primary_child': primary_child,
         'active_entries': active_entries,
         'entries': timeline_entries,  # For events section - events only
-        'tasks': tasks,  # For tasks section - tasks only
-        'events': events,  # For events section - events only  
-        'total_entries': entry_counts['total'],
-        'notes_count': entry_counts['notes'],
-        'tasks_count': entry_counts['tasks'],
-        'events_count': entry_counts['events'],
+        'tasks': data['tasks'],  # For tasks section - tasks only
+        'events': data['events'],  # For events section - events only  
+        'total_entries': data['total_entries'],
+        'notes_count': data['notes_count'],
+        'tasks_count': data['tasks_count'],
+        'events_count': data['events_count'],
         'form': form,
         'note_form': note_form,
         'child_form': child_form,
-        'notes': notes,  # For notes section - notes only
+        'notes': data['notes'],  # For notes section - notes only
     }
+    # Pre-rendered section fragments (children/events/tasks/notes)
+    context.update(render_dashboard_sections(parent, data))
     return render(request, 'dashboard.html', context)
 
 
@@ -225,17 +274,17 @@ def add_child(request):
     
     if request.method == 'POST':
         form = childForm(request.POST)
-        print(f"DEBUG: Form data received: {request.POST}")
+        logger.debug('add_child: form data received: %s', request.POST)
         if form.is_valid():
             child = form.save(commit=False)
             child.parent = parent
-            print(f"DEBUG: About to save child with name: '{child.name}'")
+            logger.debug("add_child: about to save child with name '%s'", child.name)
             # TEMPORARY FIX: If name is empty, use a default
             if not child.name or child.name.strip() == '':
                 child.name = request.POST.get('name', 'Test Child')
-                print(f"DEBUG: Name was empty, setting to: '{child.name}'")
+                logger.debug("add_child: name was empty, setting to '%s'", child.name)
             child.save()
-            print(f"DEBUG: Child created with name: '{child.name}'")
+            logger.debug("add_child: child created with name '%s'", child.name)
             
             if is_onboarding:
                 messages.success(request, f'Child profile for {child.name} created successfully!')
@@ -244,8 +293,7 @@ def add_child(request):
                 messages.success(request, f'Added {child.name}!')
                 return redirect('dashboard')
         else:
-            print(f"DEBUG: Form is not valid. Errors: {form.errors}")
-            print(f"DEBUG: Form cleaned_data: {getattr(form, 'cleaned_data', 'No cleaned data')}")
+            logger.debug('add_child: form is not valid. Errors: %s', form.errors)
             messages.error(request, 'Please correct the errors below.')
     else:
         form = childForm()
@@ -305,8 +353,7 @@ def add_entry(request):
             return redirect('child_entries', child_id=entry.child.id)
         else:
             # Add error message when form validation fails
-            print("Form errors:", form.errors)  # Debug print
-            print("Form data:", request.POST)  # Debug print
+            logger.debug('add_entry: form errors: %s, form data: %s', form.errors, request.POST)
             messages.error(request, 'Please correct the errors below and try again.')
     else:
         # Pre-select child if coming from child page
@@ -323,20 +370,43 @@ def add_entry(request):
 
 
 #-----------------------child entries view----------------------------
+def child_entries_etag(request, child_id):
+    return page_etag(request, 'child', child_id)
+
+
 @login_required
-def child_entries(request, child_id):
-    parent = get_parent_or_redirect(request)
+@parent_condition(child_entries_etag)
+async def child_entries(request, child_id):
+    parent = await aget_parent_or_redirect(request)
     if not parent:
         return redirect('register')
-    child = get_object_or_404(Child, id=child_id, parent=parent)
+    child = await aget_object_or_404(Child.objects.select_related('stats'), id=child_id, parent=parent)
     
+    response, form, note_form = await sync_to_async(child_entry_forms)(request, parent, child)
+    if response:
+        return response
+    
+    # Only the first page of each section is rendered; the rest is fetched
+    # from the paginated section endpoints as the user scrolls
+    context = await aload_child_data(child)
+    context.update({
+        'child': child,
+        'form': form,
+        'note_form': note_form,
+    })
+    response = await sync_to_async(render)(request, 'planner/childEntries.html', context)
+    return revalidate(response)
+
+
+def child_entry_forms(request, parent, child):
+    """Handle the child page's add forms; returns (redirect or None, form, note_form)"""
     # Handle note creation separately
     if request.method == 'POST' and 'add_note' in request.POST:
         note_form = noteForm(request.POST, parent=parent)
         if note_form.is_valid():
             note = note_form.save()
             messages.success(request, f'Added note for {child.name}!')
-            return redirect('child_entries', child_id=child.id)
+            return redirect('child_entries', child_id=child.id), None, None
     else:
         note_form = noteForm(parent=parent, initial={'child': child})
     
@@ -346,60 +416,33 @@ def child_entries(request, child_id):
         if form.is_valid():
             entry = form.save()
             messages.success(request, f'Added {entry.get_entry_type_display().lower()} for {child.name}!')
-            return redirect('child_entries', child_id=child.id)
+            return redirect('child_entries', child_id=child.id), None, None
     else:
         form = entryForm(parent=parent, initial={'child': child})
-    
-    # Get all entries excluding notes
-    entries = Entry.objects.filter(child=child).exclude(entry_type='note').defer('is_completed').order_by('-created_at')
-    
-    # Separate tasks and events for the new layout
-    # Order tasks by incomplete first, then by due date (soonest first)
-    tasks = Entry.objects.filter(child=child, entry_type='task').order_by(
-        'is_completed',  # Incomplete tasks first
-        Case(
-            When(task_due_date__isnull=True, then=Value('9999-12-31')),
-            default='task_due_date',
-            output_field=DateField(),
-        ),
-        'task_due_time',
-        'created_at'
-    )
-    
-    # Order events by upcoming dates first (closest dates to today at top)
-    events = Entry.objects.filter(child=child, entry_type='event').order_by(
-        Case(
-            When(event_date__isnull=True, then=Value('9999-12-31')),
-            default='event_date',
-            output_field=DateField(),
-        ),
-        'event_start_time',
-        'created_at'  # Changed from -created_at to put newer events with same date first
-    )
-    
-    # Get notes separately, ordered by most recently updated first
-    notes = Entry.objects.filter(child=child, entry_type='note').order_by('-updated_at')
-    
-    return render(request, 'planner/childEntries.html', {
-        'child': child,
-        'form': form,
-        'note_form': note_form,
-        'entries': entries,
-        'tasks': tasks,
-        'events': events,
-        'notes': notes,
-        'categories': Category.objects.all(),
-    })
+    return None, form, note_form
 
 
 
+#---------------------------------partial saves----------------------------
+def save_changed_fields(form):
+    """
+    Save a bound, valid entry ModelForm writing only the columns the user
+    changed (plus updated_at), or nothing at all if nothing changed.
+    """
+    entry = form.save(commit=False)
+    changed = [name for name in form.changed_data if name in form._meta.fields]
+    if changed:
+        entry.save(update_fields=changed + ['updated_at'])
+    return entry
+
+
 #---------------------------------edit entry view----------------------------
 @login_required
 def edit_entry(request, entry_id):
     parent = get_parent_or_redirect(request)
     if not parent:
         return redirect('register')
-    entry = get_object_or_404(Entry.objects.defer('is_completed'), id=entry_id, child__parent=parent)
+    entry = get_object_or_404(Entry.objects.for_parent(parent).with_child(), id=entry_id)
     
     # Get the 'next' parameter from GET (initial load) or POST (form submission)
     next_url = request.GET.get('next') or request.POST.get('next')
@@ -407,14 +450,14 @@ def edit_entry(request, entry_id):
     if request.method == 'POST':
         form = entryForm(request.POST, instance=entry, parent=parent)
         if form.is_valid():
-            form.save()
+            save_changed_fields(form)
             messages.success(request, f'Updated {entry.get_entry_type_display().lower()}: {entry.title}')
             
             # Redirect based on 'next' parameter or default to child_entries
             if next_url == 'dashboard':
                 return redirect('dashboard')
             else:
-                return redirect('child_entries', child_id=entry.child.id)
+                return redirect('child_entries', child_id=entry.child_id)
     else:
         form = entryForm(instance=entry, parent=parent)
         
@@ -437,11 +480,11 @@ def save_entry(request, entry_id):
     if not parent:
         return redirect('register')
         
-    entry = get_object_or_404(Entry, id=entry_id, child__parent=parent)
+    entry = get_object_or_404(Entry.objects.for_parent(parent).with_child(), id=entry_id)
     form = entryForm(request.POST, instance=entry, parent=parent)
     
     if form.is_valid():
-        form.save()
+        save_changed_fields(form)
         messages.success(request, f'Updated {entry.get_entry_type_display().lower()}: {entry.title}')
     else:
         messages.error(request, 'Please correct the errors in the form.')
@@ -459,8 +502,8 @@ def delete_entry(request, entry_id, redirect_to='child_entries'):
     parent = get_parent_or_redirect(request)
     if not parent:
         return redirect('register')
-    entry = get_object_or_404(Entry.objects.defer('is_completed'), id=entry_id, child__parent=parent)
-    child_id = entry.child.id
+    entry = get_object_or_404(Entry.objects.for_parent(parent).with_child(), id=entry_id)
+    child_id = entry.child_id
     if request.method == 'POST':
         entry_title = entry.title
         entry_type = entry.get_entry_type_display()
@@ -527,7 +570,8 @@ def delete_child(request, child_id):
     
     if request.method == 'POST':
         child_name = child.name
-        child.delete()  # This will cascade delete all related entries
+        # Hidden now; the entries are removed by a background job
+        delete_child_later(child)
         messages.success(request, f'{child_name}\'s profile and all associated entries have been deleted.')
         return redirect('dashboard')
     
@@ -542,7 +586,7 @@ def toggle_entry_completion(request, entry_id):
     parent = get_parent_or_redirect(request)
     if not parent:
         return redirect('register')
-    entry = get_object_or_404(Entry.objects.defer('is_completed'), id=entry_id, child__parent=parent)
+    entry = get_object_or_404(Entry.objects.for_parent(parent).only('id', 'title'), id=entry_id)
     messages.info(request, f'Completion toggle temporarily disabled for "{entry.title}". Database update needed.')
     return redirect('dashboard')
 
@@ -567,7 +611,7 @@ def unified_dashboard(request, child_id=None):
     Unified view that handles both dashboard (child_id=None) and child profile (child_id provided) modes.
     Uses the same template with different context to ensure 100% consistency.
     """
-    parent, _ = Parent.objects.get_or_create(user=request.user)
+    parent = get_or_create_parent(request)
     
     # Determine mode and get child if in child mode
     child = None
@@ -617,25 +661,26 @@ def unified_dashboard(request, child_id=None):
     # Get entries based on mode
     if child:
         # Child mode: Only entries for this child
-        all_entries = Entry.objects.filter(child=child).defer('is_completed')
+        all_entries = Entry.objects.filter(child=child).with_child()
         entries = all_entries.exclude(entry_type='note').order_by('-created_at')
-        notes = all_entries.filter(entry_type='note').order_by('-updated_at')
+        notes = all_entries.notes().order_by('-updated_at')
     else:
         # Dashboard mode: All entries for all children
-        all_entries = Entry.objects.filter(child__parent=parent).defer('is_completed')
+        all_entries = Entry.objects.for_parent(parent).with_child()
         entries = all_entries.exclude(entry_type='note').order_by('-created_at')
-        notes = all_entries.filter(entry_type='note').order_by('-updated_at')
+        notes = all_entries.notes().order_by('-updated_at')
 
     # Apply filtering for entries
     entry_type_filter = request.GET.get('type')
     if entry_type_filter in ['task', 'event']:
         entries = entries.filter(entry_type=entry_type_filter)
 
-    # Calculate counts
-    total_entries = all_entries.count()
-    notes_count = notes.count()
-    tasks_count = all_entries.filter(entry_type='task').count()
-    events_count = all_entries.filter(entry_type='event').count()
+    # Counts come from the denormalised counter rows, not COUNT queries
+    stats = get_child_stats(child) if child else get_parent_stats(parent)
+    total_entries = stats.total_entries
+    notes_count = stats.notes_count
+    tasks_count = stats.tasks_count
+    events_count = stats.events_count
 
     context = {
         'parent': parent,
@@ -657,52 +702,708 @@ def unified_dashboard(request, child_id=None):
     return render(request, 'unified_dashboard.html', context)
 
 
+def set_task_completion(parent, task_id, new_status):
+    """
+    One narrow UPDATE, scoped to this parent's tasks - no SELECT of the row.
+    Matching on the old status means a row count of 1 is a real change, so
+    the counters move in the same transaction. Returns the row count.
+    """
+    with transaction.atomic():
+        updated = Entry.objects.for_parent(parent).tasks().filter(
+            id=task_id, is_completed=not new_status,
+        ).update(is_completed=new_status, updated_at=timezone.now())
+        if updated:
+            apply_delta(
+                [parent.id],
+                Entry.objects.filter(id=task_id).order_by().values('child_id'),
+                {'completed_tasks_count': 1 if new_status else -1},
+            )
+    if updated:
+        # Queryset updates bypass the model signals
+        bump_parent_version(parent.id)
+    return updated
+
+
 @login_required
 @require_http_methods(["POST"])
-def toggle_task_completion(request, task_id):
+async def toggle_task_completion(request, task_id):
     """Toggle task completion status via AJAX"""
-    print(f"Toggle task completion called for task_id: {task_id}")
+    logger.debug('toggle_task_completion: task_id=%s', task_id)
     try:
-        parent = get_parent_or_redirect(request)
+        parent = await aget_parent_or_redirect(request)
         if not parent:
-            print("Parent not found")
+            logger.debug('toggle_task_completion: parent not found')
             return JsonResponse({'success': False, 'error': 'Parent not found'})
         
-        print(f"Parent found: {parent}")
-        
-        # Get the task - ensure it belongs to this parent
-        task = get_object_or_404(Entry, 
-                                id=task_id, 
-                                child__parent=parent,
-                                entry_type='task')
-        
-        print(f"Task found: {task.title} (current status: {task.is_completed})")
-        
         # Parse the request data
-        import json
         data = json.loads(request.body)
-        new_status = data.get('is_completed', False)
+        new_status = bool(data.get('is_completed', False))
         
-        print(f"Updating task to completed: {new_status}")
+        logger.debug('toggle_task_completion: task %s is_completed -> %s', task_id, new_status)
         
-        # Update the task
-        task.is_completed = new_status
-        task.save()
-        
-        print(f"Task updated successfully. New status: {task.is_completed}")
+        updated = await sync_to_async(set_task_completion)(parent, task_id, new_status)
+        if not updated and not await Entry.objects.for_parent(parent).tasks().filter(id=task_id).aexists():
+            logger.debug('toggle_task_completion: task %s not found', task_id)
+            return JsonResponse({'success': False, 'error': 'Task not found'})
         
         return JsonResponse({
             'success': True, 
-            'is_completed': task.is_completed,
-            'task_id': task.id
+            'is_completed': new_status,
+            'task_id': task_id
         })
         
-    except Entry.DoesNotExist:
-        print(f"Task with id {task_id} not found")
-        return JsonResponse({'success': False, 'error': 'Task not found'})
     except json.JSONDecodeError:
-        print("Invalid JSON data received")
+        logger.debug('toggle_task_completion: invalid JSON data received')
         return JsonResponse({'success': False, 'error': 'Invalid JSON data'})
     except Exception as e:
-        print(f"Unexpected error: {str(e)}")
+        logger.exception('toggle_task_completion: unexpected error')
         return JsonResponse({'success': False, 'error': str(e)})
+
+
+#----------------------- section page API (infinite scroll) ----------------------------
+SECTION_ITEM_TEMPLATES = {
+    'task': 'components/task_item.html',
+    'event': 'components/event_item.html',
+    'note': 'components/note_item.html',
+}
+
+
+def render_entry_card(request, entry):
+    """An entry's card as its section lists it"""
+    return render_to_string(
+        SECTION_ITEM_TEMPLATES[entry.entry_type], {'task': entry, 'entry': entry, 'note': entry}, request=request,
+    )
+
+
+def section_etag(request, entry_type):
+    return data_etag(request, 'section', entry_type)
+
+
+@login_required
+@require_http_methods(["GET"])
+@parent_condition(section_etag)
+def section_entries(request, entry_type):
+    """
+    Keyset-paginated JSON page of tasks, events or notes.
+    ?cursor= continues from the previous page's next_cursor, ?child= limits
+    the page to one child and ?limit= sets the page size. ?format=html
+    returns the rendered section cards instead, ending in a "Load more"
+    link to the following page; the sections append these as they scroll.
+    """
+    parent = get_parent_or_redirect(request)
+    if not parent:
+        return JsonResponse({'success': False, 'error': 'Parent not found'}, status=403)
+
+    entries = Entry.objects.for_parent(parent).with_child()
+    try:
+        limit = min(max(int(request.GET.get('limit', DASHBOARD_SECTION_LIMIT)), 1), PAGE_SIZE_MAX)
+        if request.GET.get('child'):
+            entries = entries.filter(child_id=int(request.GET['child']))
+        page, next_cursor = section_page(entries, entry_type, request.GET.get('cursor'), limit)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    if request.GET.get('format') == 'html':
+        query = request.GET.copy()
+        query['cursor'] = next_cursor or ''
+        return revalidate(render(request, 'components/section_page.html', {
+            'entries': page,
+            'item_template': SECTION_ITEM_TEMPLATES[entry_type],
+            'next_cursor': next_cursor,
+            'next_url': f'{request.path}?{query.urlencode()}',
+        }))
+
+    return revalidate(JsonResponse({
+        'success': True,
+        'results': [entry_to_dict(entry) for entry in page],
+        'next_cursor': next_cursor,
+    }))
+
+
+#----------------------- calendar ----------------------------
+def calendar_params(request):
+    """
+    Parse ?view=month|week, ?date=YYYY-MM-DD (default today), ?child= and
+    ?type=task|event; raises ValueError on bad input.
+    """
+    view = request.GET.get('view', 'month')
+    if view not in CALENDAR_VIEWS:
+        raise ValueError('view must be month or week')
+    day = parse_date(request.GET['date']) if request.GET.get('date') else timezone.localdate()
+    if day is None:
+        raise ValueError('date must be YYYY-MM-DD')
+    child_id = int(request.GET['child']) if request.GET.get('child') else None
+    entry_type = request.GET.get('type') or None
+    if entry_type not in (None, 'task', 'event'):
+        raise ValueError('type must be task or event')
+    start, end, previous, following = calendar_window(view, day)
+    return {
+        'view': view, 'date': day, 'start': start, 'end': end, 'previous': previous, 'next': following,
+        'child': child_id, 'type': entry_type,
+    }
+
+
+def calendar_etag(request):
+    # No tag for anonymous or malformed requests; the view answers those
+    parent = get_parent(request)
+    if parent is None:
+        return None
+    try:
+        params = calendar_params(request)
+    except ValueError:
+        return None
+    return parent_etag(parent.id, 'calendar', params['start'], params['end'], params['child'], params['type'])
+
+
+@login_required
+def calendar_view(request):
+    """Month or week grid of every child's events and dated tasks"""
+    parent = get_or_create_parent(request)
+    try:
+        params = calendar_params(request)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('calendar')
+
+    days = get_calendar_data(parent, params['start'], params['end'], params['child'], params['type'])
+    context = {
+        'params': params,
+        'weeks': [days[n:n + 7] for n in range(0, len(days), 7)],
+        'children': Child.objects.filter(parent=parent).order_by('name'),
+        'today': timezone.localdate(),
+        'feed_token': get_feed_token(parent),
+    }
+    return render(request, 'planner/calendar.html', context)
+
+
+@login_required
+@require_http_methods(["GET"])
+@condition(etag_func=calendar_etag)
+def calendar_entries(request):
+    """
+    JSON calendar window: every day from start to end with its events and
+    dated tasks. The ETag follows the parent's cache version, so paging back
+    to a month that hasn't changed is a 304 without touching the database.
+    """
+    parent = get_parent_or_redirect(request)
+    if not parent:
+        return JsonResponse({'success': False, 'error': 'Parent not found'}, status=403)
+    try:
+        params = calendar_params(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    days = get_calendar_data(parent, params['start'], params['end'], params['child'], params['type'])
+    response = JsonResponse({
+        'success': True,
+        'view': params['view'],
+        'start': params['start'],
+        'end': params['end'],
+        'previous': params['previous'],
+        'next': params['next'],
+        'days': days,
+    })
+    # Always revalidate; the ETag makes that cheap
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+#----------------------- calendar feeds (ICS) ----------------------------
+def feed_context(request, token, child_id=None):
+    """
+    The parent, feed queryset and (last_modified, count) state for a feed
+    request, loaded once and shared by the condition() callbacks and the view.
+    """
+    if not hasattr(request, '_feed'):
+        parent = get_object_or_404(Parent, feed_token=token)
+        child = get_object_or_404(Child, id=child_id, parent=parent) if child_id is not None else None
+        entries = feed_entries(parent, child_id)
+        request._feed = (parent, child, entries, *feed_state(entries))
+    return request._feed
+
+
+def feed_etag_func(request, token, child_id=None):
+    parent, _, _, last_modified, count = feed_context(request, token, child_id)
+    return feed_etag(parent.pk, last_modified, count)
+
+
+# No Last-Modified: a child rename changes the feed without moving any
+# entry's updated_at, so only the ETag can tell
+@require_http_methods(["GET", "HEAD"])
+@condition(etag_func=feed_etag_func)
+def calendar_feed(request, token, child_id=None):
+    """
+    Tokenized iCalendar subscription for a parent's or one child's events
+    and dated tasks. Polls that find nothing changed get a 304 from
+    condition() after two small queries; otherwise the feed is streamed.
+    """
+    parent, child, entries, _, _ = feed_context(request, token, child_id)
+    name = f'{child.name} - ParentPlanner' if child else 'ParentPlanner'
+    response = StreamingHttpResponse(
+        streaming_content(request, render_feed(entries, name)), content_type='text/calendar; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'inline; filename="{"child-%d" % child.id if child else "planner"}.ics"'
+    patch_cache_control(response, private=True, max_age=300)
+    return response
+
+
+@login_required
+@require_http_methods(["POST"])
+def reset_feed(request):
+    """Replace the feed token, cutting off every existing subscription"""
+    parent = get_or_create_parent(request)
+    reset_feed_token(parent)
+    messages.success(request, 'Calendar subscription links reset. Re-subscribe with the new links.')
+    return redirect('calendar')
+
+
+#----------------------- export ----------------------------
+@login_required
+@require_http_methods(["GET"])
+def export_entries(request, child_id=None):
+    """
+    Stream a family's (or one child's) whole history as ?format=csv (the
+    default) or ?format=ndjson, without loading it into memory.
+    """
+    parent = get_or_create_parent(request)
+    child = get_object_or_404(Child, id=child_id, parent=parent) if child_id is not None else None
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'success': False, 'error': 'format must be csv or ndjson'}, status=400)
+
+    response = StreamingHttpResponse(
+        streaming_content(request, export_lines(parent_entries(parent, child_id), export_format)),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    name = f'child-{child.id}' if child else 'planner'
+    response['Content-Disposition'] = f'attachment; filename="{name}-entries.{export_format}"'
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
+
+#----------------------- import ----------------------------
+@login_required
+def import_entries_view(request):
+    """
+    Upload a CSV or ICS file of entries. Rows that fail validation are
+    skipped and listed; everything else is saved in one go. Files over
+    IMPORT_INLINE_MAX_BYTES are imported by a background job instead, and
+    files over IMPORT_MAX_BYTES are refused.
+    """
+    parent = get_or_create_parent(request)
+    children = Child.objects.filter(parent=parent).order_by('name')
+    context = {'children': children}
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        child = None
+        if request.POST.get('child'):
+            child = get_object_or_404(Child, id=request.POST['child'], parent=parent)
+        try:
+            if upload is None:
+                raise ImportFileError('Choose a file to import.')
+            file_format = import_format(upload.name, request.POST.get('format'))
+            if upload.size > IMPORT_MAX_BYTES:
+                raise ImportFileError(f'Files over {filesizeformat(IMPORT_MAX_BYTES)} cannot be imported.')
+            if upload.size > IMPORT_INLINE_MAX_BYTES:
+                # Too slow for the request; hand the file to a worker and poll for the result
+                job = enqueue_import(parent, upload, file_format, child)
+                messages.success(request, 'Your file is being imported. This page will update when it is done.')
+                context['job'] = job_status(job)
+                return render(request, 'planner/importEntries.html', context, status=202)
+            result = import_entries(parent, IMPORT_READERS[file_format](upload), default_child=child)
+        except (ImportFileError, UnicodeDecodeError, csv.Error) as e:
+            messages.error(request, f'Could not import that file: {e}')
+            return render(request, 'planner/importEntries.html', context, status=400)
+        if result['created']:
+            messages.success(request, f"Imported {result['created']} entries.")
+        context['result'] = result
+    return render(request, 'planner/importEntries.html', context)
+
+
+#----------------------- background jobs ----------------------------
+@login_required
+@require_http_methods(["GET"])
+def job_status_view(request, job_id):
+    """Progress of one of the parent's background jobs, for polling"""
+    parent = get_or_create_parent(request)
+    job = get_object_or_404(Job, id=job_id, parent=parent)
+    response = JsonResponse(job_status(job))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+#----------------------- search ----------------------------
+def search_params(request):
+    """Parse ?q=, ?child=, ?type=, ?category= and ?page=; raises ValueError"""
+    child_id = int(request.GET['child']) if request.GET.get('child') else None
+    entry_type = request.GET.get('type') or None
+    if entry_type and entry_type not in dict(Entry.ENTRY_TYPES):
+        raise ValueError('type must be task, event or note')
+    category = request.GET.get('category') or None
+    if category and category not in dict(Entry.CATEGORY_CHOICES):
+        raise ValueError('Unknown category')
+    page = max(int(request.GET.get('page', 1)), 1)
+    return {
+        'q': request.GET.get('q', '').strip(), 'child': child_id, 'type': entry_type,
+        'category': category, 'page': page,
+    }
+
+
+def search_wants_json(request):
+    return request.GET.get('format') == 'json' or request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+
+def search_etag(request):
+    # Only the JSON results; the page carries messages and the nav
+    return data_etag(request, 'search') if search_wants_json(request) else None
+
+
+@login_required
+@require_http_methods(["GET"])
+@parent_condition(search_etag)
+def search(request):
+    """
+    Ranked full-text search over a family's entries. JSON for
+    ?format=json (or XHR), otherwise the search page.
+    """
+    parent = get_or_create_parent(request)
+    wants_json = search_wants_json(request)
+    try:
+        params = search_params(request)
+        per_page = min(max(int(request.GET.get('limit', SEARCH_PAGE_SIZE)), 1), SEARCH_PAGE_SIZE_MAX)
+    except ValueError as e:
+        if wants_json:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        messages.error(request, str(e))
+        return redirect('search')
+
+    results = search_entries(parent, params['q'], params['child'], params['type'], params['category'])
+    entries, has_next = search_page(results, params['page'], per_page)
+    if wants_json:
+        return revalidate(JsonResponse({
+            'success': True,
+            'results': [{**entry_to_dict(entry), 'rank': entry.rank} for entry in entries],
+            'page': params['page'],
+            'has_next': has_next,
+        }))
+    return render(request, 'planner/search.html', {
+        'params': params,
+        'entries': entries,
+        'has_next': has_next,
+        'children': Child.objects.filter(parent=parent).order_by('name'),
+        'entry_types': Entry.ENTRY_TYPES,
+        'categories': Entry.CATEGORY_CHOICES,
+    })
+
+
+#----------------------- JSON API (v1) ----------------------------
+# Read and write entries and children as JSON, for the front-end scripts.
+# ?fields=a,b returns only those fields and loads only their columns. Writes
+# take a JSON body or form data, are checked by the same forms as the pages,
+# and answer with the saved object. Updates only change the fields sent.
+API_ENTRY_ORDERING = ['-updated_at', '-id']
+
+
+def api_etag(request, **kwargs):
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    return data_etag(request, 'api', request.path)
+
+
+def api_error(message, status=400, errors=None):
+    body = {'success': False, 'error': message}
+    if errors is not None:
+        body['errors'] = errors
+    return JsonResponse(body, status=status)
+
+
+class UnsupportedMediaType(ValueError):
+    """The request body is in a format the API doesn't read"""
+
+
+def api_body(request):
+    """
+    The request's JSON object or form data; raises ValueError. Django only
+    parses form bodies for POST, so a URL-encoded PATCH is parsed here.
+    """
+    if request.content_type == 'application/json':
+        body = json.loads(request.body or b'{}')
+        if not isinstance(body, dict):
+            raise ValueError('Send a JSON object')
+        return body
+    if request.method == 'POST' and request.content_type in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+        return request.POST
+    if request.content_type == 'application/x-www-form-urlencoded':
+        return QueryDict(request.body, encoding=request.encoding)
+    raise UnsupportedMediaType('Send application/json or application/x-www-form-urlencoded')
+
+
+def api_form(form_class, body, instance=None, **kwargs):
+    """
+    Bind form_class to body. For an update the instance's current values
+    fill in every field the body leaves out.
+    """
+    data = {}
+    if instance is not None:
+        current = form_class(instance=instance, **kwargs)
+        data = {name: current[name].value() for name in current.fields}
+    data.update({name: body[name] for name in body if name != 'csrfmiddlewaretoken'})
+    return form_class(data, instance=instance, **kwargs)
+
+
+def form_errors(form):
+    return {field: [error['message'] for error in errors] for field, errors in form.errors.get_json_data().items()}
+
+
+def entry_api_form(body, parent, instance=None):
+    entry_type = body.get('entry_type') or (instance.entry_type if instance else None)
+    form_class = noteForm if entry_type == 'note' else entryForm
+    return api_form(form_class, body, instance, parent=parent)
+
+
+def api_entries(parent, fields, *columns):
+    """The parent's entries with only the columns the fields (and columns) need"""
+    entries = Entry.objects.for_parent(parent)
+    if 'child' in fields:
+        entries = entries.select_related('child')
+    return entries.only(*field_columns(fields, ENTRY_FIELDS), *columns)
+
+
+def entry_filters(request, entries):
+    """Apply ?type=, ?child=, ?category=, ?priority= and ?completed=; raises ValueError"""
+    entry_type = request.GET.get('type') or None
+    if entry_type and entry_type not in dict(Entry.ENTRY_TYPES):
+        raise ValueError('type must be task, event or note')
+    if entry_type:
+        entries = entries.filter(entry_type=entry_type)
+    if request.GET.get('child'):
+        entries = entries.filter(child_id=int(request.GET['child']))
+    for name, choices in (('category', Entry.CATEGORY_CHOICES), ('priority', Entry.PRIORITY_CHOICES)):
+        value = request.GET.get(name)
+        if value:
+            if value not in dict(choices):
+                raise ValueError(f'Unknown {name}')
+            entries = entries.filter(**{name: value})
+    completed = request.GET.get('completed')
+    if completed:
+        if completed not in ('true', 'false'):
+            raise ValueError('completed must be true or false')
+        entries = entries.filter(is_completed=completed == 'true')
+    return entries
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+@parent_condition(api_etag)
+def api_entry_list(request):
+    """
+    GET: keyset-paginated entries, in section order when ?type= is given
+    and newest change first otherwise; ?cursor= and ?limit= page through.
+    POST: create an entry.
+    """
+    parent = get_or_create_parent(request)
+    try:
+        fields = sparse_fields(request.GET.get('fields'), ENTRY_FIELDS, ENTRY_CARD_FIELDS)
+        if request.method == 'POST':
+            form = entry_api_form(api_body(request), parent)
+        else:
+            entry_type = request.GET.get('type') or None
+            ordering = section_ordering(entry_type) if entry_type in dict(Entry.ENTRY_TYPES) else API_ENTRY_ORDERING
+            # The cursor needs the sort columns whatever the fields
+            sort_columns = [name for name, _, _ in ordering_terms(ordering)]
+            entries = entry_filters(request, api_entries(parent, fields, *sort_columns))
+            limit = min(max(int(request.GET.get('limit', DASHBOARD_SECTION_LIMIT)), 1), PAGE_SIZE_MAX)
+            page, next_cursor = paginate(entries, ordering, request.GET.get('cursor'), limit)
+    except UnsupportedMediaType as e:
+        return api_error(str(e), status=415)
+    except ValueError as e:
+        return api_error(str(e))
+
+    if request.method == 'POST':
+        if not form.is_valid():
+            return api_error('Please correct the errors in the form.', errors=form_errors(form))
+        entry = form.save()
+        return JsonResponse({'success': True, 'entry': entry_to_dict(entry, fields)}, status=201)
+    return revalidate(JsonResponse({
+        'success': True,
+        'results': [entry_to_dict(entry, fields) for entry in page],
+        'next_cursor': next_cursor,
+    }))
+
+
+@login_required
+@require_http_methods(["GET", "POST", "PATCH"])
+@parent_condition(api_etag)
+def api_entry_detail(request, entry_id):
+    """
+    GET one entry; POST or PATCH updates the fields sent and returns it.
+    ?format=html on an update adds the entry's re-rendered section card.
+    """
+    parent = get_or_create_parent(request)
+    try:
+        fields = sparse_fields(request.GET.get('fields'), ENTRY_FIELDS, ENTRY_CARD_FIELDS)
+        body = api_body(request) if request.method != 'GET' else None
+    except UnsupportedMediaType as e:
+        return api_error(str(e), status=415)
+    except ValueError as e:
+        return api_error(str(e))
+
+    if request.method == 'GET':
+        entry = get_object_or_404(api_entries(parent, fields), id=entry_id)
+        return revalidate(JsonResponse({'success': True, 'entry': entry_to_dict(entry, fields)}))
+
+    entry = get_object_or_404(Entry.objects.for_parent(parent).with_child(), id=entry_id)
+    form = entry_api_form(body, parent, instance=entry)
+    if not form.is_valid():
+        return api_error('Please correct the errors in the form.', errors=form_errors(form))
+    entry = save_changed_fields(form)
+    data = {'success': True, 'entry': entry_to_dict(entry, fields)}
+    if request.GET.get('format') == 'html':
+        data['html'] = render_entry_card(request, entry)
+    return JsonResponse(data)
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+@parent_condition(api_etag)
+def api_child_list(request):
+    """GET: the family's children by name. POST: add a child."""
+    parent = get_or_create_parent(request)
+    try:
+        fields = sparse_fields(request.GET.get('fields'), CHILD_FIELDS, CHILD_FIELDS)
+        body = api_body(request) if request.method == 'POST' else None
+    except UnsupportedMediaType as e:
+        return api_error(str(e), status=415)
+    except ValueError as e:
+        return api_error(str(e))
+
+    if request.method == 'POST':
+        form = api_form(childForm, body)
+        if not form.is_valid():
+            return api_error('Please correct the errors in the form.', errors=form_errors(form))
+        child = form.save(commit=False)
+        child.parent = parent
+        child.save()
+        return JsonResponse({'success': True, 'child': child_to_dict(child, fields)}, status=201)
+    children = Child.objects.filter(parent=parent).order_by('name', 'id').only(*field_columns(fields, CHILD_FIELDS))
+    return revalidate(JsonResponse({'success': True, 'results': [child_to_dict(child, fields) for child in children]}))
+
+
+@login_required
+@require_http_methods(["GET", "POST", "PATCH"])
+@parent_condition(api_etag)
+def api_child_detail(request, child_id):
+    """GET one child; POST or PATCH updates the fields sent and returns it"""
+    parent = get_or_create_parent(request)
+    try:
+        fields = sparse_fields(request.GET.get('fields'), CHILD_FIELDS, CHILD_FIELDS)
+        body = api_body(request) if request.method != 'GET' else None
+    except UnsupportedMediaType as e:
+        return api_error(str(e), status=415)
+    except ValueError as e:
+        return api_error(str(e))
+
+    if request.method == 'GET':
+        children = Child.objects.filter(parent=parent).only(*field_columns(fields, CHILD_FIELDS))
+        child = get_object_or_404(children, id=child_id)
+        return revalidate(JsonResponse({'success': True, 'child': child_to_dict(child, fields)}))
+
+    child = get_object_or_404(Child, id=child_id, parent=parent)
+    form = api_form(childForm, body, instance=child)
+    if not form.is_valid():
+        return api_error('Please correct the errors in the form.', errors=form_errors(form))
+    child = form.save()
+    return JsonResponse({'success': True, 'child': child_to_dict(child, fields)})
+
+
+#----------------------- bulk entry actions ----------------------------
+BULK_MAX_IDS = 500
+BULK_OPERATIONS = ('complete', 'uncomplete', 'delete', 'set_category', 'set_priority')
+
+
+@login_required
+@require_http_methods(["POST"])
+def bulk_entries(request):
+    """
+    Apply one operation to many entries with a single UPDATE or DELETE.
+    Body: {"ids": [...], "operation": "complete" | "uncomplete" | "delete" |
+    "set_category" | "set_priority", "value": "<category or priority>"}.
+    Returns a result per id: ok, not_found or not_a_task.
+    """
+    parent = get_parent_or_redirect(request)
+    if not parent:
+        return JsonResponse({'success': False, 'error': 'Parent not found'}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        ids = [int(entry_id) for entry_id in data.get('ids', [])]
+    except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON data'}, status=400)
+    operation = data.get('operation')
+    value = data.get('value')
+
+    if operation not in BULK_OPERATIONS:
+        return JsonResponse({'success': False, 'error': 'Unknown operation'}, status=400)
+    if not ids or len(ids) > BULK_MAX_IDS:
+        return JsonResponse({'success': False, 'error': f'Send between 1 and {BULK_MAX_IDS} ids'}, status=400)
+    if operation == 'set_category' and value not in dict(Entry.CATEGORY_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Invalid category'}, status=400)
+    if operation == 'set_priority' and value not in dict(Entry.PRIORITY_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Invalid priority'}, status=400)
+
+    changes = {
+        'complete': {'is_completed': True},
+        'uncomplete': {'is_completed': False},
+        'set_category': {'category': value},
+        'set_priority': {'priority': value},
+    }.get(operation)
+    with transaction.atomic():
+        # Authorize every id in one query, fetching what the counters need
+        # too. The rows stay locked until the write commits, so a concurrent
+        # toggle or delete can't change them between the read and the deltas.
+        owned = {
+            entry_id: (entry_type, child_id, is_completed)
+            for entry_id, entry_type, child_id, is_completed in Entry.objects.for_parent(parent)
+            .filter(id__in=ids).select_for_update(of=('self',))
+            .values_list('id', 'entry_type', 'child_id', 'is_completed')
+        }
+        results = {entry_id: 'ok' if entry_id in owned else 'not_found' for entry_id in ids}
+        if operation in ('complete', 'uncomplete'):
+            for entry_id, (entry_type, _, _) in owned.items():
+                if entry_type != 'task':
+                    results[entry_id] = 'not_a_task'
+        target_ids = [entry_id for entry_id, result in results.items() if result == 'ok']
+
+        if target_ids:
+            targets = Entry.objects.filter(id__in=target_ids)
+            deltas = {}
+            for entry_id in target_ids:
+                entry_type, child_id, is_completed = owned[entry_id]
+                if operation == 'delete':
+                    change = entry_delta(entry_type, is_completed, sign=-1)
+                elif operation == 'complete' and not is_completed:
+                    change = {'completed_tasks_count': 1}
+                elif operation == 'uncomplete' and is_completed:
+                    change = {'completed_tasks_count': -1}
+                else:
+                    continue
+                deltas[child_id] = merge_deltas(deltas.get(child_id, {}), change)
+            if operation == 'delete':
+                # Entries have no dependants, so skip the collector and per-row signals
+                targets._raw_delete(targets.db)
+            else:
+                if operation in ('complete', 'uncomplete'):
+                    # Like set_task_completion, only rows that really change
+                    targets = targets.filter(is_completed=not changes['is_completed'])
+                targets.update(updated_at=timezone.now(), **changes)
+            apply_child_deltas(parent.id, deltas)
+    if target_ids:
+        # Queryset writes bypass the model signals
+        bump_parent_version(parent.id)
+
+    return JsonResponse({
+        'success': True,
+        'operation': operation,
+        'updated': len(target_ids),
+        'results': {str(entry_id): result for entry_id, result in results.items()},
+    })
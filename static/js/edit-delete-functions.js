@@ -324,3 +324,65 @@ function deleteChild() {
         console.log('User cancelled child deletion');
     }
 }
+
+// Save the edit modals through the JSON API instead of posting the form and
+// re-rendering the whole page. Entry cards are swapped for the server's
+// re-rendered card; a child edit, or an entry that now belongs in another
+// section or on another child's page, reloads instead.
+// If the request itself fails the form is posted the old way.
+function entryMovedFrom(item, entry) {
+    if (item.dataset.entryType !== entry.entry_type) return true;
+    const section = item.closest('[data-page-url]');
+    const pageChild = section && new URL(section.dataset.pageUrl, window.location.href).searchParams.get('child');
+    return Boolean(pageChild) && Number(pageChild) !== entry.child.id;
+}
+
+function updateEntryCard(entry, html) {
+    const items = Array.from(document.querySelectorAll(`li[data-entry-id="${entry.id}"]`));
+    if (items.some(function(item) { return entryMovedFrom(item, entry); })) {
+        window.location.reload();
+        return;
+    }
+    items.forEach(function(item) {
+        const card = document.createElement('template');
+        card.innerHTML = html;
+        item.replaceWith(card.content.querySelector('li'));
+    });
+}
+
+document.addEventListener('submit', function(e) {
+    const form = e.target;
+    const match = (form.action || '').match(/\/save-(entry|child)\/(\d+)\/$/);
+    if (!match || !window.fetch) return;
+    e.preventDefault();
+
+    const url = match[1] === 'entry' ? `/api/v1/entries/${match[2]}/?format=html` : `/api/v1/children/${match[2]}/`;
+    fetch(url, {
+        method: 'POST',
+        body: new FormData(form),
+        headers: {'X-Requested-With': 'XMLHttpRequest'},
+        credentials: 'same-origin',
+    })
+        .then(function(response) {
+            return response.json().then(function(body) { return {ok: response.ok, body: body}; });
+        })
+        .then(function(result) {
+            if (!result.ok) {
+                const errors = Object.entries(result.body.errors || {})
+                    .map(function([field, messages]) { return `${field}: ${messages.join(' ')}`; });
+                alert([result.body.error].concat(errors).join('\n'));
+                return;
+            }
+            if (match[1] === 'child') {
+                window.location.reload();
+                return;
+            }
+            updateEntryCard(result.body.entry, result.body.html);
+            closeEditEventModal();
+            closeEditTaskModal();
+        })
+        .catch(function(error) {
+            console.error('API save failed, posting the form instead:', error);
+            form.submit();
+        });
+});
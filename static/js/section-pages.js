@@ -0,0 +1,91 @@
+/**
+ * Section Pages
+ * The task, event and note sections render their first page only. Each list
+ * with more to show ends in a "Load more" link to the section page API
+ * (?format=html), which returns the next cards and a link to the page after.
+ * Scrolling near the end of a section, or clicking the link, appends them.
+ */
+
+/**
+ * Fetch the page a section's "Load more" link points at and append its cards
+ */
+function loadNextSectionPage(section) {
+    const link = section.querySelector('a.load-more');
+    if (!link || section.dataset.loading === 'true') {
+        return;
+    }
+    section.dataset.loading = 'true';
+    link.textContent = 'Loading...';
+
+    fetch(link.href, {
+        credentials: 'same-origin',
+        headers: { 'X-Requested-With': 'XMLHttpRequest' },
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.text();
+    })
+    .then(html => {
+        const page = document.createElement('template');
+        page.innerHTML = html;
+        const list = section.querySelector('ul');
+        Array.from(page.content.children)
+            .filter(element => element.tagName === 'LI')
+            .forEach(card => list.appendChild(card));
+
+        const nextLink = page.content.querySelector('a.load-more');
+        if (nextLink) {
+            link.replaceWith(nextLink);
+            section.dataset.nextCursor = nextLink.dataset.cursor;
+            observeLoadMore(section, nextLink);
+        } else {
+            link.remove();
+            section.dataset.nextCursor = '';
+        }
+    })
+    .catch(error => {
+        console.error('Error loading more entries:', error);
+        link.textContent = 'Load more';
+        if (typeof window.showNotification === 'function') {
+            window.showNotification('Failed to load more entries. Please try again.', 'error');
+        }
+    })
+    .finally(() => {
+        delete section.dataset.loading;
+    });
+}
+
+/**
+ * Load the next page once the link scrolls into view within its section
+ */
+function observeLoadMore(section, link) {
+    if (!('IntersectionObserver' in window)) {
+        return;  // The link still works when clicked
+    }
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            observer.disconnect();
+            loadNextSectionPage(section);
+        }
+    }, { root: section, rootMargin: '200px' });
+    observer.observe(link);
+}
+
+document.addEventListener('click', function(e) {
+    const link = e.target.closest('[data-page-url] a.load-more');
+    if (link) {
+        e.preventDefault();
+        loadNextSectionPage(link.closest('[data-page-url]'));
+    }
+});
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('[data-page-url]').forEach(section => {
+        const link = section.querySelector('a.load-more');
+        if (link) {
+            observeLoadMore(section, link);
+        }
+    });
+});